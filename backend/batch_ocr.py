@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Bulk OCR of a directory or ZIP/TAR archive
+
+Walks the source, OCRs every supported document on a pool of worker
+processes and appends one JSON line per document to the output file. The
+output doubles as the checkpoint: rerunning the same command skips every
+document already recorded as completed, so an interrupted backfill resumes
+where it stopped.
+
+    python batch_ocr.py /data/scans --output scans.jsonl --processes 8
+    python batch_ocr.py scans-2019.tar.gz --output scans-2019.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Optional, Set
+
+import config
+from concurrency import apply_thread_limit, cpu_count, default_table_cell_workers, tesseract_processes
+from document_source import entry_error, iter_source
+
+logger = logging.getLogger("batch_ocr")
+
+# OCRProcessor of this worker process, created once by the pool initializer
+_processor = None
+
+
+def init_worker(tesseract_threads: int, log_level: str):
+    """Load the OCR stack once per worker process"""
+    global _processor
+    logging.basicConfig(level=getattr(logging, log_level), format=config.LOG_FORMAT)
+    apply_thread_limit(tesseract_threads)
+
+    from ocr_processor import OCRProcessor
+    _processor = OCRProcessor()
+
+
+def process_entry(name: str, path: Optional[str], content: Optional[bytes], document_class: Optional[str]) -> Dict:
+    """OCR one document in a worker process and return its output record"""
+    started = time.perf_counter()
+    temp_path = None
+    try:
+        if path is None:
+            # Archive entries arrive as bytes; PDFs and images are decoded from a file
+            fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            path = temp_path
+
+        results = _processor.process_file(path, os.path.basename(name), document_class=document_class)
+        return {
+            "source": name,
+            "status": "completed",
+            "seconds": round(time.perf_counter() - started, 3),
+            "results": [result.model_dump(mode="json", exclude={"timings"}) for result in results]
+        }
+    except Exception as e:
+        return {"source": name, "status": "failed", "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+    finally:
+        if temp_path is not None:
+            os.unlink(temp_path)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Sources already completed in a previous run; drops a partially written last line"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            # The previous run died mid-write
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "completed":
+                completed.add(record["source"])
+    return completed
+
+
+def run(args) -> Dict[str, int]:
+    completed = load_checkpoint(args.output)
+    if completed:
+        logger.info(f"Resuming: {len(completed)} documents already completed in {args.output}")
+
+    # Each process OCRs up to PAGE_WORKERS pages of a document at once, and has its own table cell threads
+    processes = args.processes or max(1, cpu_count() // max(1, config.PAGE_WORKERS))
+    processes_per_worker = tesseract_processes(1, table_cell_workers=default_table_cell_workers())
+    tesseract_threads = args.tesseract_threads or max(1, cpu_count() // (processes * processes_per_worker))
+    # Enough queued work to keep every process busy, without buffering the whole archive
+    max_in_flight = processes * 2
+
+    counts = {"completed": 0, "failed": 0, "skipped": 0, "resumed": 0}
+    started = time.perf_counter()
+
+    with open(args.output, 'a') as output, ProcessPoolExecutor(
+        max_workers=processes, initializer=init_worker, initargs=(tesseract_threads, args.log_level)
+    ) as executor:
+        pending = set()
+        reported = 0
+
+        def drain(block_until: int):
+            nonlocal pending, reported
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                    counts[record["status"]] += 1
+                    if record["status"] == "failed":
+                        logger.warning(f"Failed: {record['source']}: {record['error']}")
+                total = counts["completed"] + counts["failed"]
+                # One wait() can finish several documents, so a multiple of progress_every may be skipped over
+                if total // args.progress_every > reported // args.progress_every:
+                    reported = total
+                    elapsed = time.perf_counter() - started
+                    logger.info(f"{total} documents processed ({total / elapsed:.2f}/s), {counts['failed']} failed")
+
+        try:
+            for entry in iter_source(args.source):
+                if entry.name in completed:
+                    counts["resumed"] += 1
+                    continue
+                error = entry_error(entry, args.max_file_size)
+                if error:
+                    logger.info(f"Skipping {error}")
+                    counts["skipped"] += 1
+                    continue
+
+                content = None
+                if entry.path is None:
+                    content = entry.read(args.max_file_size)
+                    if len(content) > args.max_file_size:
+                        logger.info(f"Skipping oversized archive entry {entry.name}")
+                        counts["skipped"] += 1
+                        continue
+
+                drain(max_in_flight - 1)
+                pending.add(executor.submit(process_entry, entry.name, entry.path, content, args.document_class))
+            drain(0)
+        except KeyboardInterrupt:
+            # Everything written so far is checkpointed; documents in progress are redone on resume
+            logger.info(f"Interrupted after {counts['completed']} documents, rerun the same command to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR a directory or ZIP/TAR archive to JSON lines")
+    parser.add_argument("source", help="Directory, .zip, .tar, .tar.gz/.tgz, .tar.bz2 or .tar.xz archive")
+    parser.add_argument("--output", required=True, help="JSONL output, also used to resume interrupted runs")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: CPUs / PAGE_WORKERS)")
+    parser.add_argument("--tesseract-threads", type=int, help="OMP_THREAD_LIMIT per Tesseract process (default: CPUs / (processes x (PAGE_WORKERS + table cell workers)))")
+    parser.add_argument("--document-class", help="Tuned preprocessing profile to use (see PREPROCESSING_PROFILES_PATH)")
+    parser.add_argument("--max-file-size", type=int, default=config.MAX_FILE_SIZE, help="Skip larger documents (bytes)")
+    parser.add_argument("--progress-every", type=int, default=100, help="Report progress every N documents")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level), format=config.LOG_FORMAT)
+    # Progress is always reported, library logs only at --log-level
+    logger.setLevel(min(logging.INFO, getattr(logging, args.log_level)))
+
+    try:
+        counts = run(args)
+    except KeyboardInterrupt:
+        return 130
+
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
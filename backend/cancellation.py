@@ -0,0 +1,29 @@
+import threading
+from typing import List, Optional
+
+
+class JobCancelledError(Exception):
+    """Raised when OCR work is abandoned because its job was cancelled"""
+    pass
+
+
+def check_cancelled(cancel_event: Optional[threading.Event], filename: str):
+    """Stop cooperatively if the owning job has been cancelled"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelledError(f"Processing of {filename} cancelled")
+
+
+class SharedCancellation:
+    """Cancellation of work shared by several jobs: set only once every one of them is cancelled
+
+    Quacks like the threading.Event passed to check_cancelled.
+    """
+
+    def __init__(self):
+        self.events: List[threading.Event] = []
+
+    def add(self, event: threading.Event):
+        self.events.append(event)
+
+    def is_set(self) -> bool:
+        return bool(self.events) and all(event.is_set() for event in self.events)
@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+from cancellation import JobCancelledError, SharedCancellation
+from timing import timed
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How often a request waiting on shared work checks whether its own job was cancelled
+CANCEL_POLL_SECONDS = 0.1
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in chunks"""
+    digest = hashlib.sha256()
+    with timed("hash"), open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InFlightRequests:
+    """Coalesces concurrent identical requests into one computation
+
+    The first request for a key starts the computation; requests for the same
+    key arriving before it finishes wait for it and get the same result. A
+    cancelled request stops waiting right away, while the shared work is only
+    cancelled once every request waiting on it has been.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Tuple[asyncio.Task, SharedCancellation]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        key: str,
+        cancel_event: threading.Event,
+        compute: Callable[[SharedCancellation], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        Run compute for key, or join the computation already running for it
+
+        Args:
+            key: Identity of the request, e.g. a content hash
+            cancel_event: Cancellation of the job making this request
+            compute: Starts the work, given the cancellation shared by every requester
+
+        Returns:
+            The result and whether it came from another request's computation
+        """
+        while True:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if flight is None:
+                cancellation = SharedCancellation()
+                flight = (asyncio.create_task(compute(cancellation)), cancellation)
+                self._flights[key] = flight
+                flight[0].add_done_callback(lambda _, flight=flight: self._finish(key, flight))
+
+            task, cancellation = flight
+            cancellation.add(cancel_event)
+            # Waiting never cancels the task, so one requester going away leaves the others' work running
+            while not task.done():
+                await asyncio.wait({task}, timeout=CANCEL_POLL_SECONDS)
+                if cancel_event.is_set() and not task.done():
+                    raise JobCancelledError(f"Waiting for shared computation {key[:12]} cancelled")
+            try:
+                return task.result(), shared
+            except JobCancelledError:
+                if cancel_event.is_set():
+                    raise
+                # Everyone else gave up just before this request joined; start over
+                logger.info(f"Shared computation for {key[:12]} was cancelled, recomputing")
+
+    def _finish(self, key: str, flight: Tuple[asyncio.Task, SharedCancellation]):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        task = flight[0]
+        if not task.cancelled():
+            # Every requester may have gone away; mark the outcome as retrieved
+            task.exception()
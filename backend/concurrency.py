@@ -0,0 +1,132 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+
+import config
+from models import ConcurrencyPlan, ConcurrencyTrial
+
+if TYPE_CHECKING:
+    # Imported lazily at run time: the API process does not load numpy until OCR needs it
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_count() -> int:
+    """CPUs available to this process (respects affinity and container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def apply_thread_limit(threads: int):
+    """Limit the OpenMP threads of Tesseract processes started from now on
+
+    pytesseract runs Tesseract as a subprocess that inherits our environment,
+    and Tesseract 4+ sizes its OpenMP pool from OMP_THREAD_LIMIT.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+
+
+def default_table_cell_workers() -> int:
+    """Table cell threads of the OCR processor, going by configuration alone"""
+    return max(1, config.TABLE_CELL_WORKERS) if config.TABLE_DETECTION else 0
+
+
+def tesseract_processes(workers: int, page_workers: int = config.PAGE_WORKERS, table_cell_workers: int = 0) -> int:
+    """Tesseract processes that can run at once: one per page thread of every worker, plus the shared table cell threads"""
+    return workers * max(1, page_workers) + table_cell_workers
+
+
+def static_plan(
+    workers: int = config.OCR_WORKERS,
+    page_workers: int = config.PAGE_WORKERS,
+    table_cell_workers: Optional[int] = None
+) -> ConcurrencyPlan:
+    """Plan from configuration: the Tesseract processes of all workers share the CPUs between their threads"""
+    if table_cell_workers is None:
+        table_cell_workers = default_table_cell_workers()
+    cpus = cpu_count()
+    threads = config.TESSERACT_THREADS or max(1, cpus // tesseract_processes(workers, page_workers, table_cell_workers))
+    return ConcurrencyPlan(
+        mode="static",
+        workers=workers,
+        page_workers=page_workers,
+        table_cell_workers=table_cell_workers,
+        tesseract_threads=threads,
+        cpu_count=cpus
+    )
+
+
+def candidate_mixes(cpus: int, page_workers: int = config.PAGE_WORKERS, table_cell_workers: int = 0) -> List[ConcurrencyTrial]:
+    """Workers x threads combinations that fill the CPUs without oversubscribing them"""
+    max_workers = max(1, (cpus - table_cell_workers) // max(1, page_workers))
+    worker_counts = sorted({min(2 ** power, max_workers) for power in range(max_workers.bit_length() + 1)})
+    return [
+        ConcurrencyTrial(
+            workers=workers,
+            tesseract_threads=max(1, cpus // tesseract_processes(workers, page_workers, table_cell_workers))
+        )
+        for workers in worker_counts
+    ]
+
+
+def benchmark_plan(processor, pages_per_worker: int = config.CONCURRENCY_BENCHMARK_PAGES) -> ConcurrencyPlan:
+    """
+    Measure OCR throughput of each workers x threads mix on this host and pick the fastest
+
+    Args:
+        processor: Warmed-up OCRProcessor to run the synthetic pages through
+        pages_per_worker: Pages each worker processes per trial
+
+    Returns:
+        Plan with the highest pages/sec, including every trial
+    """
+    cpus = cpu_count()
+    page_workers = max(1, config.PAGE_WORKERS)
+    table_cell_workers = processor.table_cell_workers
+    trials = candidate_mixes(cpus, page_workers, table_cell_workers)
+    if len(trials) == 1:
+        plan = static_plan(trials[0].workers, page_workers, table_cell_workers)
+        plan.mode = "auto"
+        return plan
+
+    page = processor.preprocessor.preprocess_image_array(benchmark_page())
+    for trial in trials:
+        apply_thread_limit(trial.tesseract_threads)
+        # Every page thread of every worker runs its own Tesseract process, and so may every table cell thread
+        concurrent_pages = tesseract_processes(trial.workers, page_workers, table_cell_workers)
+        pages = concurrent_pages * pages_per_worker
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrent_pages, thread_name_prefix="ocr-benchmark") as executor:
+            list(executor.map(lambda _: processor._run_ocr(page, "concurrency-benchmark"), range(pages)))
+        trial.pages_per_sec = round(pages / (time.perf_counter() - started), 3)
+        logger.info(f"Concurrency trial {trial.workers} workers x {trial.tesseract_threads} threads: {trial.pages_per_sec} pages/sec")
+
+    best = max(trials, key=lambda trial: trial.pages_per_sec)
+    return ConcurrencyPlan(
+        mode="auto",
+        workers=best.workers,
+        page_workers=page_workers,
+        table_cell_workers=table_cell_workers,
+        tesseract_threads=best.tesseract_threads,
+        cpu_count=cpus,
+        trials=trials
+    )
+
+
+def benchmark_page() -> "np.ndarray":
+    """A4 page at 150 DPI with a few lines of text, for throughput trials"""
+    import cv2
+    import numpy as np
+
+    page = np.full((1754, 1240, 3), 255, dtype=np.uint8)
+    for line in range(25):
+        cv2.putText(
+            page, f"Invoice {line:02d} total amount due 1234.{line:02d} payment received",
+            (80, 120 + line * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2
+        )
+    return page
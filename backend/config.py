@@ -15,11 +15,26 @@ RELOAD = DEBUG
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10 * 1024 * 1024))  # 10MB
 MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10))
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+UPLOAD_DIR_QUOTA_BYTES = int(os.getenv("UPLOAD_DIR_QUOTA_BYTES", 5 * 1024 * 1024 * 1024))  # 5GB, 0 for no limit; uploads beyond it get 503
+UPLOAD_MAX_AGE_SECONDS = float(os.getenv("UPLOAD_MAX_AGE_SECONDS", 3600))  # Files no running job owns are reaped after this
+REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", 300))
+UPLOAD_QUOTA_RESCAN_SECONDS = float(os.getenv("UPLOAD_QUOTA_RESCAN_SECONDS", 5))  # Upload admission rescans UPLOAD_DIR for the quota at most this often
+
+# Archive upload settings (a single ZIP/TAR upload whose entries are OCRed as a batch)
+ARCHIVE_UPLOADS_ENABLED = os.getenv("ARCHIVE_UPLOADS_ENABLED", "true").lower() == "true"
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_SIZE", 200 * 1024 * 1024))  # 200MB
+MAX_ARCHIVE_ENTRIES = int(os.getenv("MAX_ARCHIVE_ENTRIES", 1000))  # Entries read per archive, including unsupported ones
+
+# Synchronous OCR settings (single small image, result returned inline)
+SYNC_MAX_FILE_SIZE = int(os.getenv("SYNC_MAX_FILE_SIZE", 2 * 1024 * 1024))  # 2MB
+SYNC_DEADLINE_SECONDS = float(os.getenv("SYNC_DEADLINE_SECONDS", 10))
+SYNC_MAX_IN_FLIGHT = int(os.getenv("SYNC_MAX_IN_FLIGHT", 16))  # Sync images being OCRed, deferred ones included, before 503
+SYNC_SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
 
 # Supported file types
-SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.pdf'}
+SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.pdf', '.tif', '.tiff'}
 SUPPORTED_MIME_TYPES = {
-    'image/png', 'image/jpeg', 'image/jpg', 'image/webp', 
+    'image/png', 'image/jpeg', 'image/jpg', 'image/webp', 'image/tiff',
     'application/pdf'
 }
 
@@ -35,6 +50,62 @@ TESSERACT_CONFIG = os.getenv(
 MAX_IMAGE_DIMENSION = int(os.getenv("MAX_IMAGE_DIMENSION", 3000))
 MIN_IMAGE_DIMENSION = int(os.getenv("MIN_IMAGE_DIMENSION", 300))
 PDF_DPI = int(os.getenv("PDF_DPI", 300))
+# Pages of one multi-page PDF/TIFF OCRed at once; pages are decoded lazily, so at most
+# this many are held in memory per document (each runs its own Tesseract process)
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", 2))
+
+# Table extraction: cells of ruled tables are OCRed separately (per profile via detect_tables)
+TABLE_DETECTION = os.getenv("TABLE_DETECTION", "false").lower() == "true"  # Default for the default profile, loaded or built in
+TABLE_CELL_WORKERS = int(os.getenv("TABLE_CELL_WORKERS", 4))  # Cells OCRed in parallel, shared by all workers
+TABLE_CELL_TESSERACT_CONFIG = os.getenv("TABLE_CELL_TESSERACT_CONFIG", r'--psm 6')
+
+# Result export settings
+EXPORT_PDF_DPI = int(os.getenv("EXPORT_PDF_DPI", PDF_DPI))  # Resolution assumed for OCRed images in PDF exports
+# Adaptive preprocessing: OCR a cheap grayscale + Otsu pass first and only run the
+# full pipeline when its confidence is below the threshold (needs Tesseract 3.05+)
+ADAPTIVE_PREPROCESSING = os.getenv("ADAPTIVE_PREPROCESSING", "false").lower() == "true"
+ADAPTIVE_CONFIDENCE_THRESHOLD = float(os.getenv("ADAPTIVE_CONFIDENCE_THRESHOLD", 0.8))
+# Tuned preprocessing profiles per document class, written by benchmarks/tune_preprocessing.py
+PREPROCESSING_PROFILES_PATH = os.getenv("PREPROCESSING_PROFILES_PATH")
+
+# Worker pool settings
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", max(1, (os.cpu_count() or 2) // max(1, PAGE_WORKERS))))  # Each runs up to PAGE_WORKERS Tesseract processes
+OCR_WARMUP = os.getenv("OCR_WARMUP", "true").lower() == "true"  # Process a dummy page at startup
+# OpenMP threads per Tesseract process (OMP_THREAD_LIMIT); 0 divides the CPUs between the workers
+TESSERACT_THREADS = int(os.getenv("TESSERACT_THREADS", os.getenv("OMP_THREAD_LIMIT", 0)))
+# "static" uses the settings above, "auto" benchmarks workers x threads mixes at startup and keeps the fastest
+OCR_CONCURRENCY_MODE = os.getenv("OCR_CONCURRENCY_MODE", "static")
+CONCURRENCY_BENCHMARK_PAGES = int(os.getenv("CONCURRENCY_BENCHMARK_PAGES", 2))  # Pages per worker per trial
+
+# Job queue / admission control settings
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", OCR_WORKERS))  # Jobs processed at once
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", 100))  # Jobs waiting before 503
+MAX_QUEUE_WAIT_SECONDS = float(os.getenv("MAX_QUEUE_WAIT_SECONDS", 300))
+MAX_JOBS_PER_CLIENT = int(os.getenv("MAX_JOBS_PER_CLIENT", 5))  # Queued + running, before 429
+INITIAL_JOB_SECONDS_ESTIMATE = float(os.getenv("INITIAL_JOB_SECONDS_ESTIMATE", 10))
+CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "X-Client-ID")
+
+# Scheduling settings
+INTERACTIVE_MAX_PAGES = int(os.getenv("INTERACTIVE_MAX_PAGES", 5))  # Larger jobs default to bulk
+PRIORITY_AGING_SECONDS = float(os.getenv("PRIORITY_AGING_SECONDS", 120))  # Bulk jobs promoted after this wait
+
+# Profiling settings
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))  # Fraction of jobs profiled without being asked
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-OCR-Profile")  # Request header that opts a job into profiling
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", 50))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Required in the X-Admin-Token header for admin endpoints, which are disabled when unset
+
+# Webhook settings (job completion callbacks instead of polling)
+WEBHOOK_OUTBOX_DIR = Path(os.getenv("WEBHOOK_OUTBOX_DIR", "webhook_outbox"))  # Undelivered callbacks, kept across restarts
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", 8))
+WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", 2))  # First retry delay, doubled per attempt
+WEBHOOK_MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_MAX_BACKOFF_SECONDS", 600))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", 10))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", 50))  # Events per callback request to one URL
+WEBHOOK_BATCH_WINDOW_SECONDS = float(os.getenv("WEBHOOK_BATCH_WINDOW_SECONDS", 0.5))  # Wait for more events before sending
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # Signs callback bodies (HMAC-SHA256, X-OCR-Signature header) when set
+WEBHOOK_ALLOWED_HOSTS = [host for host in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host]  # Empty allows any host
 
 # CORS settings
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
@@ -43,6 +114,14 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-# Job cleanup settings
+# Deduplication: identical files (by SHA-256) within a job, or being OCRed for
+# concurrent jobs, are OCRed once and the results shared
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+
+# Completed results are written here, one file per job, and read back with mmap
+RESULTS_DIR = Path(os.getenv("RESULTS_DIR", "results"))
+
+# Job cleanup settings: on every reaper pass, the oldest finished jobs over
+# MAX_JOBS_IN_MEMORY are forgotten (results included), at most a batch at a time
 MAX_JOBS_IN_MEMORY = int(os.getenv("MAX_JOBS_IN_MEMORY", 100))
 JOB_CLEANUP_BATCH_SIZE = int(os.getenv("JOB_CLEANUP_BATCH_SIZE", 50))
\ No newline at end of file
@@ -0,0 +1,133 @@
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+import config
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(name: str) -> bool:
+    """Whether a file name looks like a ZIP or TAR archive"""
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+class SourceEntry:
+    """One document found in a directory or archive
+
+    Directory entries carry a path; archive entries carry a stream that is
+    only valid until the next entry is read.
+    """
+
+    def __init__(self, name: str, size: int, path: Optional[str] = None, stream: Optional[BinaryIO] = None):
+        self.name = name
+        self.size = size
+        self.path = path
+        self.stream = stream
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.name)[1].lower()
+
+    def read(self, limit: int) -> bytes:
+        """Read the entry's content, at most limit + 1 bytes so oversized entries can be detected"""
+        if self.stream is not None:
+            return self.stream.read(limit + 1)
+        with open(self.path, 'rb') as f:
+            return f.read(limit + 1)
+
+
+def entry_error(entry: SourceEntry, max_file_size: int = config.MAX_FILE_SIZE) -> Optional[str]:
+    """Why an entry cannot be processed, or None if it can"""
+    if entry.extension not in config.SUPPORTED_EXTENSIONS:
+        return f"Unsupported file type: {entry.name}"
+    if entry.size > max_file_size:
+        return f"File too large: {entry.name} ({entry.size} bytes, max {max_file_size})"
+    return None
+
+
+def copy_entry(entry: SourceEntry, dest: str, max_file_size: int = config.MAX_FILE_SIZE, chunk_size: int = 1024 * 1024) -> int:
+    """Stream an entry to its own file in chunks, refusing it once it exceeds max_file_size"""
+    written = 0
+    source = entry.stream if entry.stream is not None else open(entry.path, 'rb')
+    try:
+        with open(dest, 'wb') as f:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                # Sizes in archive headers can lie, so count what is actually decompressed
+                if written > max_file_size:
+                    raise ValueError(f"File too large: {entry.name} (max {max_file_size} bytes)")
+                f.write(chunk)
+    finally:
+        if entry.stream is None:
+            source.close()
+    return written
+
+
+def estimate_archive_pages(path: str, name: str, bytes_per_page: int = 256 * 1024) -> int:
+    """Cheap page estimate for scheduling: supported ZIP entries, or TAR size in typical pages"""
+    try:
+        if name.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                return max(1, sum(
+                    1 for info in archive.infolist()
+                    if os.path.splitext(info.filename)[1].lower() in config.SUPPORTED_EXTENSIONS
+                ))
+        # Counting TAR members would mean decompressing the whole archive
+        return max(1, os.path.getsize(path) // bytes_per_page)
+    except (OSError, zipfile.BadZipFile):
+        return 1
+
+
+def iter_directory(root: str) -> Iterator[SourceEntry]:
+    """Files under a directory, recursively, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield SourceEntry(os.path.relpath(path, root), os.path.getsize(path), path=path)
+
+
+def iter_zip(source) -> Iterator[SourceEntry]:
+    """Files in a ZIP archive (path or seekable file object)"""
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as stream:
+                yield SourceEntry(info.filename, info.file_size, stream=stream)
+
+
+def iter_tar(source) -> Iterator[SourceEntry]:
+    """Files in a (possibly compressed) TAR archive, read sequentially without seeking"""
+    if isinstance(source, (str, Path)):
+        archive = tarfile.open(source, mode='r|*')
+    else:
+        archive = tarfile.open(fileobj=source, mode='r|*')
+    with archive:
+        for member in archive:
+            # Links, devices and directories are never documents
+            if not member.isfile():
+                continue
+            yield SourceEntry(member.name, member.size, stream=archive.extractfile(member))
+
+
+def iter_archive(source, name: str) -> Iterator[SourceEntry]:
+    """Files in an archive, picking the format from its name"""
+    if name.lower().endswith('.zip'):
+        return iter_zip(source)
+    return iter_tar(source)
+
+
+def iter_source(path: str) -> Iterator[SourceEntry]:
+    """Files in a directory, archive or single document"""
+    if os.path.isdir(path):
+        return iter_directory(path)
+    if is_archive(path):
+        return iter_archive(path, path)
+    return iter([SourceEntry(os.path.basename(path), os.path.getsize(path), path=path)])
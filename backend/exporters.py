@@ -0,0 +1,295 @@
+import html
+import json
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from models import BoundingBox, OCRResult
+import config
+
+HOCR_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+<head>
+<title>{title}</title>
+<meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>
+<meta name="ocr-system" content="{system}"/>
+<meta name="ocr-capabilities" content="ocr_page ocr_carea ocr_line ocrx_word"/>
+</head>
+<body>
+"""
+
+ALTO_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<alto xmlns="http://www.loc.gov/standards/alto/ns-v4#" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.loc.gov/standards/alto/ns-v4# http://www.loc.gov/standards/alto/v4/alto-4-2.xsd">
+<Description>
+<MeasurementUnit>pixel</MeasurementUnit>
+<sourceImageInformation><fileName>{title}</fileName></sourceImageInformation>
+<OCRProcessing ID="OCR_0"><ocrProcessingStep><processingSoftware><softwareName>{system}</softwareName></processingSoftware></ocrProcessingStep></OCRProcessing>
+</Description>
+<Layout>
+"""
+
+# Helvetica glyphs average about half an em; words are stretched to their box with Tz
+PDF_AVERAGE_GLYPH_WIDTH = 0.5
+
+
+def page_size(result: OCRResult) -> Tuple[int, int]:
+    """Width and height of the image the result's boxes refer to"""
+    if result.page_width and result.page_height:
+        return result.page_width, result.page_height
+    # Results without dimensions: the extent of the boxes is the best guess
+    width = max((box.bbox[0] + box.bbox[2] for box in result.bbox_data), default=1)
+    height = max((box.bbox[1] + box.bbox[3] for box in result.bbox_data), default=1)
+    return width, height
+
+
+def group_lines(boxes: List[BoundingBox]) -> List[List[BoundingBox]]:
+    """Split words (in Tesseract's reading order) into text lines
+
+    A word starts a new line when it does not overlap the current line
+    vertically or when it jumps back to the left.
+    """
+    lines: List[List[BoundingBox]] = []
+    top = bottom = right = 0
+    for box in boxes:
+        x, y, width, height = box.bbox
+        center = y + height / 2
+        if lines and top <= center <= bottom and x >= right - height:
+            lines[-1].append(box)
+            top, bottom = min(top, y), max(bottom, y + height)
+        else:
+            lines.append([box])
+            top, bottom = y, y + height
+        right = x + width
+    return lines
+
+
+def text_blocks(result: OCRResult) -> List[List[List[BoundingBox]]]:
+    """Words of a page grouped into blocks of lines
+
+    Uses Tesseract's own layout when the result has one and falls back to a
+    single block of group_lines() otherwise.
+    """
+    layout = result.layout
+    if layout is None:
+        lines = group_lines(result.bbox_data)
+        return [lines] if lines else []
+
+    words = result.bbox_data
+    line_offsets = layout.line_offsets
+    line_starts = [layout.paragraph_offsets[index] for index in layout.block_offsets]
+    return [
+        [words[line_offsets[line]:line_offsets[line + 1]] for line in range(first_line, last_line)]
+        for first_line, last_line in zip(line_starts[:-1], line_starts[1:])
+    ]
+
+
+def union_bbox(boxes: List[BoundingBox]) -> Tuple[int, int, int, int]:
+    """Enclosing box of several words as (left, top, right, bottom)"""
+    return (
+        min(box.bbox[0] for box in boxes),
+        min(box.bbox[1] for box in boxes),
+        max(box.bbox[0] + box.bbox[2] for box in boxes),
+        max(box.bbox[1] + box.bbox[3] for box in boxes),
+    )
+
+
+def export_jsonl(results: Iterable[OCRResult]) -> Iterator[bytes]:
+    """One JSON object per page, as stored in the job's results"""
+    for result in results:
+        yield result.model_dump_json(exclude={"timings"}).encode() + b"\n"
+
+
+def export_lines(results: Iterable[OCRResult]) -> Iterator[bytes]:
+    """One JSON object per text line, in reading order"""
+    for page_index, result in enumerate(results, 1):
+        # Line confidences follow the layout's lines; without a layout the lines are guessed
+        confidences = result.line_confidences if result.layout is not None else None
+        line_index = 0
+        parts = []
+        for block_index, block in enumerate(text_blocks(result), 1):
+            for line in block:
+                left, top, right, bottom = union_bbox(line)
+                parts.append(json.dumps({
+                    "filename": result.filename,
+                    "page": page_index,
+                    "block": block_index,
+                    "line": line_index + 1,
+                    "text": " ".join(box.text for box in line),
+                    "confidence": (
+                        confidences[line_index] if confidences and line_index < len(confidences)
+                        else round(sum(box.confidence for box in line) / len(line), 4)
+                    ),
+                    "bbox": [left, top, right - left, bottom - top],
+                }) + "\n")
+                line_index += 1
+        yield "".join(parts).encode()
+
+
+def export_hocr(results: Iterable[OCRResult], title: str = "OCR results") -> Iterator[bytes]:
+    """hOCR 1.2 document, one ocr_page per result"""
+    yield HOCR_HEADER.format(title=html.escape(title), system=html.escape(config.APP_NAME)).encode()
+
+    word_id = 0
+    for page_index, result in enumerate(results, 1):
+        width, height = page_size(result)
+        parts = [
+            f'<div class="ocr_page" id="page_{page_index}" title="image {html.escape(result.filename, quote=True)}; '
+            f'bbox 0 0 {width} {height}; ppageno {page_index - 1}">\n'
+        ]
+        line_index = 0
+        for block_index, block in enumerate(text_blocks(result), 1):
+            left, top, right, bottom = union_bbox([box for line in block for box in line])
+            parts.append(
+                f'<div class="ocr_carea" id="block_{page_index}_{block_index}" title="bbox {left} {top} {right} {bottom}">\n'
+            )
+            for line in block:
+                line_index += 1
+                left, top, right, bottom = union_bbox(line)
+                parts.append(
+                    f'<span class="ocr_line" id="line_{page_index}_{line_index}" title="bbox {left} {top} {right} {bottom}">'
+                )
+                for box in line:
+                    word_id += 1
+                    x, y, box_width, box_height = box.bbox
+                    parts.append(
+                        f'<span class="ocrx_word" id="word_{word_id}" title="bbox {x} {y} {x + box_width} {y + box_height}; '
+                        f'x_wconf {round(box.confidence * 100)}">{html.escape(box.text)}</span> '
+                    )
+                parts.append("</span>\n")
+            parts.append("</div>\n")
+        parts.append("</div>\n")
+        yield "".join(parts).encode()
+
+    yield b"</body>\n</html>\n"
+
+
+def export_alto(results: Iterable[OCRResult], title: str = "OCR results") -> Iterator[bytes]:
+    """ALTO v4 document, one Page per result"""
+    yield ALTO_HEADER.format(title=html.escape(title), system=html.escape(config.APP_NAME)).encode()
+
+    for page_index, result in enumerate(results, 1):
+        width, height = page_size(result)
+        parts = [
+            f'<Page ID="page_{page_index}" PHYSICAL_IMG_NR="{page_index}" WIDTH="{width}" HEIGHT="{height}">\n'
+            f'<PrintSpace HPOS="0" VPOS="0" WIDTH="{width}" HEIGHT="{height}">\n'
+        ]
+        line_index = 0
+        for block_index, block in enumerate(text_blocks(result), 1):
+            left, top, right, bottom = union_bbox([box for line in block for box in line])
+            parts.append(
+                f'<TextBlock ID="block_{page_index}_{block_index}" HPOS="{left}" VPOS="{top}" '
+                f'WIDTH="{right - left}" HEIGHT="{bottom - top}">\n'
+            )
+            for line in block:
+                line_index += 1
+                left, top, right, bottom = union_bbox(line)
+                parts.append(
+                    f'<TextLine ID="line_{page_index}_{line_index}" HPOS="{left}" VPOS="{top}" '
+                    f'WIDTH="{right - left}" HEIGHT="{bottom - top}">'
+                )
+                parts.append("<SP/>".join(
+                    f'<String CONTENT="{html.escape(box.text, quote=True)}" HPOS="{box.bbox[0]}" VPOS="{box.bbox[1]}" '
+                    f'WIDTH="{box.bbox[2]}" HEIGHT="{box.bbox[3]}" WC="{box.confidence:.2f}"/>'
+                    for box in line
+                ))
+                parts.append("</TextLine>\n")
+            parts.append("</TextBlock>\n")
+        parts.append("</PrintSpace>\n</Page>\n")
+        yield "".join(parts).encode()
+
+    yield b"</Layout>\n</alto>\n"
+
+
+def pdf_string(text: str) -> bytes:
+    """PDF literal string in WinAnsi; characters Helvetica cannot encode become '?'"""
+    encoded = text.encode("cp1252", errors="replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def pdf_text_layer(result: OCRResult, page_height: float, scale: float) -> bytes:
+    """Content stream drawing the page's words invisibly (render mode 3) over their boxes"""
+    commands = [b"BT", b"3 Tr"]
+    for box in result.bbox_data:
+        x, y, width, height = box.bbox
+        if not box.text or height <= 0:
+            continue
+        font_size = height * scale
+        stretch = 100 * width * scale / (len(box.text) * font_size * PDF_AVERAGE_GLYPH_WIDTH)
+        commands.append(
+            f"/F1 {font_size:.2f} Tf {stretch:.1f} Tz 1 0 0 1 {x * scale:.2f} {page_height - (y + height) * scale:.2f} Tm ".encode()
+            + pdf_string(box.text) + b" Tj"
+        )
+    commands.append(b"ET")
+    return b"\n".join(commands)
+
+
+def export_pdf(results: Iterable[OCRResult], dpi: int = config.EXPORT_PDF_DPI) -> Iterator[bytes]:
+    """
+    PDF with an invisible, searchable text layer, written one page at a time
+
+    The pages hold only the text (like Tesseract's textonly_pdf), sized as the
+    OCRed images at the given DPI; overlay them on the original scans, e.g.
+    with qpdf --underlay, to make the scans searchable.
+
+    Boxes are in the coordinates of the preprocessed image Tesseract read,
+    which was resized to within MIN/MAX_IMAGE_DIMENSION and may have been
+    deskewed. The layer lines up with a scan scaled to the same page size,
+    but drifts on pages that were rotated by deskewing.
+
+    Objects are emitted as soon as a page is done; only their byte offsets are
+    kept for the cross-reference table at the end.
+    """
+    offsets: Dict[int, int] = {}
+    position = 0
+
+    def write_object(number: int, body: bytes) -> bytes:
+        nonlocal position
+        data = f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        offsets[number] = position
+        position += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    # 1: catalog, 2: page tree (written last, once every page is known), 3: font
+    yield write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    scale = 72 / dpi
+    page_objects = []
+    next_object = 4
+    for result in results:
+        width, height = page_size(result)
+        page_width, page_height = width * scale, height * scale
+        content = zlib.compress(pdf_text_layer(result, page_height, scale))
+
+        page_number, content_number = next_object, next_object + 1
+        next_object += 2
+        page_objects.append(page_number)
+        yield write_object(page_number, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_number} 0 R >>"
+        ).encode())
+        yield write_object(
+            content_number,
+            f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream"
+        )
+
+    kids = " ".join(f"{number} 0 R" for number in page_objects)
+    yield write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objects)} >>".encode())
+
+    xref = [f"xref\n0 {next_object}\n0000000000 65535 f \n"]
+    xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, next_object))
+    xref.append(f"trailer\n<< /Size {next_object} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n")
+    yield "".join(xref).encode()
+
+
+# Export format -> (generator, media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[Callable[..., Iterator[bytes]], str, str]] = {
+    "jsonl": (export_jsonl, "application/x-ndjson", "jsonl"),
+    "lines": (export_lines, "application/x-ndjson", "lines.jsonl"),
+    "hocr": (export_hocr, "application/xhtml+xml", "hocr.html"),
+    "alto": (export_alto, "application/xml", "alto.xml"),
+    "pdf": (export_pdf, "application/pdf", "pdf"),
+}
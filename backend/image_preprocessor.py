@@ -1,56 +1,67 @@
 import cv2
 import numpy as np
 from PIL import Image, ImageEnhance
+import json
 import logging
+from typing import Callable, Dict, Optional
+
+from models import PreprocessingProfile
+from metrics import PREPROCESS_STAGE_SECONDS
+from timing import timed
 import config
 
 logger = logging.getLogger(__name__)
 
+def load_preprocessing_profiles(path: Optional[str]) -> Dict[str, PreprocessingProfile]:
+    """
+    Load tuned preprocessing profiles per document class
+    
+    Args:
+        path: JSON file written by benchmarks/tune_preprocessing.py, with a
+            "default" profile and a "classes" mapping of class name to profile
+            
+    Returns:
+        Profiles keyed by document class, always including "default"
+    """
+    profiles = {"default": PreprocessingProfile(detect_tables=config.TABLE_DETECTION)}
+    if not path:
+        return profiles
+    
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("default"):
+            # TABLE_DETECTION applies unless the tuned default says otherwise
+            profiles["default"] = PreprocessingProfile(**{"detect_tables": config.TABLE_DETECTION, **data["default"]})
+        for document_class, profile in data.get("classes", {}).items():
+            profiles[document_class] = PreprocessingProfile(**profile)
+        logger.info(f"Loaded preprocessing profiles from {path}: {', '.join(sorted(profiles))}")
+    except Exception as e:
+        logger.warning(f"Could not load preprocessing profiles from {path}: {str(e)}, using defaults")
+    return profiles
+
 class ImagePreprocessor:
     """Advanced image preprocessing for OCR optimization"""
     
-    def __init__(self):
+    def __init__(self, profile: Optional[PreprocessingProfile] = None):
         self.max_dimension = config.MAX_IMAGE_DIMENSION
         self.min_dimension = config.MIN_IMAGE_DIMENSION
+        self.profile = profile or PreprocessingProfile()
     
-    def preprocess_image(self, image_path: str) -> np.ndarray:
+    def preprocess_image(self, image_path: str, profile: Optional[PreprocessingProfile] = None) -> np.ndarray:
         """
         Apply comprehensive preprocessing pipeline to optimize image for OCR
         
         Args:
             image_path: Path to the input image
+            profile: Parameters to use instead of the preprocessor's own
             
         Returns:
             Preprocessed image as numpy array
         """
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Could not load image: {image_path}")
-            
-            logger.info(f"Original image shape: {image.shape}")
-            
-            # Step 1: Resize if needed
-            image = self._resize_image(image)
-            
-            # Step 2: Convert to grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
-            
-            # Step 3: Noise reduction
-            denoised = self._denoise_image(gray)
-            
-            # Step 4: Deskew/rotation correction
-            deskewed = self._deskew_image(denoised)
-            
-            # Step 5: Enhance contrast
-            enhanced = self._enhance_contrast(deskewed)
-            
-            # Step 6: Binarization (adaptive thresholding)
-            binary = self._binarize_image(enhanced)
+            image = self.load_image(image_path)
+            binary = self.preprocess_image_array(image, profile)
             
             logger.info(f"Preprocessed image shape: {binary.shape}")
             return binary
@@ -59,6 +70,30 @@ class ImagePreprocessor:
             logger.error(f"Error preprocessing image {image_path}: {str(e)}")
             raise
     
+    def load_image(self, image_path: str) -> np.ndarray:
+        """Decode an image file into a BGR array"""
+        with timed("decode", PREPROCESS_STAGE_SECONDS, stage="decode"):
+            image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not load image: {image_path}")
+        
+        logger.info(f"Original image shape: {image.shape}")
+        return image
+    
+    def preprocess_fast(self, image: np.ndarray) -> np.ndarray:
+        """Cheap pipeline for clean pages: resize, grayscale and a global Otsu threshold"""
+        image = self._run_stage("resize", self._resize_image, image)
+        if len(image.shape) == 3:
+            image = self._run_stage("grayscale", lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), image)
+        return self._run_stage(
+            "otsu", lambda img: cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1], image
+        )
+    
+    def _run_stage(self, stage: str, func: Callable[..., np.ndarray], image: np.ndarray, *args) -> np.ndarray:
+        """Run one pipeline stage and record its latency in metrics and the timing trace"""
+        with timed(stage, PREPROCESS_STAGE_SECONDS, stage=stage):
+            return func(image, *args)
+    
     def _resize_image(self, image: np.ndarray) -> np.ndarray:
         """Resize image to optimal dimensions for OCR"""
         height, width = image.shape[:2]
@@ -82,10 +117,13 @@ class ImagePreprocessor:
         
         return resized
     
-    def _denoise_image(self, image: np.ndarray) -> np.ndarray:
+    def _denoise_image(self, image: np.ndarray, profile: PreprocessingProfile) -> np.ndarray:
         """Remove noise from the image"""
         # Apply Non-local Means Denoising
-        denoised = cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
+        denoised = cv2.fastNlMeansDenoising(
+            image, None, profile.denoise_strength,
+            profile.denoise_template_window, profile.denoise_search_window
+        )
         return denoised
     
     def _deskew_image(self, image: np.ndarray) -> np.ndarray:
@@ -100,7 +138,7 @@ class ImagePreprocessor:
             if lines is not None and len(lines) > 0:
                 # Calculate average angle
                 angles = []
-                for rho, theta in lines[:20]:  # Use first 20 lines
+                for rho, theta in lines[:20, 0]:  # Use first 20 lines
                     angle = theta * 180 / np.pi
                     if angle < 45:
                         angles.append(angle)
@@ -139,57 +177,60 @@ class ImagePreprocessor:
             logger.warning(f"Deskewing failed: {str(e)}, using original image")
             return image
     
-    def _enhance_contrast(self, image: np.ndarray) -> np.ndarray:
+    def _enhance_contrast(self, image: np.ndarray, profile: PreprocessingProfile) -> np.ndarray:
         """Enhance image contrast using CLAHE"""
         # Create CLAHE object
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        tile_grid = (profile.clahe_tile_grid, profile.clahe_tile_grid)
+        clahe = cv2.createCLAHE(clipLimit=profile.clahe_clip_limit, tileGridSize=tile_grid)
         enhanced = clahe.apply(image)
         return enhanced
     
-    def _binarize_image(self, image: np.ndarray) -> np.ndarray:
+    def _binarize_image(self, image: np.ndarray, profile: PreprocessingProfile) -> np.ndarray:
         """Apply adaptive thresholding for binarization"""
         # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(image, (5, 5), 0)
+        if profile.blur_kernel:
+            image = cv2.GaussianBlur(image, (profile.blur_kernel, profile.blur_kernel), 0)
         
         # Apply adaptive threshold
         binary = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
+            image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY, profile.threshold_block_size, profile.threshold_c
         )
         
         return binary
     
-    def preprocess_pil_image(self, pil_image: Image.Image) -> np.ndarray:
+    def preprocess_pil_image(self, pil_image: Image.Image, profile: Optional[PreprocessingProfile] = None) -> np.ndarray:
         """Preprocess PIL Image object"""
         # Convert PIL to OpenCV format
         opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
         
         # Apply preprocessing pipeline
-        return self.preprocess_image_array(opencv_image)
+        return self.preprocess_image_array(opencv_image, profile)
     
-    def preprocess_image_array(self, image: np.ndarray) -> np.ndarray:
-        """Preprocess image array directly"""
+    def preprocess_image_array(self, image: np.ndarray, profile: Optional[PreprocessingProfile] = None) -> np.ndarray:
+        """Preprocess image array directly; stages disabled in the profile are skipped"""
+        profile = profile or self.profile
         try:
             # Step 1: Resize if needed
-            image = self._resize_image(image)
+            image = self._run_stage("resize", self._resize_image, image)
             
             # Step 2: Convert to grayscale
             if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                gray = self._run_stage("grayscale", lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), image)
             else:
                 gray = image
             
             # Step 3: Noise reduction
-            denoised = self._denoise_image(gray)
+            denoised = self._run_stage("denoise", self._denoise_image, gray, profile) if profile.denoise else gray
             
             # Step 4: Deskew/rotation correction
-            deskewed = self._deskew_image(denoised)
+            deskewed = self._run_stage("deskew", self._deskew_image, denoised) if profile.deskew else denoised
             
             # Step 5: Enhance contrast
-            enhanced = self._enhance_contrast(deskewed)
+            enhanced = self._run_stage("clahe", self._enhance_contrast, deskewed, profile) if profile.clahe else deskewed
             
             # Step 6: Binarization
-            binary = self._binarize_image(enhanced)
+            binary = self._run_stage("binarize", self._binarize_image, enhanced, profile)
             
             return binary
             
@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import io
+import itertools
+import logging
+import math
+import re
+import time
+from typing import Dict, List, Optional
+
+from models import JobPriority
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionError(Exception):
+    """Raised when a job cannot be admitted right now"""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class QueueFullError(AdmissionError):
+    """The server-wide job queue is at capacity"""
+
+    status_code = 503
+
+
+class ClientLimitError(AdmissionError):
+    """The client already has its maximum number of jobs in flight"""
+
+    status_code = 429
+
+
+# Matches page objects but not the /Pages tree nodes
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def estimate_page_count(content: bytes, filename: str) -> int:
+    """Cheaply estimate how many pages a file will OCR into"""
+    if filename.lower().endswith('.pdf'):
+        return max(1, len(PDF_PAGE_PATTERN.findall(content)))
+    if filename.lower().endswith(('.tif', '.tiff')):
+        try:
+            # PIL belongs to the OCR stack, so the HTTP layer only loads it once a TIFF arrives
+            from PIL import Image
+            # Only reads the frame directories, not the pixel data
+            with Image.open(io.BytesIO(content)) as image:
+                return max(1, getattr(image, 'n_frames', 1))
+        except Exception:
+            return 1
+    return 1
+
+
+class QueuedJob:
+    """A job waiting for (or holding) an OCR dispatcher slot"""
+
+    def __init__(
+        self,
+        job_id: str,
+        client_id: str,
+        file_paths: List[str],
+        filenames: List[str],
+        estimated_pages: int = 1,
+        priority: JobPriority = JobPriority.INTERACTIVE
+    ):
+        self.job_id = job_id
+        self.client_id = client_id
+        self.file_paths = file_paths
+        self.filenames = filenames
+        self.estimated_pages = estimated_pages
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def queue_wait(self) -> float:
+        """Seconds spent waiting in the queue (so far, if not started)"""
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class JobQueue:
+    """
+    Bounded job scheduler with admission control and per-client limits
+
+    Jobs are picked by priority class first (interactive before bulk, with
+    bulk jobs promoted after PRIORITY_AGING_SECONDS), then by fair share
+    between clients (the client with the fewest pages served goes next),
+    then shortest job first by estimated page count.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = config.MAX_QUEUE_DEPTH,
+        max_jobs_per_client: int = config.MAX_JOBS_PER_CLIENT,
+        max_queue_wait: float = config.MAX_QUEUE_WAIT_SECONDS,
+        concurrency: int = config.JOB_CONCURRENCY
+    ):
+        self.max_depth = max_depth
+        self.max_jobs_per_client = max_jobs_per_client
+        self.max_queue_wait = max_queue_wait
+        self.concurrency = concurrency
+
+        # Per-client heaps of (priority class, estimated_pages, sequence, job)
+        self._pending: Dict[str, List] = {}
+        self._pending_count = 0
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        self._reserved = 0
+        self._running = 0
+        self._client_jobs: Dict[str, int] = {}
+
+        # Pages served per client, and the virtual time new clients start at
+        self._client_service: Dict[str, float] = {}
+        self._virtual_time = 0.0
+
+        # Exponentially weighted moving average of job run time, seeded with a guess
+        self._avg_job_seconds = config.INITIAL_JOB_SECONDS_ESTIMATE
+
+    @property
+    def depth(self) -> int:
+        """Jobs admitted but not yet running"""
+        return self._pending_count + self._reserved
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def estimated_wait(self) -> float:
+        """Estimated seconds a newly admitted job would wait before starting"""
+        return self.depth * self._avg_job_seconds / self.concurrency
+
+    def reserve(self, client_id: str):
+        """
+        Reserve a queue slot for a client, raising if the job should be rejected
+
+        Must be paired with put() or release() for the same client.
+        """
+        if self.depth >= self.max_depth:
+            raise QueueFullError(
+                f"Job queue is full ({self.max_depth} jobs waiting)",
+                retry_after=self._avg_job_seconds / self.concurrency
+            )
+
+        wait = self.estimated_wait()
+        if wait > self.max_queue_wait:
+            raise QueueFullError(
+                f"Estimated queue wait of {wait:.0f}s exceeds {self.max_queue_wait:.0f}s",
+                retry_after=wait - self.max_queue_wait
+            )
+
+        if self._client_jobs.get(client_id, 0) >= self.max_jobs_per_client:
+            raise ClientLimitError(
+                f"Maximum {self.max_jobs_per_client} concurrent jobs per client",
+                retry_after=self._avg_job_seconds
+            )
+
+        self._reserved += 1
+        self._client_jobs[client_id] = self._client_jobs.get(client_id, 0) + 1
+
+    def release(self, client_id: str):
+        """Give back a reserved slot that was never queued"""
+        self._reserved -= 1
+        self._finish_client(client_id)
+
+    async def put(self, job: QueuedJob):
+        """Queue a job for which a slot was reserved"""
+        async with self._condition:
+            self._reserved -= 1
+            if job.client_id not in self._pending:
+                # A newly backlogged client starts at the current virtual time so
+                # it cannot claim credit for the period it was idle
+                self._pending[job.client_id] = []
+                self._client_service[job.client_id] = max(
+                    self._client_service.get(job.client_id, 0.0), self._virtual_time
+                )
+            heapq.heappush(
+                self._pending[job.client_id],
+                (job.priority != JobPriority.INTERACTIVE, job.estimated_pages, next(self._sequence), job)
+            )
+            self._pending_count += 1
+            self._condition.notify()
+
+    async def get(self) -> QueuedJob:
+        """Wait for the next job to run"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._pending_count > 0)
+            client_id = min(self._pending, key=self._scheduling_key)
+
+            heap = self._pending[client_id]
+            job = heapq.heappop(heap)[-1]
+            if not heap:
+                del self._pending[client_id]
+            self._pending_count -= 1
+
+            self._virtual_time = self._client_service[client_id]
+            self._client_service[client_id] += job.estimated_pages
+            self._running += 1
+            job.started_at = time.monotonic()
+            return job
+
+    def cancel(self, job_id: str) -> Optional[QueuedJob]:
+        """Remove a job that has not started yet, returning it if found"""
+        for client_id, heap in self._pending.items():
+            for index, entry in enumerate(heap):
+                if entry[-1].job_id != job_id:
+                    continue
+                heap[index] = heap[-1]
+                heap.pop()
+                heapq.heapify(heap)
+                if not heap:
+                    del self._pending[client_id]
+                self._pending_count -= 1
+                self._finish_client(client_id)
+                return entry[-1]
+        return None
+
+    def _scheduling_key(self, client_id: str):
+        """Order clients by the priority of their next job, then by service received"""
+        _, estimated_pages, sequence, job = self._pending[client_id][0]
+        return (self._priority_rank(job), self._client_service[client_id], estimated_pages, sequence)
+
+    def _priority_rank(self, job: QueuedJob) -> int:
+        if job.priority == JobPriority.INTERACTIVE:
+            return 0
+        if job.queue_wait > config.PRIORITY_AGING_SECONDS:
+            return 0
+        return 1
+
+    def task_done(self, job: QueuedJob, run_seconds: Optional[float]):
+        """Record that a job finished and free its client's slot; run_seconds=None leaves the run time estimate alone"""
+        self._running -= 1
+        self._finish_client(job.client_id)
+        if run_seconds is not None:
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * run_seconds
+
+    def _finish_client(self, client_id: str):
+        remaining = self._client_jobs.get(client_id, 0) - 1
+        if remaining > 0:
+            self._client_jobs[client_id] = remaining
+        else:
+            self._client_jobs.pop(client_id, None)
+            if client_id not in self._pending:
+                self._client_service.pop(client_id, None)
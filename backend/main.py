@@ -1,26 +1,37 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse, StreamingResponse, Response
 import uvicorn
 import os
-import tempfile
 import uuid
 import logging
 import asyncio
-from typing import List, Dict, Any
+import json
+import threading
+import shutil
+import hmac
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Set
 import aiofiles
 from pathlib import Path
 
-# Try to import magic, but make it optional
-try:
-    import magic
-    MAGIC_AVAILABLE = True
-except ImportError:
-    MAGIC_AVAILABLE = False
-    logger.warning("python-magic not available, MIME type checking will be limited")
-
-from models import JobResponse, ResultResponse, HealthResponse, JobStatus
-from ocr_processor import OCRProcessor
+# The HTTP layer only imports lightweight modules; OpenCV, NumPy and
+# pytesseract are loaded by the worker pool in the background
+from models import JobResponse, ResultResponse, HealthResponse, ReadinessResponse, JobStatus, JobPriority, OCRResult, JobTimings, FileTimings, ProfileSummary
+from cancellation import JobCancelledError
+from worker_pool import OCRWorkerPool
+from job_queue import JobQueue, QueuedJob, AdmissionError, QueueFullError, estimate_page_count
+import metrics
+from profiling import ProfileStore, should_profile
+from document_source import is_archive, iter_archive, entry_error, copy_entry, estimate_archive_pages, ARCHIVE_EXTENSIONS
+from timing import StageTimer, recording, timed, run_with_timer
+from exporters import EXPORT_FORMATS
+from webhooks import WebhookOutbox, validate_callback_url
+from coalescing import InFlightRequests, file_digest
+from result_store import ResultStore, StoredResults
+from storage import UploadStorage, directory_usage
 import config
 
 # Configure logging
@@ -30,6 +41,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Try to import magic, but make it optional
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+    logger.warning("python-magic not available, MIME type checking will be limited")
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
 # Initialize FastAPI app
 app = FastAPI(
     title=config.APP_NAME + " API",
@@ -46,8 +67,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OCR processor
-ocr_processor = OCRProcessor()
+# Worker pool for blocking OCR work; the OCR processor is created and warmed up on startup
+worker_pool = OCRWorkerPool()
+
+# Bounded queue of jobs waiting for the OCR workers
+job_queue = JobQueue()
+dispatcher_tasks: List[asyncio.Task] = []
+# Synchronous requests that exceeded their deadline and finish as jobs
+deferred_sync_tasks: Set[asyncio.Task] = set()
+# Synchronous images submitted to the workers and not yet finished, deferred ones included
+sync_in_flight = 0
+
+# cProfile artifacts for jobs that opted into profiling
+profile_store = ProfileStore()
+
+# OCR of files currently being processed, by content, shared between identical uploads
+inflight_ocr = InFlightRequests()
+
+# Completed results live on disk; job_storage only keeps job metadata
+result_store = ResultStore()
+
+# Disk quota and orphan reaper for UPLOAD_DIR
+upload_storage = UploadStorage()
+reaper_task: Optional[asyncio.Task] = None
+# Working files in UPLOAD_DIR that are not a job's upload (archive entries, shared copies)
+working_files: Set[str] = set()
+
+# Job completion callbacks, persisted until the receiver acknowledges them; results of forgotten jobs are gone
+webhook_outbox = WebhookOutbox(results_expired=lambda job_id: job_id not in job_storage)
+
+# Live gauges read at scrape time
+metrics.REGISTRY.register(metrics.Gauge("ocr_queue_depth", "Jobs waiting in the job queue", lambda: job_queue.depth))
+metrics.REGISTRY.register(metrics.Gauge("ocr_jobs_running", "Jobs currently being processed", lambda: job_queue.running))
+metrics.REGISTRY.register(metrics.Gauge("ocr_workers_busy", "OCR worker threads currently busy", lambda: worker_pool.active_workers))
+metrics.REGISTRY.register(metrics.Gauge("ocr_workers_total", "OCR worker threads", lambda: worker_pool.max_workers))
+metrics.REGISTRY.register(metrics.Gauge("ocr_tesseract_threads", "OpenMP threads per Tesseract process", lambda: worker_pool.plan.tesseract_threads))
+metrics.REGISTRY.register(metrics.Gauge("ocr_sync_in_flight", "Synchronous images being OCRed", lambda: sync_in_flight))
+metrics.REGISTRY.register(metrics.Gauge("ocr_jobs_in_memory", "Jobs held in job storage", lambda: len(job_storage)))
+metrics.REGISTRY.register(metrics.Gauge("ocr_inflight_files", "Distinct files being OCRed, shared by identical uploads", lambda: inflight_ocr.in_flight))
+metrics.REGISTRY.register(metrics.Gauge("ocr_upload_dir_bytes", "Bytes of uploaded files on disk", lambda: upload_storage.bytes_on_disk))
+metrics.REGISTRY.register(metrics.Gauge("ocr_upload_dir_files", "Uploaded files on disk", lambda: upload_storage.files_on_disk))
+metrics.REGISTRY.register(metrics.Gauge("ocr_upload_dir_quota_bytes", "Disk quota of the upload directory (0 = unlimited)", lambda: upload_storage.quota_bytes))
+metrics.REGISTRY.register(metrics.Gauge("ocr_results_dir_bytes", "Bytes of stored job results on disk", lambda: directory_usage(result_store.results_dir)[1]))
+metrics.REGISTRY.register(metrics.Gauge("ocr_webhook_outbox_pending", "Job completion callbacks waiting to be delivered", lambda: webhook_outbox.pending))
 
 # In-memory job storage (in production, use Redis or database)
 job_storage: Dict[str, Dict[str, Any]] = {}
@@ -57,6 +119,9 @@ config.UPLOAD_DIR.mkdir(exist_ok=True)
 
 def validate_file(file: UploadFile) -> bool:
     """Validate uploaded file"""
+    if config.ARCHIVE_UPLOADS_ENABLED and is_archive(file.filename):
+        return not (hasattr(file, 'size') and file.size and file.size > config.MAX_ARCHIVE_SIZE)
+    
     # Check file extension
     file_extension = Path(file.filename).suffix.lower()
     if file_extension not in config.SUPPORTED_EXTENSIONS:
@@ -78,6 +143,8 @@ def get_file_type(file_path: str) -> str:
             '.jpg': 'image/jpeg',
             '.jpeg': 'image/jpeg',
             '.webp': 'image/webp',
+            '.tif': 'image/tiff',
+            '.tiff': 'image/tiff',
             '.pdf': 'application/pdf'
         }
         return mime_map.get(ext, "unknown")
@@ -89,8 +156,15 @@ def get_file_type(file_path: str) -> str:
         logger.warning(f"Could not determine MIME type for {file_path}: {str(e)}")
         return "unknown"
 
-async def save_uploaded_file(file: UploadFile, upload_dir: Path) -> str:
-    """Save uploaded file to disk"""
+def get_client_id(request: Request) -> str:
+    """Identify the client for per-client admission limits"""
+    client_id = request.headers.get(config.CLIENT_ID_HEADER)
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "unknown"
+
+async def save_uploaded_file(file: UploadFile, upload_dir: Path) -> Tuple[str, int]:
+    """Save uploaded file to disk and estimate its page count for scheduling"""
     file_id = str(uuid.uuid4())
     file_extension = Path(file.filename).suffix.lower()
     file_path = upload_dir / f"{file_id}{file_extension}"
@@ -99,9 +173,249 @@ async def save_uploaded_file(file: UploadFile, upload_dir: Path) -> str:
         content = await file.read()
         await f.write(content)
     
-    return str(file_path)
+    return str(file_path), estimate_page_count(content, file.filename)
+
+async def save_uploaded_archive(file: UploadFile, upload_dir: Path, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+    """Stream an uploaded archive to disk in chunks and estimate its page count"""
+    file_path = upload_dir / f"{uuid.uuid4()}.archive"
+    written = 0
+    
+    async with aiofiles.open(file_path, 'wb') as f:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > config.MAX_ARCHIVE_SIZE:
+                await f.close()
+                file_path.unlink(missing_ok=True)
+                raise HTTPException(status_code=413, detail=f"Archive too large (max {config.MAX_ARCHIVE_SIZE // (1024*1024)}MB)")
+            await f.write(chunk)
+    
+    return str(file_path), estimate_archive_pages(str(file_path), file.filename)
 
-async def process_ocr_job(job_id: str, file_paths: List[str], filenames: List[str]):
+def require_admin(request: Request):
+    """Reject admin requests without the configured token; without ADMIN_TOKEN the admin endpoints are closed"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def remove_job_files(file_paths: List[str]):
+    """Delete a job's uploaded files, ignoring ones already removed"""
+    for file_path in file_paths:
+        try:
+            if os.path.exists(file_path):
+                os.unlink(file_path)
+                logger.info(f"Deleted temporary file: {file_path}")
+        except Exception as e:
+            logger.warning(f"Could not delete temporary file {file_path}: {str(e)}")
+
+def check_mime_type(file_path: str, filename: str, file_timer: StageTimer) -> Optional[str]:
+    """Error message if the file's content is not a supported type, else None"""
+    with recording(file_timer), timed("mime_check"):
+        mime_type = get_file_type(file_path)
+    logger.info(f"Detected MIME type for {filename}: {mime_type}")
+    
+    if mime_type not in config.SUPPORTED_MIME_TYPES and mime_type != "unknown":
+        error_msg = f"Unsupported MIME type {mime_type} for file {filename}"
+        logger.warning(error_msg)
+        return error_msg
+    return None
+
+async def ocr_file(
+    job_id: str,
+    file_path: str,
+    filename: str,
+    cancel_event: threading.Event,
+    profile: bool,
+    document_class: Optional[str],
+    file_timer: StageTimer
+) -> List[OCRResult]:
+    """OCR one file on the worker pool, under the profiler if the job asked for it"""
+    logger.info(f"Starting OCR for {filename}")
+    processor = worker_pool.processor
+    if profile:
+        return await worker_pool.run(
+            run_with_timer, file_timer, profile_store.run, job_id, filename,
+            # cProfile only sees the calling thread, so pages and cells must not fan out
+            processor.process_file, file_path, filename, cancel_event, document_class, False
+        )
+    return await worker_pool.run(
+        run_with_timer, file_timer, processor.process_file, file_path, filename, cancel_event, document_class
+    )
+
+def rename_results(results: List[OCRResult], source_filename: str, filename: str) -> List[OCRResult]:
+    """Copies of another file's results, named after the file that reused them"""
+    if source_filename == filename:
+        return results
+    return [
+        result.model_copy(update={"filename": filename + result.filename[len(source_filename):]})
+        if result.filename.startswith(source_filename)
+        else result.model_copy(update={"filename": filename})
+        for result in results
+    ]
+
+async def ocr_unique_file(
+    job_id: str,
+    file_path: str,
+    filename: str,
+    cancel_event: threading.Event,
+    profile: bool,
+    document_class: Optional[str],
+    file_timer: StageTimer,
+    job_files: Dict[str, Tuple[str, List[OCRResult]]]
+) -> List[OCRResult]:
+    """
+    OCR a file once per content
+    
+    Repeats of a file within the job reuse its results, and a file being
+    OCRed for another job right now is waited for instead of OCRed again.
+    Profiled jobs never share OCR with other jobs: the shared run would be
+    profiled for at most one of them.
+    
+    Args:
+        job_files: Results of this job's files so far, by content hash
+    """
+    if not config.DEDUP_ENABLED:
+        return await ocr_file(job_id, file_path, filename, cancel_event, profile, document_class, file_timer)
+    
+    digest = await asyncio.to_thread(run_with_timer, file_timer, file_digest, file_path)
+    if digest in job_files:
+        metrics.CACHE_HITS_TOTAL.inc(cache="job")
+        logger.info(f"{filename} is identical to {job_files[digest][0]} in job {job_id}, reusing its results")
+        return rename_results(job_files[digest][1], job_files[digest][0], filename)
+    
+    async def compute(cancellation) -> Tuple[str, List[OCRResult]]:
+        # The shared work needs the file even if this job is deleted and its uploads removed
+        shared_path = str(config.UPLOAD_DIR / f"{uuid.uuid4()}{Path(file_path).suffix}")
+        working_files.add(shared_path)
+        try:
+            try:
+                await asyncio.to_thread(os.link, file_path, shared_path)
+            except OSError:
+                # Filesystem without hard links
+                await asyncio.to_thread(shutil.copyfile, file_path, shared_path)
+            return filename, await ocr_file(job_id, shared_path, filename, cancellation, profile, document_class, file_timer)
+        finally:
+            remove_job_files([shared_path])
+            working_files.discard(shared_path)
+    
+    if profile:
+        source_filename, results = filename, await ocr_file(
+            job_id, file_path, filename, cancel_event, profile, document_class, file_timer
+        )
+        shared = False
+    else:
+        (source_filename, results), shared = await inflight_ocr.run(
+            f"{digest}:{document_class or 'default'}", cancel_event, compute
+        )
+    if shared:
+        metrics.CACHE_HITS_TOTAL.inc(cache="inflight")
+        logger.info(f"{filename} of job {job_id} shared the OCR of identical file {source_filename}")
+    
+    results = rename_results(results, source_filename, filename)
+    job_files[digest] = (filename, results)
+    return results
+
+async def process_archive(
+    job_id: str,
+    archive_path: str,
+    archive_name: str,
+    cancel_event: threading.Event,
+    profile: bool,
+    document_class: Optional[str]
+) -> Tuple[List[OCRResult], List[str], List[FileTimings]]:
+    """
+    Stream documents out of an uploaded archive and OCR them across the worker pool
+    
+    Entries are copied out one at a time and at most one per OCR worker is in
+    flight, so memory and disk use stay bounded whatever the archive size.
+    
+    Returns:
+        Results in archive order, error messages and per-entry timings
+    """
+    entry_results: Dict[int, List[OCRResult]] = {}
+    errors: List[str] = []
+    file_timings: List[FileTimings] = []
+    in_flight: Set[asyncio.Task] = set()
+    job_files: Dict[str, Tuple[str, List[OCRResult]]] = {}
+    
+    async def run_entry(index: int, entry_path: str, entry_name: str):
+        file_timer = StageTimer()
+        try:
+            error_msg = check_mime_type(entry_path, entry_name, file_timer)
+            if error_msg:
+                errors.append(error_msg)
+                return
+            entry_results[index] = await ocr_unique_file(
+                job_id, entry_path, entry_name, cancel_event, profile, document_class, file_timer, job_files
+            )
+        except JobCancelledError:
+            pass
+        except Exception as e:
+            error_msg = f"Error processing file {entry_name}: {str(e)}"
+            logger.error(error_msg)
+            metrics.FAILURES_TOTAL.inc(stage="file")
+            errors.append(error_msg)
+        finally:
+            remove_job_files([entry_path])
+            working_files.discard(entry_path)
+            file_timings.append(FileTimings(filename=entry_name, stages=file_timer.as_dict()))
+    
+    entries = iter_archive(archive_path, archive_name)
+    index = 0
+    entries_read = 0
+    try:
+        while not cancel_event.is_set():
+            # Reading and decompressing block, so step through the archive off the event loop
+            entry = await asyncio.to_thread(next, entries, None)
+            if entry is None:
+                break
+            
+            # Rejected entries count too, or an archive of countless tiny bad entries would never be cut off
+            entries_read += 1
+            if entries_read > config.MAX_ARCHIVE_ENTRIES:
+                errors.append(f"Archive {archive_name} has more than {config.MAX_ARCHIVE_ENTRIES} entries, the rest were skipped")
+                break
+            error_msg = entry_error(entry)
+            if error_msg:
+                errors.append(error_msg)
+                continue
+            
+            entry_path = str(config.UPLOAD_DIR / f"{uuid.uuid4()}{entry.extension}")
+            working_files.add(entry_path)
+            try:
+                await asyncio.to_thread(copy_entry, entry, entry_path)
+            except Exception as e:
+                remove_job_files([entry_path])
+                working_files.discard(entry_path)
+                errors.append(f"Error extracting {entry.name}: {str(e)}")
+                continue
+            
+            in_flight.add(asyncio.create_task(run_entry(index, entry_path, entry.name)))
+            index += 1
+            if len(in_flight) >= worker_pool.max_workers:
+                _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+    except Exception as e:
+        errors.append(f"Error reading archive {archive_name}: {str(e)}")
+    finally:
+        if in_flight:
+            await asyncio.wait(in_flight)
+        entries.close()
+    
+    logger.info(f"Archive {archive_name}: {index} documents processed, {len(errors)} errors")
+    results = [result for position in sorted(entry_results) for result in entry_results[position]]
+    return results, errors, file_timings
+
+async def process_ocr_job(
+    job_id: str,
+    file_paths: List[str],
+    filenames: List[str],
+    cancel_event: threading.Event,
+    profile: bool = False,
+    document_class: Optional[str] = None
+):
     """Background task to process OCR job"""
     try:
         logger.info(f"Starting OCR processing for job {job_id}")
@@ -109,46 +423,71 @@ async def process_ocr_job(job_id: str, file_paths: List[str], filenames: List[st
         
         results = []
         errors = []
+        file_timings = []
+        job_files: Dict[str, Tuple[str, List[OCRResult]]] = {}
+        job_started = time.perf_counter()
         
         for file_path, filename in zip(file_paths, filenames):
+            if cancel_event.is_set():
+                break
+            
+            file_timer = StageTimer()
             try:
                 logger.info(f"Processing file: {filename}")
                 
-                # Validate file type
-                mime_type = get_file_type(file_path)
-                logger.info(f"Detected MIME type for {filename}: {mime_type}")
+                if config.ARCHIVE_UPLOADS_ENABLED and is_archive(filename):
+                    archive_results, archive_errors, archive_timings = await process_archive(
+                        job_id, file_path, filename, cancel_event, profile, document_class
+                    )
+                    results.extend(archive_results)
+                    errors.extend(archive_errors)
+                    file_timings.extend(archive_timings)
+                    continue
                 
-                if mime_type not in config.SUPPORTED_MIME_TYPES and mime_type != "unknown":
-                    error_msg = f"Unsupported MIME type {mime_type} for file {filename}"
-                    logger.warning(error_msg)
+                # Validate file type
+                error_msg = check_mime_type(file_path, filename, file_timer)
+                if error_msg:
                     errors.append(error_msg)
                     continue
                 
                 # Process file
-                logger.info(f"Starting OCR for {filename}")
-                file_results = ocr_processor.process_file(file_path, filename)
+                file_results = await ocr_unique_file(
+                    job_id, file_path, filename, cancel_event, profile, document_class, file_timer, job_files
+                )
                 results.extend(file_results)
                 logger.info(f"OCR completed for {filename}: {len(file_results)} results")
                 
+            except JobCancelledError:
+                break
             except Exception as e:
                 error_msg = f"Error processing file {filename}: {str(e)}"
                 logger.error(error_msg, exc_info=True)
+                metrics.FAILURES_TOTAL.inc(stage="file")
                 errors.append(error_msg)
                 # Continue with other files
                 continue
             finally:
                 # Clean up temporary file
-                try:
-                    if os.path.exists(file_path):
-                        os.unlink(file_path)
-                        logger.info(f"Deleted temporary file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Could not delete temporary file {file_path}: {str(e)}")
+                remove_job_files([file_path])
+                file_timings.append(FileTimings(filename=filename, stages=file_timer.as_dict()))
+        
+        if cancel_event.is_set():
+            # The job was deleted while running, its entry and files are already gone
+            logger.info(f"OCR processing cancelled for job {job_id}")
+            return
+        
+        job_storage[job_id]["file_timings"] = file_timings
+        job_storage[job_id]["processing_seconds"] = round(time.perf_counter() - job_started, 4)
         
         # Update job status
         if results:
+            await asyncio.to_thread(result_store.write, job_id, results)
+            if job_id not in job_storage:
+                # Deleted while the results were being written
+                result_store.delete(job_id)
+                return
+            job_storage[job_id]["results_count"] = len(results)
             job_storage[job_id]["status"] = JobStatus.COMPLETED
-            job_storage[job_id]["results"] = results
             if errors:
                 job_storage[job_id]["error_message"] = f"Completed with errors: {'; '.join(errors)}"
             logger.info(f"OCR processing completed for job {job_id}: {len(results)} results")
@@ -160,19 +499,89 @@ async def process_ocr_job(job_id: str, file_paths: List[str], filenames: List[st
     except Exception as e:
         error_msg = f"Critical error in OCR job {job_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        job_storage[job_id]["status"] = JobStatus.FAILED
-        job_storage[job_id]["error_message"] = error_msg
+        if job_id in job_storage:
+            job_storage[job_id]["status"] = JobStatus.FAILED
+            job_storage[job_id]["error_message"] = error_msg
+    finally:
+        await notify_job_finished(job_id)
+
+async def notify_job_finished(job_id: str):
+    """Queue the completion callback of a finished job, if it asked for one
+
+    results_expired is filled in by the outbox when the event is sent, as the job may be gone by then.
+    """
+    job_data = job_storage.get(job_id)
+    # Deleted (cancelled) jobs are not reported
+    if job_data is None or not job_data.get("callback_url") or job_data["status"] == JobStatus.PROCESSING:
+        return
+    
+    await webhook_outbox.enqueue(job_data["callback_url"], {
+        "event": f"job.{job_data['status'].value}",
+        "job_id": job_id,
+        "status": job_data["status"].value,
+        "results_count": job_data["results_count"],
+        "error_message": job_data.get("error_message"),
+        "result_url": f"/api/ocr/result/{job_id}",
+        "finished_at": time.time()
+    })
+
+async def run_dispatcher(worker_id: int):
+    """Pull jobs from the queue and process them one at a time"""
+    logger.info(f"Job dispatcher {worker_id} started")
+    try:
+        await worker_pool.wait_until_ready()
+    except RuntimeError as e:
+        # Keep draining the queue so jobs fail visibly instead of hanging
+        logger.error(f"Dispatcher {worker_id}: {str(e)}")
+    
+    while True:
+        job = await job_queue.get()
+        started = time.monotonic()
+        if job.job_id not in job_storage:
+            # Deleted between being picked and dispatched; it never ran, so it says nothing about run times
+            remove_job_files(job.file_paths)
+            job_queue.task_done(job, None)
+            continue
+        job_storage[job.job_id]["queue_wait_seconds"] = round(job.queue_wait, 3)
+        metrics.QUEUE_WAIT_SECONDS.observe(job.queue_wait)
+        logger.info(f"Dispatching job {job.job_id} ({job.priority.value}, ~{job.estimated_pages} pages) after {job.queue_wait:.2f}s in queue")
+        try:
+            job_data = job_storage[job.job_id]
+            await process_ocr_job(
+                job.job_id, job.file_paths, job.filenames, job_data["cancel_event"],
+                job_data.get("profile", False), job_data.get("document_class")
+            )
+        except Exception as e:
+            logger.error(f"Dispatcher {worker_id} failed on job {job.job_id}: {str(e)}", exc_info=True)
+        finally:
+            job_queue.task_done(job, time.monotonic() - started)
+            status = job_storage[job.job_id]["status"].value if job.job_id in job_storage else "cancelled"
+            metrics.JOBS_TOTAL.inc(status=status)
+            metrics.JOB_LATENCY_SECONDS.observe(time.monotonic() - job.enqueued_at, status=status)
+            if status == JobStatus.FAILED.value:
+                metrics.FAILURES_TOTAL.inc(stage="job")
 
 @app.post("/api/ocr/upload", response_model=JobResponse)
 async def upload_documents(
-    background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...)
+    request: Request,
+    files: List[UploadFile] = File(...),
+    priority: Optional[JobPriority] = Query(None, description="Scheduling class; defaults by estimated page count"),
+    profile: bool = Query(False, description="Profile the OCR of this job (see /api/admin/profiles)"),
+    document_class: Optional[str] = Query(None, description="Document class selecting a tuned preprocessing profile"),
+    callback_url: Optional[str] = Query(None, description="URL notified with a POST when the job finishes")
 ):
     """
     Upload documents for OCR processing
     
-    Supports: PNG, JPG, JPEG, WEBP, PDF
+    Supports: PNG, JPG, JPEG, WEBP, PDF, TIFF (single & multi-page)
     Max file size: 10MB per file
+    Jobs are scheduled by priority class, fair share between clients and
+    shortest job first.
+    Returns 429 when the client has too many jobs in flight and 503 when the
+    server queue is full, both with a Retry-After header.
+    Set profile=true (or the X-OCR-Profile header) to capture a cProfile
+    profile per file, retrievable from /api/admin/profiles.
+    Set callback_url to be notified when the job finishes instead of polling.
     """
     try:
         logger.info(f"Upload request received with {len(files) if files else 0} files")
@@ -189,10 +598,42 @@ async def upload_documents(
         for file in files:
             logger.info(f"Validating file: {file.filename}")
             if not validate_file(file):
-                error_msg = f"Invalid file: {file.filename}. Supported formats: PNG, JPG, JPEG, WEBP, PDF (max {config.MAX_FILE_SIZE // (1024*1024)}MB)"
+                error_msg = f"Invalid file: {file.filename}. Supported formats: PNG, JPG, JPEG, WEBP, PDF, TIFF (max {config.MAX_FILE_SIZE // (1024*1024)}MB)"
+                if config.ARCHIVE_UPLOADS_ENABLED:
+                    error_msg += f", or a single ZIP/TAR archive (max {config.MAX_ARCHIVE_SIZE // (1024*1024)}MB)"
                 logger.error(error_msg)
                 raise HTTPException(status_code=400, detail=error_msg)
         
+        if len(files) > 1 and config.ARCHIVE_UPLOADS_ENABLED and any(is_archive(file.filename) for file in files):
+            raise HTTPException(status_code=400, detail="Archives must be uploaded on their own")
+        
+        if callback_url:
+            try:
+                # Resolves the host, keep the DNS lookup off the event loop
+                await asyncio.to_thread(validate_callback_url, callback_url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        # Admission control: reserve a queue slot and disk space before touching the disk
+        client_id = get_client_id(request)
+        incoming_bytes = sum(file.size or 0 for file in files)
+        try:
+            job_queue.reserve(client_id)
+            try:
+                upload_storage.reserve(
+                    incoming_bytes, retry_after=max(job_queue.estimated_wait(), config.INITIAL_JOB_SECONDS_ESTIMATE)
+                )
+            except AdmissionError:
+                job_queue.release(client_id)
+                raise
+        except AdmissionError as e:
+            logger.warning(f"Rejected upload from {client_id}: {str(e)}")
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        
         # Generate job ID
         job_id = str(uuid.uuid4())
         logger.info(f"Generated job ID: {job_id}")
@@ -200,34 +641,61 @@ async def upload_documents(
         # Save files
         file_paths = []
         filenames = []
+        estimated_pages = 0
         
-        for file in files:
-            try:
-                logger.info(f"Saving file: {file.filename}")
-                file_path = await save_uploaded_file(file, config.UPLOAD_DIR)
-                file_paths.append(file_path)
-                filenames.append(file.filename)
-                logger.info(f"File saved to: {file_path}")
-            except Exception as e:
-                logger.error(f"Error saving file {file.filename}: {str(e)}", exc_info=True)
-                raise HTTPException(status_code=500, detail=f"Error saving file {file.filename}: {str(e)}")
+        try:
+            for file in files:
+                try:
+                    logger.info(f"Saving file: {file.filename}")
+                    if config.ARCHIVE_UPLOADS_ENABLED and is_archive(file.filename):
+                        file_path, page_count = await save_uploaded_archive(file, config.UPLOAD_DIR)
+                    else:
+                        file_path, page_count = await save_uploaded_file(file, config.UPLOAD_DIR)
+                    metrics.BYTES_TOTAL.inc(os.path.getsize(file_path), endpoint="upload")
+                    file_paths.append(file_path)
+                    estimated_pages += page_count
+                    filenames.append(file.filename)
+                    logger.info(f"File saved to: {file_path}")
+                except Exception as e:
+                    job_queue.release(client_id)
+                    for saved_path in file_paths:
+                        Path(saved_path).unlink(missing_ok=True)
+                    if isinstance(e, HTTPException):
+                        raise
+                    logger.error(f"Error saving file {file.filename}: {str(e)}", exc_info=True)
+                    raise HTTPException(status_code=500, detail=f"Error saving file {file.filename}: {str(e)}")
+        finally:
+            # Saved files now count towards the quota themselves
+            upload_storage.release(incoming_bytes)
+        
+        if priority is None:
+            priority = JobPriority.INTERACTIVE if estimated_pages <= config.INTERACTIVE_MAX_PAGES else JobPriority.BULK
         
         # Initialize job
         job_storage[job_id] = {
             "status": JobStatus.PROCESSING,
             "files_count": len(files),
-            "results": [],
-            "error_message": None
+            "results_count": 0,
+            "error_message": None,
+            "client_id": client_id,
+            "queue_wait_seconds": None,
+            "file_paths": file_paths,
+            "cancel_event": threading.Event(),
+            "document_class": document_class,
+            "callback_url": callback_url,
+            "profile": should_profile(profile or request.headers.get(config.PROFILE_HEADER, "").lower() in ("1", "true"))
         }
         
-        logger.info(f"Starting background processing for job {job_id}")
-        # Start background processing
-        background_tasks.add_task(process_ocr_job, job_id, file_paths, filenames)
+        logger.info(f"Queueing job {job_id} ({priority.value}, ~{estimated_pages} pages, queue depth {job_queue.depth})")
+        await job_queue.put(QueuedJob(job_id, client_id, file_paths, filenames, estimated_pages, priority))
         
         return JobResponse(
             job_id=job_id,
             status=JobStatus.PROCESSING,
-            files_count=len(files)
+            files_count=len(files),
+            priority=priority,
+            estimated_pages=estimated_pages,
+            callback_url=callback_url
         )
         
     except HTTPException:
@@ -236,22 +704,234 @@ async def upload_documents(
         logger.error(f"Unexpected error in upload endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+async def finish_sync_job(job_id: str, future: asyncio.Future):
+    """Store the result of a synchronous request that exceeded its deadline"""
+    try:
+        result = await future
+        if job_id not in job_storage:
+            return
+        await asyncio.to_thread(result_store.write, job_id, [result])
+        if job_id not in job_storage:
+            # Deleted while the result was being written
+            result_store.delete(job_id)
+            return
+        job_storage[job_id]["results_count"] = 1
+        job_storage[job_id]["status"] = JobStatus.COMPLETED
+        logger.info(f"Deferred synchronous OCR completed for job {job_id}")
+    except Exception as e:
+        if job_id in job_storage:
+            job_storage[job_id]["status"] = JobStatus.FAILED
+            job_storage[job_id]["error_message"] = str(e)
+        logger.error(f"Deferred synchronous OCR failed for job {job_id}: {str(e)}")
+
+def reserve_sync_slot(client_id: str):
+    """Admit a synchronous image against the sync bound and the client's job limit, raising AdmissionError if it must wait"""
+    global sync_in_flight
+    if sync_in_flight >= config.SYNC_MAX_IN_FLIGHT:
+        raise QueueFullError(
+            f"Too many synchronous requests in flight ({config.SYNC_MAX_IN_FLIGHT})",
+            retry_after=config.SYNC_DEADLINE_SECONDS
+        )
+    job_queue.reserve(client_id)
+    sync_in_flight += 1
+
+def release_sync_slot(client_id: str):
+    """Free the slots of a synchronous image whose OCR finished"""
+    global sync_in_flight
+    sync_in_flight -= 1
+    job_queue.release(client_id)
+
+@app.post(
+    "/api/ocr/sync",
+    response_model=OCRResult,
+    responses={202: {"model": JobResponse, "description": "Deadline exceeded, poll the returned job"}}
+)
+async def ocr_sync(
+    request: Request,
+    file: UploadFile = File(...),
+    timings: bool = Query(False, description="Include the per-stage timing breakdown"),
+    document_class: Optional[str] = Query(None, description="Document class selecting a tuned preprocessing profile")
+):
+    """
+    OCR a single small image and return the result directly
+    
+    Supports: PNG, JPG, JPEG, WEBP
+    If the result is not ready within the server-side deadline, a job ID is
+    returned with status 202 and the result can be polled as usual.
+    Sync requests count towards the client's job limit until their OCR
+    finishes, deferred or not, and are rejected with 429 or 503 like uploads.
+    """
+    try:
+        file_extension = Path(file.filename).suffix.lower()
+        if file_extension not in config.SYNC_SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid file: {file.filename}. Supported formats: PNG, JPG, JPEG, WEBP")
+        
+        # Read one byte past the limit to detect oversized uploads without trusting headers
+        content = await file.read(config.SYNC_MAX_FILE_SIZE + 1)
+        if len(content) > config.SYNC_MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large for synchronous OCR (max {config.SYNC_MAX_FILE_SIZE // 1024}KB), use /api/ocr/upload"
+            )
+        
+        if not worker_pool.is_ready:
+            raise HTTPException(status_code=503, detail="OCR workers are warming up", headers={"Retry-After": "5"})
+        
+        # Admission control: the image is held in memory and a worker is busy until its OCR finishes
+        client_id = get_client_id(request)
+        try:
+            reserve_sync_slot(client_id)
+        except AdmissionError as e:
+            logger.warning(f"Rejected synchronous OCR from {client_id}: {str(e)}")
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        
+        metrics.BYTES_TOTAL.inc(len(content), endpoint="sync")
+        try:
+            future = asyncio.wrap_future(worker_pool.submit(
+                worker_pool.processor.process_image_bytes, content, file.filename, document_class
+            ))
+        except Exception:
+            release_sync_slot(client_id)
+            raise
+        # Released when the work finishes, not when the response is sent, so deadline-exceeded work stays counted
+        future.add_done_callback(lambda _: release_sync_slot(client_id))
+        
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=config.SYNC_DEADLINE_SECONDS)
+            return JSONResponse(content=result.model_dump(mode="json", exclude=None if timings else {"timings"}))
+        except asyncio.TimeoutError:
+            # Keep the work running and hand the client a job to poll
+            job_id = str(uuid.uuid4())
+            job_storage[job_id] = {
+                "status": JobStatus.PROCESSING,
+                "files_count": 1,
+                "results_count": 0,
+                "error_message": None,
+                "client_id": client_id
+            }
+            task = asyncio.create_task(finish_sync_job(job_id, future))
+            deferred_sync_tasks.add(task)
+            task.add_done_callback(deferred_sync_tasks.discard)
+            logger.info(f"Synchronous OCR for {file.filename} exceeded deadline, deferred to job {job_id}")
+            
+            return JSONResponse(
+                status_code=202,
+                content=JobResponse(job_id=job_id, status=JobStatus.PROCESSING, files_count=1).model_dump(mode="json")
+            )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in sync OCR endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def load_results(job_id: str) -> StoredResults:
+    """Map a job's result file before its response starts, so a concurrent delete cannot cut the response short"""
+    try:
+        return result_store.load(job_id)
+    except FileNotFoundError:
+        # Deleted or cleaned up since the job was looked up
+        raise HTTPException(status_code=404, detail="Job not found")
+
+def result_tail(job_data: Dict, timings: bool, serialization_seconds: float) -> bytes:
+    """End of a result response: closes the results array and adds the job timings when requested"""
+    tail = b"]"
+    if timings:
+        tail += b',"timings":' + JobTimings(
+            queue_wait_seconds=job_data.get("queue_wait_seconds"),
+            processing_seconds=job_data.get("processing_seconds"),
+            serialization_seconds=round(serialization_seconds, 4),
+            files=job_data.get("file_timings", [])
+        ).model_dump_json().encode()
+    return tail + b"}"
+
+def iter_result_response(
+    head: bytes,
+    stored: StoredResults,
+    start: int,
+    stop: Optional[int],
+    job_data: Dict,
+    timings: bool,
+    serialization_seconds: float
+) -> Iterator[bytes]:
+    """
+    Body of a result response: the envelope, the pages as raw JSON straight
+    from the mapped result file, then the tail
+
+    serialization_seconds adds up the time spent producing the body, not the
+    time spent sending it, and is reported in the tail.
+    """
+    try:
+        yield head
+        pages = stored.iter_json(start, stop, timings)
+        index = 0
+        while True:
+            started = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                break
+            chunk = b"," + page if index else page
+            index += 1
+            serialization_seconds += time.perf_counter() - started
+            yield chunk
+    finally:
+        stored.close()
+    yield result_tail(job_data, timings, serialization_seconds)
+
+def iter_stored_results(stored: StoredResults) -> Iterator[OCRResult]:
+    """Pages of a completed job, parsed one at a time, closing the mapping at the end"""
+    try:
+        yield from stored.iter_results()
+    finally:
+        stored.close()
+
 @app.get("/api/ocr/result/{job_id}", response_model=ResultResponse)
-async def get_ocr_result(job_id: str):
+async def get_ocr_result(
+    job_id: str,
+    timings: bool = Query(False, description="Include per-file and per-page timing breakdowns"),
+    offset: int = Query(0, ge=0, description="First page of the results to return"),
+    limit: Optional[int] = Query(None, ge=0, description="Maximum pages to return (default all)")
+):
     """
     Get OCR processing results for a job
+    
+    Results are streamed from the job's result file on disk; use offset and
+    limit to page through large jobs.
     """
     try:
         if job_id not in job_storage:
             raise HTTPException(status_code=404, detail="Job not found")
         
         job_data = job_storage[job_id]
+        serialize_started = time.perf_counter()
         
-        return ResultResponse(
+        envelope = ResultResponse(
             job_id=job_id,
             status=job_data["status"],
-            results=job_data["results"],
-            error_message=job_data.get("error_message")
+            results=[],
+            results_total=job_data["results_count"],
+            error_message=job_data.get("error_message"),
+            queue_wait_seconds=job_data.get("queue_wait_seconds")
+        ).model_dump(mode="json", exclude={"results", "timings"})
+        head = json.dumps(envelope).encode()[:-1] + b',"results":['
+        
+        if not job_data["results_count"] or offset >= job_data["results_count"]:
+            tail = result_tail(job_data, timings, time.perf_counter() - serialize_started)
+            return Response(content=head + tail, media_type="application/json")
+        
+        stored = load_results(job_id)
+        stop = offset + limit if limit is not None else None
+        return StreamingResponse(
+            iter_result_response(
+                head, stored, offset, stop, job_data, timings, time.perf_counter() - serialize_started
+            ),
+            media_type="application/json"
         )
         
     except HTTPException:
@@ -260,21 +940,128 @@ async def get_ocr_result(job_id: str):
         logger.error(f"Error getting result for job {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/api/ocr/result/{job_id}/export")
+async def export_ocr_result(
+    job_id: str,
+    format: str = Query("jsonl", description="jsonl, lines (one object per text line), hocr, alto or pdf (searchable text layer)")
+):
+    """
+    Stream a job's results in an export format, generated page by page
+    
+    Coordinates in every format are those of the preprocessed (resized,
+    possibly deskewed) image that was OCRed, not of the uploaded file.
+    """
+    if job_id not in job_storage:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid export format: {format}. Supported: {', '.join(EXPORT_FORMATS)}")
+    
+    job_data = job_storage[job_id]
+    if job_data["status"] == JobStatus.PROCESSING:
+        raise HTTPException(status_code=409, detail="Job is still processing")
+    
+    export, media_type, extension = EXPORT_FORMATS[format]
+    results = iter_stored_results(load_results(job_id)) if job_data["results_count"] else iter([])
+    logger.info(f"Exporting {job_data['results_count']} pages of job {job_id} as {format}")
+    return StreamingResponse(
+        export(results),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.{extension}"'}
+    )
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (uses the Tesseract capabilities probed at startup)"""
     try:
-        tesseract_version = ocr_processor.get_tesseract_version()
+        if not worker_pool.is_ready:
+            return HealthResponse(
+                status="starting" if worker_pool.warmup_error is None else "unhealthy",
+                version=config.APP_VERSION,
+                tesseract_version="Unknown"
+            )
         
+        ocr_processor = worker_pool.processor
         return HealthResponse(
             status="healthy",
-            version="1.0.0",
-            tesseract_version=tesseract_version
+            version=config.APP_VERSION,
+            tesseract_version=ocr_processor.get_tesseract_version(),
+            capabilities=ocr_processor.capabilities,
+            concurrency=worker_pool.plan
         )
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/api/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/api/health/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """Readiness probe: report warm-up state, worker saturation and queue depth, 503 when not ready"""
+    busy = worker_pool.active_workers
+    readiness = ReadinessResponse(
+        ready=worker_pool.is_ready and job_queue.depth < job_queue.max_depth,
+        warm=worker_pool.is_ready,
+        warmup_seconds=worker_pool.warmup_seconds,
+        workers_total=worker_pool.max_workers,
+        workers_busy=busy,
+        worker_saturation=round(busy / worker_pool.max_workers, 3),
+        queue_depth=job_queue.depth,
+        queue_capacity=job_queue.max_depth,
+        jobs_running=job_queue.running,
+        estimated_queue_wait_seconds=round(job_queue.estimated_wait(), 1)
+    )
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=readiness.model_dump())
+    return readiness
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, counters and queue gauges"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/admin/profiles", response_model=List[ProfileSummary])
+async def list_profiles(request: Request, job_id: Optional[str] = Query(None, description="Only profiles of this job")):
+    """List stored OCR profiles, newest first"""
+    require_admin(request)
+    return profile_store.list_profiles(job_id)
+
+@app.get("/api/admin/profiles/{profile_id}", response_model=ProfileSummary)
+async def get_profile(request: Request, profile_id: str):
+    """Profile summary: time in preprocessing vs Tesseract and the hottest functions"""
+    require_admin(request)
+    summary = profile_store.get(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+@app.get("/api/admin/profiles/{profile_id}/report", response_class=PlainTextResponse)
+async def get_profile_report(
+    request: Request,
+    profile_id: str,
+    sort: str = Query("cumulative", description="pstats sort key, e.g. cumulative, tottime, ncalls")
+):
+    """Full pstats listing of a profile"""
+    require_admin(request)
+    try:
+        report = profile_store.report(profile_id, sort)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Invalid sort key: {sort}")
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(report)
+
+@app.get("/api/admin/profiles/{profile_id}/download")
+async def download_profile(request: Request, profile_id: str):
+    """Raw cProfile dump, for pstats or snakeviz"""
+    require_admin(request)
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
 @app.get("/api/supported-formats")
 async def get_supported_formats():
     """Get list of supported file formats"""
@@ -282,17 +1069,33 @@ async def get_supported_formats():
         "supported_extensions": list(config.SUPPORTED_EXTENSIONS),
         "supported_mime_types": list(config.SUPPORTED_MIME_TYPES),
         "max_file_size_mb": config.MAX_FILE_SIZE // (1024 * 1024),
-        "max_batch_size": config.MAX_BATCH_SIZE
+        "max_batch_size": config.MAX_BATCH_SIZE,
+        "sync_max_file_size_kb": config.SYNC_MAX_FILE_SIZE // 1024,
+        "archive_extensions": list(ARCHIVE_EXTENSIONS) if config.ARCHIVE_UPLOADS_ENABLED else [],
+        "max_archive_size_mb": config.MAX_ARCHIVE_SIZE // (1024 * 1024)
     }
 
 @app.delete("/api/ocr/job/{job_id}")
 async def delete_job(job_id: str):
-    """Delete a job and its results"""
+    """Delete a job and its results, cancelling any work still in progress"""
     try:
         if job_id not in job_storage:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        del job_storage[job_id]
+        job_data = job_storage.pop(job_id)
+        
+        # Stop in-flight work at the next page or file boundary
+        cancel_event = job_data.get("cancel_event")
+        if cancel_event is not None:
+            cancel_event.set()
+        
+        # Drop the job from the queue if it has not started yet
+        if job_queue.cancel(job_id) is not None:
+            logger.info(f"Removed queued job {job_id}")
+        
+        # Free disk space now rather than when the worker notices
+        remove_job_files(job_data.get("file_paths", []))
+        result_store.delete(job_id)
         
         return {"message": "Job deleted successfully"}
         
@@ -302,33 +1105,60 @@ async def delete_job(job_id: str):
         logger.error(f"Error deleting job {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-# Cleanup old jobs periodically (simple implementation)
-async def cleanup_old_jobs():
-    """Clean up jobs older than 1 hour"""
-    import time
-    current_time = time.time()
-    
-    jobs_to_delete = []
-    for job_id, job_data in job_storage.items():
-        # This is a simplified cleanup - in production, store timestamps
-        if len(job_storage) > config.MAX_JOBS_IN_MEMORY:  # Keep only recent jobs
-            jobs_to_delete.append(job_id)
+def uploads_in_use() -> Set[str]:
+    """Files in UPLOAD_DIR of jobs that are still queued or running"""
+    return set(working_files) | {
+        path
+        for job_data in list(job_storage.values())
+        if job_data["status"] == JobStatus.PROCESSING
+        for path in job_data.get("file_paths", [])
+    }
+
+def evict_finished_jobs():
+    """Forget the oldest finished jobs, and their results, while more than MAX_JOBS_IN_MEMORY are held"""
+    excess = len(job_storage) - config.MAX_JOBS_IN_MEMORY
+    if excess <= 0:
+        return
     
-    for job_id in jobs_to_delete[:config.JOB_CLEANUP_BATCH_SIZE]:  # Delete oldest batch
+    # job_storage keeps insertion order, so the oldest jobs come first; running jobs are never evicted
+    finished = [job_id for job_id, job_data in job_storage.items() if job_data["status"] != JobStatus.PROCESSING]
+    for job_id in finished[:min(excess, config.JOB_CLEANUP_BATCH_SIZE)]:
         del job_storage[job_id]
+        result_store.delete(job_id)
 
 @app.on_event("startup")
 async def startup_event():
     """Application startup"""
     logger.info("OCR API starting up...")
-    logger.info(f"Tesseract version: {ocr_processor.get_tesseract_version()}")
-    logger.info(f"Supported languages: {len(ocr_processor.supported_languages)}")
+    logger.info(f"API modules imported in {IMPORT_SECONDS:.2f}s")
+    
+    # Warm the OCR workers in the background; dispatchers wait for them
+    worker_pool.start()
+    webhook_outbox.start()
+    result_store.clear()
+    
+    # Nothing in UPLOAD_DIR belongs to a job yet: anything there was left by a killed process
+    upload_storage.reap(set(), max_age_seconds=0)
+    global reaper_task
+    reaper_task = asyncio.create_task(upload_storage.run_reaper(uploads_in_use, on_pass=evict_finished_jobs))
+    
+    for worker_id in range(config.JOB_CONCURRENCY):
+        dispatcher_tasks.append(asyncio.create_task(run_dispatcher(worker_id)))
+    
+    logger.info(f"API startup completed in {time.perf_counter() - _import_started:.2f}s")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
     logger.info("OCR API shutting down...")
     
+    for task in dispatcher_tasks:
+        task.cancel()
+    if reaper_task is not None:
+        reaper_task.cancel()
+    worker_pool.shutdown()
+    await webhook_outbox.stop()
+    
     # Clean up any remaining temporary files
     try:
         for file_path in config.UPLOAD_DIR.glob("*"):
@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# Latency buckets in seconds, from a fast preprocessing stage up to a long PDF job
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for metrics rendered in the Prometheus text format"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    """Point-in-time value, read from a callback when scraped"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        try:
+            lines.append(f"{self.name} {_format_value(self.callback())}")
+        except Exception:
+            # A broken callback must not take the whole scrape down
+            pass
+        return lines
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PREPROCESS_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "ocr_preprocess_stage_seconds", "Time spent in each ImagePreprocessor stage", ("stage",)
+))
+PDF_RASTERIZE_SECONDS = REGISTRY.register(Histogram(
+    "ocr_pdf_rasterize_seconds", "Time spent rasterizing PDF pages"
+))
+TESSERACT_CALL_SECONDS = REGISTRY.register(Histogram(
+    "ocr_tesseract_call_seconds", "Time spent in each Tesseract call", ("call",)
+))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "ocr_queue_wait_seconds", "Time jobs spent waiting in the job queue"
+))
+JOB_LATENCY_SECONDS = REGISTRY.register(Histogram(
+    "ocr_job_latency_seconds", "End-to-end job latency from upload to completion", ("status",)
+))
+PAGES_TOTAL = REGISTRY.register(Counter(
+    "ocr_pages_total", "Pages (images or PDF pages) run through OCR"
+))
+BYTES_TOTAL = REGISTRY.register(Counter(
+    "ocr_uploaded_bytes_total", "Bytes of uploaded documents accepted", ("endpoint",)
+))
+CACHE_HITS_TOTAL = REGISTRY.register(Counter(
+    "ocr_cache_hits_total", "Results served from a cache instead of running OCR", ("cache",)
+))
+ADAPTIVE_PAGES_TOTAL = REGISTRY.register(Counter(
+    "ocr_adaptive_pages_total", "Pages by adaptive preprocessing outcome", ("outcome",)
+))
+FAILURES_TOTAL = REGISTRY.register(Counter(
+    "ocr_failures_total", "OCR failures", ("stage",)
+))
+WEBHOOK_DELIVERIES_TOTAL = REGISTRY.register(Counter(
+    "ocr_webhook_deliveries_total", "Job completion callbacks by delivery outcome", ("outcome",)
+))
+REAPED_FILES_TOTAL = REGISTRY.register(Counter(
+    "ocr_reaped_files_total", "Orphaned upload files removed by the reaper"
+))
+REAPED_BYTES_TOTAL = REGISTRY.register(Counter(
+    "ocr_reaped_bytes_total", "Bytes freed by the upload reaper"
+))
+JOBS_TOTAL = REGISTRY.register(Counter(
+    "ocr_jobs_total", "Finished OCR jobs", ("status",)
+))
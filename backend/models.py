@@ -7,11 +7,60 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobPriority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
 class BoundingBox(BaseModel):
     text: str
     confidence: float
     bbox: List[int]  # [x, y, width, height]
 
+class PageLayout(BaseModel):
+    """Block -> paragraph -> line -> word hierarchy of a page as flat offset arrays
+
+    Words are the page's bbox_data, in reading order. Each level lists where
+    its children start, with a final end offset, so the words of line i are
+    bbox_data[line_offsets[i]:line_offsets[i + 1]].
+    """
+    line_offsets: List[int]  # Word index where each line starts, plus the word count
+    paragraph_offsets: List[int]  # Line index where each paragraph starts, plus the line count
+    block_offsets: List[int]  # Paragraph index where each block starts, plus the paragraph count
+    line_bboxes: List[List[int]]  # [x, y, width, height] per line
+    block_bboxes: List[List[int]]  # [x, y, width, height] per block
+    line_texts: List[str]  # Words of each line joined by spaces
+
+class TableCell(BaseModel):
+    row: int
+    column: int
+    column_span: int = 1  # Columns covered by a cell whose inner borders are not ruled
+    text: str
+    confidence: float
+    bbox: List[int]  # [x, y, width, height]
+
+class Table(BaseModel):
+    """Ruled table or form grid found on a page, OCRed cell by cell"""
+    bbox: List[int]  # [x, y, width, height]
+    rows: int
+    columns: int
+    cells: List[TableCell]  # Row by row, left to right
+
+class PreprocessingProfile(BaseModel):
+    """Tunable ImagePreprocessor and Tesseract parameters (see benchmarks/tune_preprocessing.py)"""
+    denoise: bool = True
+    denoise_strength: float = 10  # fastNlMeansDenoising h
+    denoise_template_window: int = 7
+    denoise_search_window: int = 21
+    deskew: bool = True
+    clahe: bool = True
+    clahe_clip_limit: float = 2.0
+    clahe_tile_grid: int = 8
+    blur_kernel: int = 5  # Gaussian blur before thresholding, 0 to skip
+    threshold_block_size: int = 11  # Adaptive threshold neighbourhood, odd
+    threshold_c: float = 2
+    detect_tables: bool = False  # Find ruled tables on the binarized page and OCR their cells separately
+    tesseract_config: Optional[str] = None  # Defaults to TESSERACT_CONFIG
+
 class OCRResult(BaseModel):
     filename: str
     text: str
@@ -19,19 +68,86 @@ class OCRResult(BaseModel):
     language: str
     bbox_data: List[BoundingBox]
     page_number: Optional[int] = None
+    page_width: Optional[int] = None  # Size of the OCRed image that bbox_data refers to
+    page_height: Optional[int] = None
+    line_confidences: Optional[List[float]] = None  # Per text line, reading order
+    block_confidences: Optional[List[float]] = None  # Per text block, reading order
+    layout: Optional[PageLayout] = None  # Blocks, paragraphs and lines over bbox_data (needs TSV output)
+    tables: Optional[List[Table]] = None  # Set when the profile detects tables
+    timings: Optional[Dict[str, float]] = None  # Seconds per pipeline stage for this page
+    preprocessing: Optional[str] = None  # "fast" or "full" pipeline that produced the result
 
 class JobResponse(BaseModel):
     job_id: str
     status: JobStatus
     files_count: int
+    priority: Optional[JobPriority] = None
+    estimated_pages: Optional[int] = None
+    callback_url: Optional[str] = None
+
+class FileTimings(BaseModel):
+    filename: str
+    stages: Dict[str, float]  # File-level stages (MIME check, rasterization) plus total
+
+class JobTimings(BaseModel):
+    queue_wait_seconds: Optional[float] = None
+    processing_seconds: Optional[float] = None
+    serialization_seconds: Optional[float] = None
+    files: List[FileTimings] = []
 
 class ResultResponse(BaseModel):
     job_id: str
     status: JobStatus
     results: List[OCRResult]
+    results_total: Optional[int] = None  # Pages in the job; results holds the requested offset/limit slice
     error_message: Optional[str] = None
+    queue_wait_seconds: Optional[float] = None
+    timings: Optional[JobTimings] = None  # Only returned when requested
+
+class TesseractCapabilities(BaseModel):
+    version: str
+    supports_tsv: bool
+    supports_osd: bool
+    languages: List[str]
+
+class ConcurrencyTrial(BaseModel):
+    workers: int
+    tesseract_threads: int
+    pages_per_sec: Optional[float] = None
+
+class ConcurrencyPlan(BaseModel):
+    mode: str  # "static" or "auto"
+    workers: int  # Concurrent OCR worker threads
+    page_workers: int = 1  # Pages of a multi-page document each worker OCRs at once, one Tesseract process each
+    table_cell_workers: int = 0  # Table cells OCRed at once, shared by all workers (0 without table detection)
+    tesseract_threads: int  # OMP_THREAD_LIMIT of each Tesseract process
+    cpu_count: int
+    trials: Optional[List[ConcurrencyTrial]] = None  # Startup benchmark, in auto mode
 
 class HealthResponse(BaseModel):
     status: str
     version: str
-    tesseract_version: str
\ No newline at end of file
+    tesseract_version: str
+    capabilities: Optional[TesseractCapabilities] = None
+    concurrency: Optional[ConcurrencyPlan] = None
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    warm: bool  # OCR workers loaded and warmed up
+    warmup_seconds: Optional[float] = None
+    workers_total: int
+    workers_busy: int
+    worker_saturation: float  # Busy workers / total workers
+    queue_depth: int
+    queue_capacity: int
+    jobs_running: int
+    estimated_queue_wait_seconds: float
+
+class ProfileSummary(BaseModel):
+    profile_id: str
+    job_id: str
+    filename: str
+    created_at: float  # Unix timestamp
+    total_seconds: float
+    breakdown: Dict[str, float]  # Seconds in preprocessing, Tesseract and PDF rasterization
+    top_functions: Optional[List[Dict[str, Any]]] = None  # Only in the detail view
\ No newline at end of file
@@ -1,16 +1,22 @@
 import pytesseract
 import cv2
 import numpy as np
-from PIL import Image
-from pdf2image import convert_from_path
-import tempfile
+from PIL import Image, ImageSequence
+from pdf2image import convert_from_path, pdfinfo_from_path
 import os
 import logging
-from typing import List, Tuple, Dict, Any
-import json
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import List, Tuple, Dict, Iterator, Optional
 
-from image_preprocessor import ImagePreprocessor
-from models import OCRResult, BoundingBox
+from image_preprocessor import ImagePreprocessor, load_preprocessing_profiles
+from tesseract_data import TesseractData
+from table_detector import TableGrid, cell_has_ink, find_tables
+from cancellation import JobCancelledError, check_cancelled
+from metrics import TESSERACT_CALL_SECONDS, PDF_RASTERIZE_SECONDS, PAGES_TOTAL, ADAPTIVE_PAGES_TOTAL, PREPROCESS_STAGE_SECONDS
+from timing import StageTimer, recording, timed
+from models import OCRResult, TesseractCapabilities, PreprocessingProfile, Table, TableCell
 import config
 
 logger = logging.getLogger(__name__)
@@ -19,21 +25,71 @@ class OCRProcessor:
     """Advanced OCR processing with Tesseract"""
     
     def __init__(self):
-        self.preprocessor = ImagePreprocessor()
-        self.supported_languages = self._get_supported_languages()
+        # Tuned preprocessing parameters per document class, if configured
+        self.profiles = load_preprocessing_profiles(config.PREPROCESSING_PROFILES_PATH)
+        self.preprocessor = ImagePreprocessor(self.profiles["default"])
         
-        # Check Tesseract version and adjust config if needed
-        version = self.get_tesseract_version()
+        # Probe Tesseract once; health checks and OCR calls use the cached result
+        self.capabilities = self.probe_capabilities()
+        self.supported_languages = self.capabilities.languages
+        version = self.capabilities.version
         logger.info(f"Tesseract version detected: {version}")
         
         # Tesseract configuration for better accuracy
         self.tesseract_config = config.TESSERACT_CONFIG
         
+        # Marks threads whose calls must not fan out to page and cell threads
+        self._inline = threading.local()
+        
+        # Table cells of all pages and workers share one pool, so they never run more
+        # than TABLE_CELL_WORKERS Tesseract processes on top of the page OCR
+        detects_tables = any(profile.detect_tables for profile in self.profiles.values())
+        self.table_cell_workers = max(1, config.TABLE_CELL_WORKERS) if detects_tables else 0
+        self._cell_executor = ThreadPoolExecutor(
+            max_workers=self.table_cell_workers, thread_name_prefix="table-cell"
+        ) if detects_tables else None
+        
         # Warn if using old Tesseract version
         if '3.' in version or 'Unknown' in version:
             logger.warning("Tesseract 3.x detected. For better accuracy, consider upgrading to Tesseract 5.x")
             logger.warning("Current config: " + self.tesseract_config)
         
+    def close(self):
+        """Release the table cell threads"""
+        if self._cell_executor is not None:
+            self._cell_executor.shutdown(wait=False, cancel_futures=True)
+    
+    @property
+    def runs_parallel(self) -> bool:
+        """Whether work of the current call may run on page and table cell threads"""
+        return not getattr(self._inline, "active", False)
+    
+    def profile_for(self, document_class: Optional[str]) -> PreprocessingProfile:
+        """Preprocessing profile for a document class, falling back to the default"""
+        if document_class and document_class not in self.profiles:
+            logger.warning(f"No preprocessing profile for document class '{document_class}', using default")
+        return self.profiles.get(document_class or "default", self.profiles["default"])
+    
+    def probe_capabilities(self) -> TesseractCapabilities:
+        """Query the installed Tesseract for its version, features and languages"""
+        version = self._probe_tesseract_version()
+        languages = self._get_supported_languages()
+        
+        # TSV output (image_to_data) arrived in 3.05; assume it when the version is unknown
+        supports_tsv = True
+        match = re.search(r'(\d+)\.(\d+)', version)
+        if match:
+            supports_tsv = (int(match.group(1)), int(match.group(2))) >= (3, 5)
+        
+        capabilities = TesseractCapabilities(
+            version=version,
+            supports_tsv=supports_tsv,
+            supports_osd='osd' in languages,
+            languages=languages
+        )
+        logger.info(f"Tesseract capabilities: TSV={capabilities.supports_tsv}, OSD={capabilities.supports_osd}, languages={len(languages)}")
+        return capabilities
+    
     def _get_supported_languages(self) -> List[str]:
         """Get list of supported languages from Tesseract"""
         try:
@@ -53,10 +109,15 @@ class OCRProcessor:
     
     def detect_language(self, image: np.ndarray) -> str:
         """Detect the primary language in the image"""
+        if not self.capabilities.supports_osd:
+            # Without osd.traineddata every call would fail after a subprocess round-trip
+            return 'eng'
+        
         try:
             # Use Tesseract's built-in language detection
             # Note: OSD may not work well on Tesseract 3.x
-            osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+            with timed("tesseract_osd", TESSERACT_CALL_SECONDS, call="osd"):
+                pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
             
             # Try to extract language info from OSD
             # This is a simplified approach - in production, you might want more sophisticated detection
@@ -73,7 +134,13 @@ class OCRProcessor:
             logger.debug(f"Language detection failed: {str(e)}, using English")
             return 'eng'
     
-    def process_image(self, image_path: str, filename: str, page_number: int = None) -> OCRResult:
+    def process_image(
+        self,
+        image_path: str,
+        filename: str,
+        page_number: int = None,
+        profile: Optional[PreprocessingProfile] = None
+    ) -> OCRResult:
         """
         Process a single image file and extract text with confidence scores
         
@@ -81,10 +148,12 @@ class OCRProcessor:
             image_path: Path to the image file
             filename: Original filename
             page_number: Page number for PDF files
+            profile: Preprocessing parameters, defaults to the default profile
             
         Returns:
             OCRResult with extracted text and metadata
         """
+        profile = profile or self.preprocessor.profile
         try:
             logger.info(f"Processing image: {filename}")
             
@@ -92,205 +161,428 @@ class OCRProcessor:
             if not os.path.exists(image_path):
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
-            # Preprocess image
-            logger.info(f"Preprocessing image: {filename}")
-            processed_image = self.preprocessor.preprocess_image(image_path)
-            
-            # Detect language
-            logger.info(f"Detecting language for: {filename}")
-            language = self.detect_language(processed_image)
+            with recording(StageTimer()) as timer:
+                # Preprocess image and run Tesseract
+                logger.info(f"Preprocessing image: {filename}")
+                image = self.preprocessor.load_image(image_path)
+                result = self._ocr_page(image, filename, page_number, profile)
+            result.timings = timer.as_dict()
             
-            # Extract full text
-            logger.info(f"Extracting full text for: {filename}")
-            full_text = pytesseract.image_to_string(
-                processed_image,
-                lang=language,
-                config=self.tesseract_config
-            ).strip()
-            
-            # Try to get detailed data with bounding boxes (requires Tesseract 3.05+)
-            bbox_data = []
-            overall_confidence = 0.85  # Default confidence for Tesseract 3.02
-            
-            try:
-                logger.info(f"Attempting to extract detailed data for: {filename}")
-                text_data = pytesseract.image_to_data(
-                    processed_image, 
-                    lang=language,
-                    config=self.tesseract_config,
-                    output_type=pytesseract.Output.DICT
-                )
-                # Process bounding box data
-                bbox_data = self._extract_bbox_data(text_data)
-                # Calculate overall confidence
-                overall_confidence = self._calculate_overall_confidence(text_data)
-                logger.info(f"Detailed data extracted successfully")
-            except Exception as e:
-                logger.warning(f"Could not extract detailed data (requires Tesseract 3.05+): {str(e)}")
-                logger.info(f"Using basic text extraction only")
-            
-            result = OCRResult(
-                filename=filename,
-                text=full_text,
-                confidence=overall_confidence,
-                language=language,
-                bbox_data=bbox_data,
-                page_number=page_number
-            )
-            
-            logger.info(f"OCR completed for {filename}: {len(full_text)} characters, confidence: {overall_confidence:.2f}")
+            logger.info(f"OCR completed for {filename}: {len(result.text)} characters, confidence: {result.confidence:.2f}")
             return result
             
         except Exception as e:
             logger.error(f"Error processing image {filename}: {str(e)}", exc_info=True)
             raise Exception(f"OCR processing failed for {filename}: {str(e)}")
     
-    def process_pdf(self, pdf_path: str, filename: str) -> List[OCRResult]:
+    def process_image_bytes(self, image_bytes: bytes, filename: str, document_class: Optional[str] = None) -> OCRResult:
+        """
+        Process an in-memory image without writing it to disk
+        
+        Args:
+            image_bytes: Encoded image content (PNG, JPEG, WEBP)
+            filename: Original filename
+            document_class: Selects a tuned preprocessing profile
+            
+        Returns:
+            OCRResult with extracted text and metadata
+        """
+        with recording(StageTimer()) as timer:
+            with timed("decode"):
+                image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError(f"Could not decode image: {filename}")
+            
+            try:
+                result = self._ocr_page(image, filename, None, self.profile_for(document_class))
+            except Exception as e:
+                logger.error(f"Error processing image {filename}: {str(e)}", exc_info=True)
+                raise Exception(f"OCR processing failed for {filename}: {str(e)}")
+        result.timings = timer.as_dict()
+        
+        logger.info(f"OCR completed for {filename}: {len(result.text)} characters, confidence: {result.confidence:.2f}")
+        return result
+    
+    def process_pdf(
+        self,
+        pdf_path: str,
+        filename: str,
+        cancel_event: Optional[threading.Event] = None,
+        profile: Optional[PreprocessingProfile] = None
+    ) -> List[OCRResult]:
         """
         Process a PDF file and extract text from all pages
         
         Args:
             pdf_path: Path to the PDF file
             filename: Original filename
+            cancel_event: Checked between pages; when set, processing stops
+            profile: Preprocessing parameters, defaults to the default profile
             
         Returns:
             List of OCRResult objects, one per page
         """
-        try:
-            logger.info(f"Processing PDF: {filename}")
-            
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=config.PDF_DPI)
-            results = []
+        logger.info(f"Processing PDF: {filename}")
+        return self._process_pages(self._iter_pdf_pages(pdf_path), filename, cancel_event, profile)
+    
+    def process_tiff(
+        self,
+        tiff_path: str,
+        filename: str,
+        cancel_event: Optional[threading.Event] = None,
+        profile: Optional[PreprocessingProfile] = None
+    ) -> List[OCRResult]:
+        """
+        Process a (multi-page) TIFF, as produced by fax machines and document scanners
+        
+        Args:
+            tiff_path: Path to the TIFF file
+            filename: Original filename
+            cancel_event: Checked between pages; when set, processing stops
+            profile: Preprocessing parameters, defaults to the default profile
             
-            for page_num, image in enumerate(images, 1):
-                logger.info(f"Processing page {page_num} of {filename}")
-                
-                # Convert PIL image to numpy array
-                image_array = np.array(image)
-                
-                # Preprocess image
-                processed_image = self.preprocessor.preprocess_image_array(image_array)
-                
-                # Detect language
-                language = self.detect_language(processed_image)
-                
-                # Extract full text
-                full_text = pytesseract.image_to_string(
-                    processed_image,
-                    lang=language,
-                    config=self.tesseract_config
-                ).strip()
+        Returns:
+            List of OCRResult objects, one per frame
+        """
+        logger.info(f"Processing TIFF: {filename}")
+        return self._process_pages(self._iter_tiff_pages(tiff_path), filename, cancel_event, profile)
+    
+    def _iter_pdf_pages(self, pdf_path: str) -> Iterator[np.ndarray]:
+        """Rasterize a PDF one page at a time instead of holding every page in memory"""
+        page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        for page_num in range(1, page_count + 1):
+            with timed("rasterize", PDF_RASTERIZE_SECONDS):
+                page = convert_from_path(pdf_path, dpi=config.PDF_DPI, first_page=page_num, last_page=page_num)[0]
+            with timed("decode"):
+                image_array = np.array(page)
+            del page
+            yield image_array
+    
+    def _iter_tiff_pages(self, tiff_path: str) -> Iterator[np.ndarray]:
+        """Decode the frames of a TIFF one at a time"""
+        with Image.open(tiff_path) as tiff:
+            for frame in ImageSequence.Iterator(tiff):
+                with timed("decode"):
+                    # Bilevel fax frames and 16-bit scans become plain 8-bit grayscale
+                    page = frame.convert('L')
+                    # Standard-resolution faxes use 204x98 DPI; restore square pixels
+                    x_dpi, y_dpi = (float(value) for value in frame.info.get('dpi', (0, 0)))
+                    if x_dpi and y_dpi and abs(x_dpi - y_dpi) > 1:
+                        page = page.resize((page.width, round(page.height * x_dpi / y_dpi)), Image.BICUBIC)
+                    image_array = np.array(page)
+                yield image_array
+    
+    def _process_pages(
+        self,
+        pages: Iterator[np.ndarray],
+        filename: str,
+        cancel_event: Optional[threading.Event],
+        profile: Optional[PreprocessingProfile]
+    ) -> List[OCRResult]:
+        """
+        OCR the pages of a multi-page document, up to PAGE_WORKERS at a time
+        
+        Pages are pulled from the iterator only when a page slot is free, so
+        memory stays constant however many pages the document has. Without
+        runs_parallel, pages are OCRed one by one on the calling thread.
+        
+        Returns:
+            OCRResult objects in page order
+        """
+        profile = profile or self.preprocessor.profile
+        results: Dict[int, OCRResult] = {}
+        
+        def finish(page_num: int, result: OCRResult):
+            results[page_num] = result
+            logger.info(f"Page {page_num} completed: {len(result.text)} characters, confidence: {result.confidence:.2f}")
+        
+        page_workers = max(1, config.PAGE_WORKERS) if self.runs_parallel else 1
+        executor = ThreadPoolExecutor(max_workers=page_workers, thread_name_prefix="ocr-page") if page_workers > 1 else None
+        in_flight: Dict[Future, int] = {}
+        try:
+            page_num = 0
+            while True:
+                check_cancelled(cancel_event, filename)
                 
-                # Try to get detailed data with bounding boxes (requires Tesseract 3.05+)
-                bbox_data = []
-                overall_confidence = 0.85  # Default confidence for Tesseract 3.02
+                timer = StageTimer()
+                with recording(timer):
+                    image = next(pages, None)
+                if image is None:
+                    break
+                page_num += 1
+                logger.info(f"Processing page {page_num} of {filename}")
+                page_name = f"{filename} (Page {page_num})"
                 
-                try:
-                    text_data = pytesseract.image_to_data(
-                        processed_image,
-                        lang=language,
-                        config=self.tesseract_config,
-                        output_type=pytesseract.Output.DICT
-                    )
-                    # Process bounding box data
-                    bbox_data = self._extract_bbox_data(text_data)
-                    # Calculate overall confidence
-                    overall_confidence = self._calculate_overall_confidence(text_data)
-                except Exception as e:
-                    logger.warning(f"Could not extract detailed data for page {page_num}: {str(e)}")
+                if executor is None:
+                    finish(page_num, self._ocr_timed_page(timer, image, page_name, page_num, profile))
+                    continue
                 
-                result = OCRResult(
-                    filename=f"{filename} (Page {page_num})",
-                    text=full_text,
-                    confidence=overall_confidence,
-                    language=language,
-                    bbox_data=bbox_data,
-                    page_number=page_num
-                )
+                future = executor.submit(self._ocr_timed_page, timer, image, page_name, page_num, profile)
+                in_flight[future] = page_num
+                del image
                 
-                results.append(result)
-                logger.info(f"Page {page_num} completed: {len(full_text)} characters, confidence: {overall_confidence:.2f}")
-            
-            logger.info(f"PDF processing completed: {len(results)} pages")
-            return results
+                if len(in_flight) >= page_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(in_flight.pop(future), future.result())
             
+            for future in as_completed(in_flight):
+                finish(in_flight[future], future.result())
+            in_flight.clear()
+        except JobCancelledError:
+            logger.info(f"Processing cancelled: {filename}")
+            raise
         except Exception as e:
-            logger.error(f"Error processing PDF {filename}: {str(e)}")
+            logger.error(f"Error processing {filename}: {str(e)}")
             raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
+            pages.close()
+        
+        logger.info(f"Processing completed for {filename}: {len(results)} pages")
+        return [results[page_num] for page_num in sorted(results)]
     
-    def _extract_bbox_data(self, text_data: Dict[str, List]) -> List[BoundingBox]:
-        """Extract bounding box data from Tesseract output"""
-        bbox_data = []
+    def _ocr_timed_page(
+        self,
+        timer: StageTimer,
+        image: np.ndarray,
+        filename: str,
+        page_number: int,
+        profile: PreprocessingProfile
+    ) -> OCRResult:
+        """OCR one page on a page worker, continuing the timer its decoding was recorded in"""
+        with recording(timer):
+            result = self._ocr_page(image, filename, page_number, profile)
+        result.timings = timer.as_dict()
+        return result
+    
+    def _ocr_page(
+        self,
+        image: np.ndarray,
+        filename: str,
+        page_number: Optional[int],
+        profile: PreprocessingProfile
+    ) -> OCRResult:
+        """
+        Preprocess and OCR one page, escalating from the fast pipeline when adaptive mode is on
         
-        n_boxes = len(text_data['text'])
-        for i in range(n_boxes):
-            text = text_data['text'][i].strip()
-            confidence = float(text_data['conf'][i])
+        Args:
+            image: Decoded page image
+            filename: Name used in results and logs
+            page_number: Page number for PDF files
+            profile: Parameters of the full preprocessing pipeline
             
-            # Only include text with reasonable confidence and non-empty text
-            if confidence > 0 and text:
-                bbox = BoundingBox(
-                    text=text,
-                    confidence=confidence / 100.0,  # Convert to 0-1 scale
-                    bbox=[
-                        int(text_data['left'][i]),
-                        int(text_data['top'][i]),
-                        int(text_data['width'][i]),
-                        int(text_data['height'][i])
-                    ]
-                )
-                bbox_data.append(bbox)
-        
-        return bbox_data
+        Returns:
+            OCRResult of the full pipeline, or of the fast one if it was confident
+            enough or turned out better
+        """
+        PAGES_TOTAL.inc()
+        
+        # Confidence is only measured with TSV output; without it there is nothing to decide on
+        if not (config.ADAPTIVE_PREPROCESSING and self.capabilities.supports_tsv):
+            processed_image = self.preprocessor.preprocess_image_array(image, profile)
+            result = self._run_ocr(processed_image, filename, page_number, profile.tesseract_config)
+            result.preprocessing = "full"
+            return self._add_tables(result, processed_image, profile)
+        
+        fast_image = self.preprocessor.preprocess_fast(image)
+        fast_result = self._run_ocr(fast_image, filename, page_number, profile.tesseract_config)
+        fast_result.preprocessing = "fast"
+        if fast_result.confidence >= config.ADAPTIVE_CONFIDENCE_THRESHOLD:
+            ADAPTIVE_PAGES_TOTAL.inc(outcome="early_exit")
+            return self._add_tables(fast_result, fast_image, profile)
+        
+        logger.info(f"Fast pass confidence {fast_result.confidence:.2f} for {filename}, escalating to full preprocessing")
+        processed_image = self.preprocessor.preprocess_image_array(image, profile)
+        # Same page, so the fast pass's language saves another OSD call
+        full_result = self._run_ocr(processed_image, filename, page_number, profile.tesseract_config, fast_result.language)
+        full_result.preprocessing = "full"
+        
+        if fast_result.confidence > full_result.confidence:
+            ADAPTIVE_PAGES_TOTAL.inc(outcome="escalated_fast_kept")
+            return self._add_tables(fast_result, fast_image, profile)
+        ADAPTIVE_PAGES_TOTAL.inc(outcome="escalated")
+        return self._add_tables(full_result, processed_image, profile)
     
-    def _calculate_overall_confidence(self, text_data: Dict[str, List]) -> float:
-        """Calculate overall confidence score for the OCR result"""
-        confidences = []
-        
-        for i, conf in enumerate(text_data['conf']):
-            text = text_data['text'][i].strip()
-            if conf > 0 and text:  # Only consider valid detections
-                confidences.append(float(conf))
-        
-        if not confidences:
-            return 0.0
-        
-        # Use weighted average based on text length
-        total_weight = 0
-        weighted_sum = 0
-        
-        for i, conf in enumerate(confidences):
-            text_length = len(text_data['text'][i].strip())
-            weight = max(1, text_length)  # Minimum weight of 1
-            weighted_sum += conf * weight
-            total_weight += weight
-        
-        overall_confidence = weighted_sum / total_weight if total_weight > 0 else 0.0
-        return min(1.0, overall_confidence / 100.0)  # Convert to 0-1 scale
+    def _add_tables(self, result: OCRResult, processed_image: np.ndarray, profile: PreprocessingProfile) -> OCRResult:
+        """Detect ruled tables on the binarized page the result came from and OCR their cells"""
+        if not profile.detect_tables:
+            return result
+        
+        with timed("table_detection", PREPROCESS_STAGE_SECONDS, stage="table_detection"):
+            grids, lineless_image = find_tables(processed_image)
+        
+        cells = [cell for grid in grids for cell in grid.cells]
+        readings = []
+        if cells:
+            logger.info(f"Found {len(grids)} tables with {len(cells)} cells in {result.filename}")
+            
+            def read(cell):
+                return self._ocr_table_cell(lineless_image, cell, result.language)
+            
+            with timed("table_cells"):
+                if not self.runs_parallel or self._cell_executor is None:
+                    readings = [read(cell) for cell in cells]
+                else:
+                    # Each cell is a small Tesseract process of its own, so they run side by side
+                    readings = list(self._cell_executor.map(read, cells))
+        
+        result.tables = []
+        start = 0
+        for grid in grids:
+            result.tables.append(self._build_table(grid, readings[start:start + len(grid.cells)]))
+            start += len(grid.cells)
+        return result
+    
+    def _ocr_table_cell(self, image: np.ndarray, cell: Tuple[int, ...], language: str) -> Tuple[str, float]:
+        """OCR one table cell; returns its text (lines separated by newlines) and confidence"""
+        _, _, _, x, y, width, height = cell
+        crop = image[y:y + height, x:x + width]
+        if not cell_has_ink(crop):
+            return "", 0.0
+        
+        # Tesseract finds text touching the image border poorly
+        crop = cv2.copyMakeBorder(crop, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=255)
+        with timed("tesseract_table_cell", TESSERACT_CALL_SECONDS, call="table_cell"):
+            if not self.capabilities.supports_tsv:
+                text = pytesseract.image_to_string(crop, lang=language, config=config.TABLE_CELL_TESSERACT_CONFIG)
+                return text.strip(), 0.85  # Default confidence for Tesseract 3.02
+            tsv = pytesseract.image_to_data(crop, lang=language, config=config.TABLE_CELL_TESSERACT_CONFIG)
+        
+        text_data = TesseractData.from_tsv(tsv)
+        return "\n".join(text_data.layout().line_texts), round(text_data.overall_confidence(), 4)
+    
+    def _build_table(self, grid: TableGrid, readings: List[Tuple[str, float]]) -> Table:
+        """Table model of a grid and the readings of its cells"""
+        cells = []
+        for (row, column, column_span, x, y, width, height), (text, confidence) in zip(grid.cells, readings):
+            cells.append(TableCell(
+                row=row,
+                column=column,
+                column_span=column_span,
+                text=text,
+                confidence=confidence,
+                bbox=[x, y, width, height]
+            ))
+        return Table(bbox=list(grid.bbox), rows=grid.rows, columns=grid.columns, cells=cells)
+    
+    def _run_ocr(
+        self,
+        processed_image: np.ndarray,
+        filename: str,
+        page_number: int = None,
+        tesseract_config: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> OCRResult:
+        """Run Tesseract on a preprocessed image and build the OCR result, detecting the language unless given"""
+        tesseract_config = tesseract_config or self.tesseract_config
+        
+        # Detect language
+        language = language or self.detect_language(processed_image)
+        
+        # Extract full text
+        with timed("tesseract_string", TESSERACT_CALL_SECONDS, call="string"):
+            full_text = pytesseract.image_to_string(
+                processed_image,
+                lang=language,
+                config=tesseract_config
+            ).strip()
+        
+        # Try to get detailed data with bounding boxes (requires Tesseract 3.05+)
+        bbox_data = []
+        overall_confidence = 0.85  # Default confidence for Tesseract 3.02
+        line_confidences = None
+        block_confidences = None
+        layout = None
+        
+        if self.capabilities.supports_tsv:
+            try:
+                with timed("tesseract_data", TESSERACT_CALL_SECONDS, call="data"):
+                    tsv = pytesseract.image_to_data(
+                        processed_image,
+                        lang=language,
+                        config=tesseract_config
+                    )
+                text_data = TesseractData.from_tsv(tsv)
+                bbox_data = text_data.extract_boxes()
+                overall_confidence = text_data.overall_confidence()
+                line_confidences = text_data.line_confidences()
+                block_confidences = text_data.block_confidences()
+                layout = text_data.layout()
+            except Exception as e:
+                logger.warning(f"Could not extract detailed data for {filename} (requires Tesseract 3.05+): {str(e)}")
+        
+        return OCRResult(
+            filename=filename,
+            text=full_text,
+            confidence=overall_confidence,
+            language=language,
+            bbox_data=bbox_data,
+            page_number=page_number,
+            page_width=processed_image.shape[1],
+            page_height=processed_image.shape[0],
+            line_confidences=line_confidences,
+            block_confidences=block_confidences,
+            layout=layout
+        )
     
-    def process_file(self, file_path: str, filename: str) -> List[OCRResult]:
+    def process_file(
+        self,
+        file_path: str,
+        filename: str,
+        cancel_event: Optional[threading.Event] = None,
+        document_class: Optional[str] = None,
+        parallel: bool = True
+    ) -> List[OCRResult]:
         """
         Process any supported file type
         
         Args:
             file_path: Path to the file
             filename: Original filename
+            cancel_event: Set to cancel processing cooperatively
+            document_class: Selects a tuned preprocessing profile
+            parallel: OCR pages and table cells on their own threads; turn off
+                to keep all work on the calling thread, e.g. for cProfile,
+                which only records the thread that enabled it
             
         Returns:
             List of OCRResult objects
         """
+        check_cancelled(cancel_event, filename)
         file_extension = os.path.splitext(filename)[1].lower()
+        profile = self.profile_for(document_class)
         
-        if file_extension == '.pdf':
-            return self.process_pdf(file_path, filename)
-        else:
-            # Process as image
-            result = self.process_image(file_path, filename)
-            return [result]
+        was_inline = getattr(self._inline, "active", False)
+        self._inline.active = was_inline or not parallel
+        try:
+            if file_extension == '.pdf':
+                return self.process_pdf(file_path, filename, cancel_event, profile)
+            elif file_extension in ('.tif', '.tiff'):
+                return self.process_tiff(file_path, filename, cancel_event, profile)
+            else:
+                # Process as image
+                result = self.process_image(file_path, filename, profile=profile)
+                return [result]
+        finally:
+            self._inline.active = was_inline
+    
+    def warm_up(self):
+        """Run one synthetic page through the pipeline so the first real job starts hot"""
+        page = np.full((600, 800, 3), 255, dtype=np.uint8)
+        cv2.putText(page, "Warm up 0123456789", (40, 300), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+        processed_image = self.preprocessor.preprocess_image_array(page)
+        self._run_ocr(processed_image, "warm-up")
     
     def get_tesseract_version(self) -> str:
-        """Get Tesseract version for health check"""
+        """Get Tesseract version for health check (cached at startup)"""
+        return self.capabilities.version
+    
+    def _probe_tesseract_version(self) -> str:
+        """Run Tesseract to find out its version"""
         # Try alternative method first (more reliable)
         try:
             import subprocess
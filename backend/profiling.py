@@ -0,0 +1,160 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Modules whose cumulative time is reported separately in the profile summary
+PROFILE_BUCKETS = {
+    "preprocessing": ("image_preprocessor.py",),
+    "tesseract": ("pytesseract",),
+    "pdf_rasterize": ("pdf2image",),
+}
+
+
+def should_profile(requested: bool, sample_rate: float = config.PROFILE_SAMPLE_RATE) -> bool:
+    """Profile when the client asked for it, or for a random sample of jobs"""
+    return requested or (sample_rate > 0 and random.random() < sample_rate)
+
+
+class ProfileStore:
+    """Runs calls under cProfile and keeps the most recent profiles on disk
+
+    Each profile is stored as a pstats dump (loadable with pstats or snakeviz)
+    next to a JSON summary with the hottest functions and the time spent in
+    preprocessing, Tesseract and PDF rasterization.
+    """
+
+    def __init__(self, profile_dir: Path = config.PROFILE_DIR, max_profiles: int = config.PROFILE_MAX_STORED):
+        self.profile_dir = Path(profile_dir)
+        self.max_profiles = max_profiles
+        # One profile at a time: profilers add overhead, and Python 3.12+ allows only one active
+        self._active = threading.Lock()
+
+    def run(self, job_id: str, filename: str, func: Callable, *args, **kwargs) -> Any:
+        """Call func under the profiler and store the result; runs unprofiled if another profile is active"""
+        if not self._active.acquire(blocking=False):
+            logger.info(f"Profiler busy, processing {filename} of job {job_id} unprofiled")
+            return func(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                self._save(profiler, job_id, filename, time.perf_counter() - started)
+        finally:
+            self._active.release()
+
+    def _save(self, profiler: cProfile.Profile, job_id: str, filename: str, seconds: float):
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            profile_id = uuid.uuid4().hex
+            profiler.dump_stats(str(self.profile_dir / f"{profile_id}.prof"))
+
+            stats = pstats.Stats(profiler)
+            summary = {
+                "profile_id": profile_id,
+                "job_id": job_id,
+                "filename": filename,
+                "created_at": time.time(),
+                "total_seconds": round(seconds, 4),
+                "breakdown": self._breakdown(stats),
+                "top_functions": self._top_functions(stats)
+            }
+            with open(self.profile_dir / f"{profile_id}.json", "w") as f:
+                json.dump(summary, f)
+            logger.info(f"Stored profile {profile_id} for {filename} of job {job_id} ({seconds:.2f}s)")
+            self._prune()
+        except Exception as e:
+            # Profiling must never fail the job it observes
+            logger.warning(f"Could not store profile for {filename}: {str(e)}")
+
+    @staticmethod
+    def _breakdown(stats: pstats.Stats) -> Dict[str, float]:
+        """Cumulative seconds under the outermost call into each module group"""
+        breakdown = {}
+        for bucket, patterns in PROFILE_BUCKETS.items():
+            def in_bucket(func):
+                return any(pattern in func[0] for pattern in patterns)
+
+            total = 0.0
+            for func, (_, _, _, cumulative, callers) in stats.stats.items():
+                # Only count entry points so nested calls are not double counted
+                if in_bucket(func) and not any(in_bucket(caller) for caller in callers):
+                    total += cumulative
+            breakdown[bucket] = round(total, 4)
+        return breakdown
+
+    @staticmethod
+    def _top_functions(stats: pstats.Stats, limit: int = 25) -> List[Dict[str, Any]]:
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "own_seconds": round(own, 4),
+                "cumulative_seconds": round(cumulative, 4)
+            }
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows
+        ]
+
+    def _prune(self):
+        """Keep only the newest max_profiles profiles"""
+        summaries = sorted(self.profile_dir.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for summary in summaries[self.max_profiles:]:
+            summary.unlink(missing_ok=True)
+            summary.with_suffix(".prof").unlink(missing_ok=True)
+
+    def list_profiles(self, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Summaries of stored profiles, newest first"""
+        summaries = []
+        for path in self.profile_dir.glob("*.json"):
+            try:
+                with open(path) as f:
+                    summary = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job_id is not None and summary.get("job_id") != job_id:
+                continue
+            summary.pop("top_functions", None)
+            summaries.append(summary)
+        return sorted(summaries, key=lambda summary: summary["created_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Full summary of one profile, or None if it does not exist"""
+        path = self.path(profile_id, ".json")
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 60) -> Optional[str]:
+        """Human-readable pstats listing of a stored profile"""
+        path = self.path(profile_id, ".prof")
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(str(path), stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def path(self, profile_id: str, suffix: str = ".prof") -> Optional[Path]:
+        """Location of a stored profile file; profile IDs are hex so they cannot escape the directory"""
+        if not profile_id.isalnum():
+            return None
+        path = self.profile_dir / f"{profile_id}{suffix}"
+        return path if path.exists() else None
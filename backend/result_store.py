@@ -0,0 +1,143 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+
+from models import OCRResult
+import config
+
+logger = logging.getLogger(__name__)
+
+FOOTER = struct.Struct("<Q")  # Page count, the last 8 bytes of a result file
+
+
+class ResultStore:
+    """Completed job results, one compact file per job, read through mmap
+
+    A result file holds, for every page, the page's JSON without timings
+    followed by its timings JSON, then an index of uint64 offsets where
+    page i spans offsets[2i]:offsets[2i + 1] and its timings
+    offsets[2i + 1]:offsets[2i + 2], then the page count. Pages are
+    served as raw byte slices, so reads neither parse nor hold a job's
+    results in memory.
+    """
+
+    def __init__(self, results_dir: Path = config.RESULTS_DIR):
+        self.results_dir = Path(results_dir)
+        # Deleted while still mapped, which Windows refuses; retried as mappings close
+        self._pending_deletes: Set[Path] = set()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Remove result files of a previous run; their jobs only existed in memory"""
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.results_dir.glob("*.results*"):
+            path.unlink(missing_ok=True)
+
+    def path(self, job_id: str) -> Path:
+        return self.results_dir / f"{job_id}.results"
+
+    def write(self, job_id: str, results: List[OCRResult]) -> int:
+        """Spill a job's results to disk; returns the file size"""
+        path = self.path(job_id)
+        temp_path = path.with_suffix(".results.tmp")
+        offsets = [0]
+        with open(temp_path, "wb") as f:
+            for result in results:
+                f.write(result.model_dump_json(exclude={"timings"}).encode())
+                offsets.append(f.tell())
+                f.write(json.dumps(result.timings).encode())
+                offsets.append(f.tell())
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            f.write(FOOTER.pack(len(results)))
+            size = f.tell()
+        os.replace(temp_path, path)
+        return size
+
+    def delete(self, job_id: str):
+        """Remove a job's result file, or if a reader still maps it on Windows, once the last mapping closes"""
+        path = self.path(job_id)
+        with self._lock:
+            self._pending_deletes.add(path)
+        self._retry_deletes()
+
+    def _retry_deletes(self):
+        with self._lock:
+            paths = list(self._pending_deletes)
+        for path in paths:
+            try:
+                path.unlink(missing_ok=True)
+            except PermissionError:
+                logger.info(f"Result file {path.name} is still mapped, deleting it once it is closed")
+                continue
+            with self._lock:
+                self._pending_deletes.discard(path)
+
+    def load(self, job_id: str) -> "StoredResults":
+        """
+        Map a job's result file for reading; raises FileNotFoundError if it is gone
+
+        The mapping stays readable if the file is deleted afterwards, so a
+        response can be served to the end once its mapping is loaded. The
+        caller must close() it.
+        """
+        path = self.path(job_id)
+        with self._lock:
+            if path in self._pending_deletes:
+                raise FileNotFoundError(f"Results of job {job_id} were deleted")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return StoredResults(mapped, on_close=self._retry_deletes)
+
+    @contextmanager
+    def open(self, job_id: str) -> Iterator["StoredResults"]:
+        """Map a job's result file for the duration of a with block"""
+        stored = self.load(job_id)
+        try:
+            yield stored
+        finally:
+            stored.close()
+
+
+class StoredResults:
+    """Random access to the pages of one mapped result file"""
+
+    def __init__(self, mapped: mmap.mmap, on_close: Optional[Callable[[], None]] = None):
+        self.mapped = mapped
+        self.on_close = on_close
+        (self.page_count,) = FOOTER.unpack_from(mapped, len(mapped) - FOOTER.size)
+        index_start = len(mapped) - FOOTER.size - 8 * (2 * self.page_count + 1)
+        self.offsets = struct.unpack_from(f"<{2 * self.page_count + 1}Q", mapped, index_start)
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def close(self):
+        self.mapped.close()
+        if self.on_close is not None:
+            self.on_close()
+
+    def page_span(self, index: int) -> Tuple[int, int]:
+        return self.offsets[2 * index], self.offsets[2 * index + 1]
+
+    def page_json(self, index: int, timings: bool = False) -> bytes:
+        """Raw JSON of one page, with its "timings" field when requested"""
+        start, end = self.page_span(index)
+        page = self.mapped[start:end]
+        if not timings:
+            return page
+        return page[:-1] + b',"timings":' + self.mapped[end:self.offsets[2 * index + 2]] + b"}"
+
+    def iter_json(self, start: int = 0, stop: Optional[int] = None, timings: bool = False) -> Iterator[bytes]:
+        for index in range(start, min(stop if stop is not None else self.page_count, self.page_count)):
+            yield self.page_json(index, timings)
+
+    def iter_results(self) -> Iterator[OCRResult]:
+        """Parse pages one at a time, e.g. for exports"""
+        for index in range(self.page_count):
+            yield OCRResult.model_validate_json(self.page_json(index, timings=True))
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Optional, Set, Tuple
+
+from job_queue import AdmissionError
+from metrics import REAPED_FILES_TOTAL, REAPED_BYTES_TOTAL
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(AdmissionError):
+    """Accepting the upload would take UPLOAD_DIR over its disk quota"""
+
+    status_code = 503
+
+
+def directory_usage(path: Path) -> Tuple[int, int]:
+    """Number of files and their total size in bytes, directly inside a directory
+
+    Hard links to the same file (e.g. uploads shared by deduplicated jobs)
+    take the disk space once and are counted once.
+    """
+    files = 0
+    size = 0
+    seen = set()
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.inode() not in seen:
+                        seen.add(entry.inode())
+                        files += 1
+                        size += entry.stat(follow_symlinks=False).st_size
+                except FileNotFoundError:
+                    # Removed while scanning
+                    continue
+    except FileNotFoundError:
+        pass
+    return files, size
+
+
+class UploadStorage:
+    """Disk quota and orphan reaper for the upload directory
+
+    Uploads normally delete their files when their job finishes, but a
+    crashed worker or a killed process leaves files behind. The reaper
+    removes files older than max_age_seconds that no running job owns, and
+    admission reserves room for an upload's bytes before it is written so
+    concurrent uploads cannot overshoot the quota together.
+
+    Admission does not scan the directory for every upload: it adds the
+    bytes admitted since the last scan to that scan's total, and rescans
+    once the scan is rescan_seconds old. Between scans, files removed since
+    are still counted, so the quota errs on the full side.
+    """
+
+    def __init__(
+        self,
+        upload_dir: Path = config.UPLOAD_DIR,
+        quota_bytes: int = config.UPLOAD_DIR_QUOTA_BYTES,
+        max_age_seconds: float = config.UPLOAD_MAX_AGE_SECONDS,
+        rescan_seconds: float = config.UPLOAD_QUOTA_RESCAN_SECONDS
+    ):
+        self.upload_dir = Path(upload_dir)
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.rescan_seconds = rescan_seconds
+        # Bytes admitted but still being written
+        self._incoming = 0
+        # Bytes on disk at the last scan, and bytes written by uploads admitted since
+        self._scanned_bytes = 0
+        self._scanned_at: Optional[float] = None
+        self._written_since_scan = 0
+
+    @property
+    def bytes_on_disk(self) -> int:
+        return directory_usage(self.upload_dir)[1]
+
+    @property
+    def files_on_disk(self) -> int:
+        return directory_usage(self.upload_dir)[0]
+
+    def _used_bytes(self) -> int:
+        """Bytes on disk as far as the quota is concerned, rescanning the directory only when the last scan is stale"""
+        now = time.monotonic()
+        if self._scanned_at is None or now - self._scanned_at >= self.rescan_seconds:
+            self._scanned_bytes = self.bytes_on_disk
+            self._scanned_at = now
+            self._written_since_scan = 0
+        return self._scanned_bytes + self._written_since_scan
+
+    def reserve(self, size: int, retry_after: float):
+        """Reserve room for an upload, raising QuotaExceededError if it does not fit
+
+        Must be paired with release() once the upload is on disk or abandoned.
+        """
+        if self.quota_bytes:
+            used = self._used_bytes() + self._incoming
+            if used + size > self.quota_bytes:
+                raise QuotaExceededError(
+                    f"Upload storage is full ({used // (1024*1024)}MB of {self.quota_bytes // (1024*1024)}MB in use)",
+                    retry_after=retry_after
+                )
+        self._incoming += size
+
+    def release(self, size: int):
+        self._incoming -= size
+        # Assume the upload is on disk now; the next scan corrects this if it was abandoned
+        self._written_since_scan += size
+
+    def reap(self, in_use: Set[str], max_age_seconds: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Delete stale files that no running job owns
+
+        Args:
+            in_use: Paths of files that belong to queued or running jobs
+            max_age_seconds: Minimum age of deleted files, defaults to the configured one
+
+        Returns:
+            Number of files deleted and bytes freed
+        """
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        in_use = {os.path.abspath(path) for path in in_use}
+        files = 0
+        freed = 0
+
+        try:
+            entries = list(os.scandir(self.upload_dir))
+        except FileNotFoundError:
+            return 0, 0
+
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False) or os.path.abspath(entry.path) in in_use:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    continue
+                os.unlink(entry.path)
+                files += 1
+                freed += stat.st_size
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Could not reap {entry.path}: {str(e)}")
+
+        if files:
+            # Make the next admission see the freed space
+            self._scanned_at = None
+            REAPED_FILES_TOTAL.inc(files)
+            REAPED_BYTES_TOTAL.inc(freed)
+            logger.info(f"Reaped {files} orphaned uploads ({freed} bytes) from {self.upload_dir}")
+        return files, freed
+
+    async def run_reaper(
+        self,
+        in_use: Callable[[], Set[str]],
+        interval: float = config.REAPER_INTERVAL_SECONDS,
+        on_pass: Optional[Callable[[], None]] = None
+    ):
+        """Reap stale uploads every interval seconds, until cancelled
+
+        on_pass, if given, runs on the event loop at the start of every pass.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if on_pass is not None:
+                    on_pass()
+                await asyncio.to_thread(self.reap, in_use())
+            except Exception as e:
+                logger.error(f"Upload reaper failed: {str(e)}", exc_info=True)
@@ -0,0 +1,158 @@
+import cv2
+import numpy as np
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ruling lines are at least 1/LINE_SCALE of the page width (or height) long
+LINE_SCALE = 30
+# Fraction of a table's width (height) a row (column) separator must cover
+SEPARATOR_COVERAGE = 0.5
+# Fraction of a cell border that must be ruled for the border to separate cells
+BORDER_COVERAGE = 0.5
+# Smallest table and cell, in pixels
+MIN_TABLE_SIZE = 40
+MIN_CELL_SIZE = 16
+# Crossings of horizontal and vertical lines in the smallest grid: a box split in two
+MIN_JUNCTIONS = 6
+# Dark pixels a cell needs before it is worth a Tesseract call
+MIN_CELL_INK = 10
+
+
+class TableGrid:
+    """Ruled table found on a page: its separator positions and cells
+
+    Cells are (row, column, column_span, x, y, width, height) in page
+    coordinates, inset past the ruling lines. Neighbouring cells in a row
+    whose shared border is not ruled are merged into one spanning cell.
+    """
+
+    def __init__(self, bbox: Tuple[int, int, int, int], row_edges: List[int], column_edges: List[int]):
+        self.bbox = bbox
+        self.row_edges = row_edges
+        self.column_edges = column_edges
+        self.cells: List[Tuple[int, int, int, int, int, int, int]] = []
+
+    @property
+    def rows(self) -> int:
+        return len(self.row_edges) - 1
+
+    @property
+    def columns(self) -> int:
+        return len(self.column_edges) - 1
+
+
+def _line_masks(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Horizontal and vertical ruling lines of a binarized page (text black on white)"""
+    inverted = cv2.bitwise_not(binary)
+    height, width = binary.shape[:2]
+
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(MIN_CELL_SIZE, width // LINE_SCALE), 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(MIN_CELL_SIZE, height // LINE_SCALE)))
+    horizontal = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, horizontal_kernel)
+    vertical = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, vertical_kernel)
+
+    # Close small breaks left by thresholding so intersections connect
+    joint = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    return cv2.dilate(horizontal, joint), cv2.dilate(vertical, joint)
+
+
+def _separators(profile: np.ndarray, length: int) -> List[int]:
+    """Centres of the runs of a line-mask projection that cover enough of the table"""
+    covered = np.flatnonzero(profile >= SEPARATOR_COVERAGE * length * 255)
+    if not len(covered):
+        return []
+    run_breaks = np.flatnonzero(np.diff(covered) > 1)
+    starts = np.append(covered[0], covered[run_breaks + 1])
+    ends = np.append(covered[run_breaks], covered[-1])
+    return ((starts + ends) // 2).tolist()
+
+
+def _with_borders(edges: List[int], size: int) -> List[int]:
+    """Add the table's outer edges where it has no ruling line, and drop separators too close together"""
+    if not edges or edges[0] > MIN_CELL_SIZE:
+        edges = [0] + edges
+    if edges[-1] < size - 1 - MIN_CELL_SIZE:
+        edges = edges + [size - 1]
+    kept = [edges[0]]
+    for edge in edges[1:]:
+        if edge - kept[-1] >= MIN_CELL_SIZE:
+            kept.append(edge)
+    return kept
+
+
+def find_tables(binary: np.ndarray) -> Tuple[List[TableGrid], np.ndarray]:
+    """
+    Find ruled tables and form grids on a binarized page
+
+    Args:
+        binary: Output of ImagePreprocessor._binarize_image (or the fast
+            pipeline's threshold), text and lines black on white
+
+    Returns:
+        Tables in reading order (top to bottom, left to right), each with at
+        least two cells, and the page with its ruling lines erased for
+        cropping the cells from
+    """
+    horizontal, vertical = _line_masks(binary)
+    contours, _ = cv2.findContours(cv2.bitwise_or(horizontal, vertical), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    tables = []
+    for contour in contours:
+        x, y, width, height = cv2.boundingRect(contour)
+        if width < MIN_TABLE_SIZE or height < MIN_TABLE_SIZE:
+            continue
+
+        region_horizontal = horizontal[y:y + height, x:x + width]
+        region_vertical = vertical[y:y + height, x:x + width]
+        # Strokes of large glyphs pass the line filters too, but rarely cross each other this often
+        junctions = cv2.connectedComponents(cv2.bitwise_and(region_horizontal, region_vertical))[0] - 1
+        if junctions < MIN_JUNCTIONS:
+            continue
+        row_edges = _with_borders(_separators(region_horizontal.sum(axis=1, dtype=np.int64), width), height)
+        column_edges = _with_borders(_separators(region_vertical.sum(axis=0, dtype=np.int64), height), width)
+        if (len(row_edges) - 1) * (len(column_edges) - 1) < 2:
+            # A box or an underline, not a grid
+            continue
+
+        table = TableGrid((x, y, width, height), [y + edge for edge in row_edges], [x + edge for edge in column_edges])
+        _add_cells(table, vertical)
+        if table.cells:
+            tables.append(table)
+
+    tables.sort(key=lambda table: (table.bbox[1], table.bbox[0]))
+    logger.debug(f"Found {len(tables)} tables")
+
+    if not tables:
+        return tables, binary
+    lineless = binary.copy()
+    lineless[(horizontal > 0) | (vertical > 0)] = 255
+    return tables, lineless
+
+
+def _add_cells(table: TableGrid, vertical: np.ndarray):
+    """Split the table's rows into cells, merging across unruled column borders"""
+    inset = 3
+    for row, (top, bottom) in enumerate(zip(table.row_edges[:-1], table.row_edges[1:])):
+        column = 0
+        while column < table.columns:
+            span = 1
+            # Extend the cell while the border to its right is missing in this row
+            while column + span < table.columns:
+                border = table.column_edges[column + span]
+                segment = vertical[top + inset:bottom - inset, max(0, border - inset):border + inset + 1]
+                if segment.size and (segment.max(axis=1) > 0).mean() >= BORDER_COVERAGE:
+                    break
+                span += 1
+
+            left, right = table.column_edges[column], table.column_edges[column + span]
+            cell_width, cell_height = right - left - 2 * inset, bottom - top - 2 * inset
+            if cell_width >= MIN_CELL_SIZE and cell_height >= MIN_CELL_SIZE:
+                table.cells.append((row, column, span, left + inset, top + inset, cell_width, cell_height))
+            column += span
+
+
+def cell_has_ink(cell: np.ndarray) -> bool:
+    """Whether a binarized cell holds anything to read"""
+    return int(np.count_nonzero(cell < 128)) >= MIN_CELL_INK
@@ -0,0 +1,156 @@
+import numpy as np
+import logging
+from typing import List
+
+from models import BoundingBox, PageLayout
+
+logger = logging.getLogger(__name__)
+
+# Column order of Tesseract's TSV output (image_to_data)
+TSV_COLUMNS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text'
+)
+NUMERIC_COLUMNS = TSV_COLUMNS[:-1]
+
+
+class TesseractData:
+    """Columnar view of Tesseract's TSV output backed by NumPy arrays"""
+
+    def __init__(self, numeric: np.ndarray, texts: np.ndarray):
+        self.numeric = numeric
+        self.texts = texts
+        self.text_lengths = np.fromiter(
+            (len(text) for text in texts), dtype=np.int64, count=len(texts)
+        )
+
+        self.left = numeric[:, 6].astype(np.int64)
+        self.top = numeric[:, 7].astype(np.int64)
+        self.width = numeric[:, 8].astype(np.int64)
+        self.height = numeric[:, 9].astype(np.int64)
+        self.conf = numeric[:, 10]
+
+        # Only words with a positive confidence and non-empty text count as detections
+        self.valid = (self.conf > 0) & (self.text_lengths > 0)
+
+    @classmethod
+    def from_tsv(cls, tsv: str) -> "TesseractData":
+        """Parse the TSV string returned by pytesseract.image_to_data"""
+        rows = tsv.splitlines()
+        if rows and rows[0].startswith('level'):
+            rows = rows[1:]
+
+        numeric_rows = []
+        texts = []
+        for row in rows:
+            fields = row.split('\t')
+            if len(fields) < len(NUMERIC_COLUMNS):
+                continue
+            numeric_rows.append(fields[:len(NUMERIC_COLUMNS)])
+            texts.append('\t'.join(fields[len(NUMERIC_COLUMNS):]).strip())
+
+        if numeric_rows:
+            numeric = np.array(numeric_rows, dtype=np.float64)
+        else:
+            numeric = np.empty((0, len(NUMERIC_COLUMNS)), dtype=np.float64)
+
+        return cls(numeric, np.array(texts, dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a numeric TSV column as an integer array"""
+        return self.numeric[:, NUMERIC_COLUMNS.index(name)].astype(np.int64)
+
+    def extract_boxes(self) -> List[BoundingBox]:
+        """Build bounding boxes for all valid detections"""
+        indices = np.flatnonzero(self.valid)
+        boxes = np.stack(
+            [self.left[indices], self.top[indices], self.width[indices], self.height[indices]],
+            axis=1
+        ).tolist()
+        confidences = (self.conf[indices] / 100.0).tolist()  # Convert to 0-1 scale
+        texts = self.texts[indices].tolist()
+
+        return [
+            BoundingBox(text=text, confidence=confidence, bbox=bbox)
+            for text, confidence, bbox in zip(texts, confidences, boxes)
+        ]
+
+    def layout(self) -> PageLayout:
+        """Block, paragraph and line structure of the valid detections, indexing extract_boxes()"""
+        indices = np.flatnonzero(self.valid)
+        keys = {name: self.column(name)[indices] for name in ('page_num', 'block_num', 'par_num', 'line_num')}
+        if not len(indices):
+            return PageLayout(line_offsets=[0], paragraph_offsets=[0], block_offsets=[0], line_bboxes=[], block_bboxes=[], line_texts=[])
+
+        # Rows come in reading order, so a group starts wherever its key changes
+        def starts(*names: str) -> np.ndarray:
+            changed = np.zeros(len(indices), dtype=bool)
+            changed[0] = True
+            for name in names:
+                changed[1:] |= keys[name][1:] != keys[name][:-1]
+            return np.flatnonzero(changed)
+
+        line_starts = starts('page_num', 'block_num', 'par_num', 'line_num')
+        paragraph_starts = starts('page_num', 'block_num', 'par_num')
+        block_starts = starts('page_num', 'block_num')
+
+        left = self.left[indices]
+        top = self.top[indices]
+        right = left + self.width[indices]
+        bottom = top + self.height[indices]
+
+        def group_bboxes(group_starts: np.ndarray) -> list:
+            x = np.minimum.reduceat(left, group_starts)
+            y = np.minimum.reduceat(top, group_starts)
+            return np.stack(
+                [x, y, np.maximum.reduceat(right, group_starts) - x, np.maximum.reduceat(bottom, group_starts) - y],
+                axis=1
+            ).tolist()
+
+        texts = self.texts[indices]
+        line_offsets = np.append(line_starts, len(indices))
+        return PageLayout(
+            line_offsets=line_offsets.tolist(),
+            paragraph_offsets=np.append(np.searchsorted(line_starts, paragraph_starts), len(line_starts)).tolist(),
+            block_offsets=np.append(np.searchsorted(paragraph_starts, block_starts), len(paragraph_starts)).tolist(),
+            line_bboxes=group_bboxes(line_starts),
+            block_bboxes=group_bboxes(block_starts),
+            line_texts=[' '.join(texts[start:end]) for start, end in zip(line_offsets[:-1], line_offsets[1:])]
+        )
+
+    def overall_confidence(self) -> float:
+        """Text-length weighted confidence of all valid detections (0-1 scale)"""
+        if not self.valid.any():
+            return 0.0
+
+        weights = np.maximum(self.text_lengths[self.valid], 1)
+        confidence = np.average(self.conf[self.valid], weights=weights)
+        return min(1.0, float(confidence) / 100.0)
+
+    def line_confidences(self) -> List[float]:
+        """Weighted confidence per text line, in reading order"""
+        return self._grouped_confidence(['page_num', 'block_num', 'par_num', 'line_num'])
+
+    def block_confidences(self) -> List[float]:
+        """Weighted confidence per text block, in reading order"""
+        return self._grouped_confidence(['page_num', 'block_num'])
+
+    def _grouped_confidence(self, key_columns: List[str]) -> List[float]:
+        """Aggregate the length-weighted confidence over groups of valid words"""
+        if not self.valid.any():
+            return []
+
+        keys = np.stack([self.column(name)[self.valid] for name in key_columns], axis=1)
+        # Tesseract emits rows in reading order, so sorted keys keep that order
+        _, group_ids = np.unique(keys, axis=0, return_inverse=True)
+        group_ids = group_ids.reshape(-1)
+
+        weights = np.maximum(self.text_lengths[self.valid], 1).astype(np.float64)
+        weighted_sum = np.bincount(group_ids, weights=self.conf[self.valid] * weights)
+        total_weight = np.bincount(group_ids, weights=weights)
+
+        confidences = np.minimum(weighted_sum / total_weight / 100.0, 1.0)
+        return confidences.round(4).tolist()
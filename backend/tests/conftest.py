@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# The backend modules import each other as top-level modules (import config, from models import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep the service's relative data directories out of the working tree; set before config is imported
+_data_dir = Path(tempfile.mkdtemp(prefix="ocr-tests-"))
+for _name, _subdir in (("UPLOAD_DIR", "uploads"), ("RESULTS_DIR", "results"), ("PROFILE_DIR", "profiles"), ("WEBHOOK_OUTBOX_DIR", "outbox")):
+    os.environ.setdefault(_name, str(_data_dir / _subdir))
+
+
+class StubProcessor:
+    """Stands in for OCRProcessor: every file has `pages` pages of fixed text, each taking `seconds`
+
+    Checks for cancellation before each page like the real processor, and
+    records the pages it OCRed in `calls`.
+    """
+
+    capabilities = None
+
+    def __init__(self, seconds: float = 0.0, pages: int = 1):
+        self.seconds = seconds
+        self.pages = pages
+        self.calls = []
+        self.started = threading.Event()
+        self.error = None
+
+    def process_file(self, file_path, filename, cancel_event=None, document_class=None, parallel=True):
+        from cancellation import check_cancelled
+        from models import OCRResult
+
+        results = []
+        for page in range(1, self.pages + 1):
+            check_cancelled(cancel_event, filename)
+            self.calls.append((filename, page))
+            self.started.set()
+            time.sleep(self.seconds)
+            if self.error is not None:
+                raise self.error
+            results.append(OCRResult(
+                filename=f"{filename} (Page {page})" if self.pages > 1 else filename,
+                text=f"page {page}",
+                confidence=1.0,
+                language="eng",
+                bbox_data=[],
+                page_number=page if self.pages > 1 else None
+            ))
+        return results
+
+    def process_image_bytes(self, image_bytes, filename, document_class=None):
+        from models import OCRResult
+
+        self.calls.append((filename, 1))
+        time.sleep(self.seconds)
+        return OCRResult(filename=filename, text="page 1", confidence=1.0, language="eng", bbox_data=[])
+
+    def get_tesseract_version(self):
+        return "stub"
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stub_processor():
+    return StubProcessor()
+
+
+@pytest.fixture
+def app_main(tmp_path, monkeypatch, stub_processor):
+    """The main module with the stub processor, and fresh queues, job storage and data directories"""
+    import main
+    from coalescing import InFlightRequests
+    from job_queue import JobQueue
+    from profiling import ProfileStore
+    from result_store import ResultStore
+    from storage import UploadStorage
+    from webhooks import WebhookOutbox
+    from worker_pool import OCRWorkerPool
+
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(main.config, "UPLOAD_DIR", upload_dir)
+
+    pool = OCRWorkerPool(2)
+
+    def start():
+        # Skip warm-up; the stub is ready immediately
+        pool._processor = stub_processor
+        pool._ready = asyncio.Event()
+        pool._ready.set()
+
+    monkeypatch.setattr(pool, "start", start)
+    fresh_state = {
+        "worker_pool": pool,
+        "job_queue": JobQueue(),
+        "dispatcher_tasks": [],
+        "deferred_sync_tasks": set(),
+        "sync_in_flight": 0,
+        "inflight_ocr": InFlightRequests(),
+        "result_store": ResultStore(tmp_path / "results"),
+        "upload_storage": UploadStorage(upload_dir),
+        "working_files": set(),
+        "webhook_outbox": WebhookOutbox(tmp_path / "outbox", main.webhook_outbox.results_expired),
+        "profile_store": ProfileStore(tmp_path / "profiles"),
+        "job_storage": {},
+    }
+    for name, value in fresh_state.items():
+        monkeypatch.setattr(main, name, value)
+    return main
+
+
+@pytest.fixture
+def client(app_main):
+    """TestClient of the app, started up with the stub processor"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_main.app) as test_client:
+        yield test_client
+
+
+def wait_until(predicate, timeout: float = 5.0, interval: float = 0.01):
+    """Poll until predicate() is true, failing the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("Timed out waiting for condition")
+        time.sleep(interval)
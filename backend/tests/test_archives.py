@@ -0,0 +1,65 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from conftest import wait_until
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+def build_zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in entries:
+            archive.writestr(name, content)
+    return "scans.zip", buffer.getvalue()
+
+
+def build_tar(entries):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return "scans.tar.gz", buffer.getvalue()
+
+
+def run_archive(client, name, content):
+    response = client.post("/api/ocr/upload", files={"files": (name, content, "application/octet-stream")})
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    wait_until(lambda: client.get(f"/api/ocr/result/{job_id}").json()["status"] != "processing")
+    return client.get(f"/api/ocr/result/{job_id}").json()
+
+
+@pytest.mark.parametrize("build", [build_zip, build_tar])
+def test_entry_paths_never_reach_the_filesystem(client, app_main, tmp_path, build):
+    result = run_archive(client, *build([("../evil.png", PNG), ("docs/a.png", PNG)]))
+
+    assert result["status"] == "completed"
+    assert [page["filename"] for page in result["results"]] == ["../evil.png", "docs/a.png"]
+    # Entries are copied out under generated names, never at their archive paths
+    assert not (app_main.config.UPLOAD_DIR.parent / "evil.png").exists()
+    assert not (app_main.config.UPLOAD_DIR / "docs").exists()
+
+
+def test_unsupported_entries_are_reported_not_processed(client, stub_processor):
+    result = run_archive(client, *build_zip([("notes.txt", b"text"), ("a.png", PNG), ("big.exe", b"MZ")]))
+
+    assert result["status"] == "completed"
+    assert [page["filename"] for page in result["results"]] == ["a.png"]
+    assert "notes.txt" in result["error_message"] and "big.exe" in result["error_message"]
+    assert [filename for filename, _ in stub_processor.calls] == ["a.png"]
+
+
+def test_entry_cap_counts_unsupported_entries(client, app_main, stub_processor, monkeypatch):
+    monkeypatch.setattr(app_main.config, "MAX_ARCHIVE_ENTRIES", 3)
+    entries = [("1.txt", b"x"), ("2.txt", b"x"), ("a.png", PNG), ("b.png", PNG), ("c.png", PNG)]
+    result = run_archive(client, *build_zip(entries))
+
+    assert [page["filename"] for page in result["results"]] == ["a.png"]
+    assert "more than 3 entries" in result["error_message"]
+    assert [filename for filename, _ in stub_processor.calls] == ["a.png"]
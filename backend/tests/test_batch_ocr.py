@@ -0,0 +1,72 @@
+import json
+import logging
+from argparse import Namespace
+from concurrent.futures import Future
+
+import batch_ocr
+from batch_ocr import load_checkpoint
+
+
+def record(source, status="completed"):
+    return json.dumps({"source": source, "status": status}) + "\n"
+
+
+def test_checkpoint_drops_a_torn_last_line(tmp_path):
+    output = tmp_path / "out.jsonl"
+    intact = record("a.png") + record("b.png", "failed") + "not json\n" + record("c.pdf")
+    output.write_text(intact + '{"source": "d.png", "stat')
+
+    assert load_checkpoint(str(output)) == {"a.png", "c.pdf"}
+    assert output.read_text() == intact
+
+
+def test_checkpoint_of_a_clean_or_missing_file(tmp_path):
+    output = tmp_path / "out.jsonl"
+    assert load_checkpoint(str(output)) == set()
+    output.write_text(record("a.png"))
+    assert load_checkpoint(str(output)) == {"a.png"}
+    assert output.read_text() == record("a.png")
+
+
+class InlineExecutor:
+    """Runs submitted work at once, so every pending future is done by the time it is waited on"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_run_resumes_and_reports_progress_past_skipped_multiples(tmp_path, monkeypatch, caplog):
+    source = tmp_path / "scans"
+    source.mkdir()
+    for index in range(10):
+        (source / f"{index}.png").write_bytes(b"\x89PNG")
+    (source / "notes.txt").write_text("not a document")
+    output = tmp_path / "out.jsonl"
+    output.write_text(record("0.png"))
+
+    monkeypatch.setattr(batch_ocr, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(batch_ocr, "process_entry", lambda name, path, content, document_class: {"source": name, "status": "completed"})
+    args = Namespace(
+        source=str(source), output=str(output), processes=2, tesseract_threads=1, document_class=None,
+        max_file_size=1024, progress_every=3, log_level="WARNING"
+    )
+
+    with caplog.at_level(logging.INFO, logger="batch_ocr"):
+        counts = batch_ocr.run(args)
+
+    assert (counts["completed"], counts["resumed"], counts["skipped"]) == (9, 1, 1)
+    assert load_checkpoint(str(output)) == {f"{index}.png" for index in range(10)}
+    # Documents finish four at a time here (two per process), so totals go 4, 8, 9 and skip 3 and 6
+    progress = [message for message in caplog.messages if "documents processed" in message]
+    assert [message.split()[0] for message in progress] == ["4", "8", "9"]
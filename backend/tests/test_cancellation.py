@@ -0,0 +1,139 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from cancellation import JobCancelledError, SharedCancellation
+from conftest import wait_until
+
+PNG = ("scan.png", b"\x89PNG\r\n\x1a\n", "image/png")
+
+
+@pytest.fixture
+def single_dispatcher(monkeypatch, app_main):
+    monkeypatch.setattr(app_main.config, "JOB_CONCURRENCY", 1)
+
+
+def upload(client, name="scan.png"):
+    response = client.post("/api/ocr/upload", files={"files": (name,) + PNG[1:]})
+    assert response.status_code == 200
+    return response.json()["job_id"]
+
+
+def status(client, job_id):
+    return client.get(f"/api/ocr/result/{job_id}").json()["status"]
+
+
+def test_deleting_a_queued_job_removes_it_from_the_queue(single_dispatcher, client, app_main, stub_processor):
+    stub_processor.seconds = 0.3
+    running = upload(client, "running.png")
+    wait_until(stub_processor.started.is_set)
+    queued = upload(client, "queued.png")
+    queued_files = app_main.job_storage[queued]["file_paths"]
+    assert app_main.job_queue.depth == 1
+
+    assert client.delete(f"/api/ocr/job/{queued}").status_code == 200
+    assert app_main.job_queue.depth == 0
+    assert not any(os.path.exists(path) for path in queued_files)
+
+    wait_until(lambda: status(client, running) == "completed")
+    assert [filename for filename, _ in stub_processor.calls] == ["running.png"]
+    assert client.get(f"/api/ocr/result/{queued}").status_code == 404
+
+
+def test_deleting_a_running_job_stops_at_the_next_page(client, app_main, stub_processor):
+    stub_processor.seconds = 0.2
+    stub_processor.pages = 10
+    job_id = upload(client)
+    wait_until(stub_processor.started.is_set)
+
+    assert client.delete(f"/api/ocr/job/{job_id}").status_code == 200
+    wait_until(lambda: app_main.job_queue.running == 0)
+    pages_done = len(stub_processor.calls)
+    assert pages_done < 10
+    assert app_main.job_queue.depth == 0
+
+
+def test_deleting_removes_uploads_and_results(client, app_main, stub_processor):
+    job_id = upload(client)
+    wait_until(lambda: status(client, job_id) == "completed")
+    assert app_main.result_store.path(job_id).exists()
+
+    assert client.delete(f"/api/ocr/job/{job_id}").status_code == 200
+    assert not app_main.result_store.path(job_id).exists()
+    assert list(app_main.config.UPLOAD_DIR.iterdir()) == []
+    assert client.delete(f"/api/ocr/job/{job_id}").status_code == 404
+
+
+def test_deleting_a_running_job_removes_its_upload(client, app_main, stub_processor):
+    stub_processor.seconds = 0.3
+    job_id = upload(client)
+    wait_until(stub_processor.started.is_set)
+    file_paths = app_main.job_storage[job_id]["file_paths"]
+
+    assert client.delete(f"/api/ocr/job/{job_id}").status_code == 200
+    wait_until(lambda: app_main.job_queue.running == 0)
+    assert not app_main.result_store.path(job_id).exists()
+    assert not any(os.path.exists(path) for path in file_paths)
+
+
+@pytest.fixture
+def page_processor(monkeypatch):
+    """OCRProcessor whose page OCR is replaced by a recorder, without probing Tesseract"""
+    pytest.importorskip("cv2")
+    from ocr_processor import OCRProcessor
+
+    processor = OCRProcessor.__new__(OCRProcessor)
+    processor._inline = threading.local()
+    processor.preprocessor = SimpleNamespace(profile=None)
+    processor.pages_done = []
+    processor.cancel_after = None
+    processor.cancel_event = threading.Event()
+
+    def ocr_page(timer, image, page_name, page_number, profile):
+        processor.pages_done.append(page_number)
+        if page_number == processor.cancel_after:
+            processor.cancel_event.set()
+        return SimpleNamespace(text="", confidence=1.0, page_number=page_number)
+
+    monkeypatch.setattr(processor, "_ocr_timed_page", ocr_page)
+    return processor
+
+
+def pages(count, pulled):
+    for page in range(count):
+        pulled.append(page)
+        yield object()
+
+
+@pytest.mark.parametrize("page_workers", [1, 2])
+def test_page_loop_stops_at_the_next_page_boundary(page_processor, monkeypatch, page_workers):
+    import config
+    monkeypatch.setattr(config, "PAGE_WORKERS", page_workers)
+    page_processor.cancel_after = 2
+    pulled = []
+
+    with pytest.raises(JobCancelledError):
+        page_processor._process_pages(pages(10, pulled), "doc.pdf", page_processor.cancel_event, None)
+    # At most the pages already handed to a page worker finish; no further page is decoded
+    assert len(page_processor.pages_done) <= 2 + page_workers - 1
+    assert len(pulled) <= 2 + page_workers - 1
+
+
+def test_page_loop_runs_to_the_end_without_cancellation(page_processor, monkeypatch):
+    import config
+    monkeypatch.setattr(config, "PAGE_WORKERS", 2)
+    results = page_processor._process_pages(pages(5, []), "doc.pdf", page_processor.cancel_event, None)
+    assert [result.page_number for result in results] == [1, 2, 3, 4, 5]
+
+
+def test_shared_cancellation_needs_every_job():
+    first, second = threading.Event(), threading.Event()
+    shared = SharedCancellation()
+    shared.add(first)
+    shared.add(second)
+    first.set()
+    assert not shared.is_set()
+    second.set()
+    assert shared.is_set()
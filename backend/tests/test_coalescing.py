@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+import pytest
+
+import coalescing
+from cancellation import JobCancelledError
+from coalescing import InFlightRequests
+from conftest import wait_until
+
+
+@pytest.fixture(autouse=True)
+def fast_cancel_poll(monkeypatch):
+    monkeypatch.setattr(coalescing, "CANCEL_POLL_SECONDS", 0.01)
+
+
+class Computation:
+    """Shared work that runs until it is released or its shared cancellation is set"""
+
+    def __init__(self, error=None):
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def __call__(self, cancellation):
+        self.runs += 1
+        while not self.release.is_set():
+            if cancellation.is_set():
+                self.cancelled = True
+                raise JobCancelledError("shared work cancelled")
+            await asyncio.sleep(0.005)
+        if self.error is not None:
+            raise self.error
+        return "text"
+
+
+async def settle():
+    """Let the requests started so far join the flight"""
+    await asyncio.sleep(0.03)
+
+
+def test_concurrent_identical_requests_compute_once():
+    async def scenario():
+        requests, computation = InFlightRequests(), Computation()
+        waiters = [asyncio.create_task(requests.run("digest", threading.Event(), computation)) for _ in range(3)]
+        await settle()
+        assert requests.in_flight == 1
+        computation.release.set()
+        return await asyncio.gather(*waiters), computation.runs, requests.in_flight
+
+    results, runs, in_flight = asyncio.run(scenario())
+    assert results == [("text", False), ("text", True), ("text", True)]
+    assert (runs, in_flight) == (1, 0)
+
+
+def test_different_keys_are_not_shared():
+    async def scenario():
+        requests, computation = InFlightRequests(), Computation()
+        computation.release.set()
+        return await asyncio.gather(
+            requests.run("a", threading.Event(), computation), requests.run("b", threading.Event(), computation)
+        ), computation.runs
+
+    results, runs = asyncio.run(scenario())
+    assert results == [("text", False), ("text", False)]
+    assert runs == 2
+
+
+def test_one_waiter_cancelling_leaves_the_shared_work_running():
+    async def scenario():
+        requests, computation = InFlightRequests(), Computation()
+        leaving, staying = threading.Event(), threading.Event()
+        first = asyncio.create_task(requests.run("digest", leaving, computation))
+        second = asyncio.create_task(requests.run("digest", staying, computation))
+        await settle()
+
+        leaving.set()
+        with pytest.raises(JobCancelledError):
+            await first
+        assert not computation.cancelled
+
+        computation.release.set()
+        return await second, computation
+
+    result, computation = asyncio.run(scenario())
+    assert result == ("text", True)
+    assert (computation.runs, computation.cancelled) == (1, False)
+
+
+def test_shared_work_stops_once_every_waiter_cancelled():
+    async def scenario():
+        requests, computation = InFlightRequests(), Computation()
+        events = [threading.Event(), threading.Event()]
+        waiters = [asyncio.create_task(requests.run("digest", event, computation)) for event in events]
+        await settle()
+        for event in events:
+            event.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        await settle()
+        return outcomes, computation, requests.in_flight
+
+    outcomes, computation, in_flight = asyncio.run(scenario())
+    assert all(isinstance(outcome, JobCancelledError) for outcome in outcomes)
+    assert computation.cancelled
+    assert in_flight == 0
+
+
+def test_failure_reaches_every_waiter():
+    async def scenario():
+        requests, computation = InFlightRequests(), Computation(error=ValueError("corrupt page"))
+        waiters = [asyncio.create_task(requests.run("digest", threading.Event(), computation)) for _ in range(3)]
+        await settle()
+        computation.release.set()
+        return await asyncio.gather(*waiters, return_exceptions=True), computation.runs, requests.in_flight
+
+    outcomes, runs, in_flight = asyncio.run(scenario())
+    assert [str(outcome) for outcome in outcomes] == ["corrupt page"] * 3
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert (runs, in_flight) == (1, 0)
+
+
+@pytest.fixture
+def two_dispatchers(monkeypatch, app_main):
+    monkeypatch.setattr(app_main.config, "JOB_CONCURRENCY", 2)
+
+
+def test_identical_uploads_of_concurrent_jobs_are_ocred_once(two_dispatchers, client, app_main, stub_processor):
+    stub_processor.seconds = 0.3
+    content = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+    job_ids = []
+    for name in ("first.png", "second.png"):
+        response = client.post("/api/ocr/upload", files={"files": (name, content, "image/png")})
+        job_ids.append(response.json()["job_id"])
+
+    for job_id in job_ids:
+        wait_until(lambda: client.get(f"/api/ocr/result/{job_id}").json()["status"] == "completed")
+    assert len(stub_processor.calls) == 1
+    filenames = [client.get(f"/api/ocr/result/{job_id}").json()["results"][0]["filename"] for job_id in job_ids]
+    assert filenames == ["first.png", "second.png"]
@@ -0,0 +1,93 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import concurrency
+import config
+from concurrency import benchmark_plan, candidate_mixes, static_plan, tesseract_processes
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    def set_cpus(count):
+        monkeypatch.setattr(concurrency, "cpu_count", lambda: count)
+    monkeypatch.setattr(config, "TESSERACT_THREADS", 0)
+    # apply_thread_limit writes OMP_THREAD_LIMIT; restore it afterwards
+    monkeypatch.setenv("OMP_THREAD_LIMIT", os.environ.get("OMP_THREAD_LIMIT", "1"))
+    return set_cpus
+
+
+def test_tesseract_processes():
+    assert tesseract_processes(3, page_workers=2) == 6
+    assert tesseract_processes(3, page_workers=0) == 3
+    assert tesseract_processes(2, page_workers=2, table_cell_workers=4) == 8
+
+
+def test_static_plan_shares_cpus_between_processes(cpus):
+    cpus(8)
+    plan = static_plan(workers=2, page_workers=2, table_cell_workers=0)
+    assert (plan.mode, plan.workers, plan.tesseract_threads, plan.cpu_count) == ("static", 2, 2, 8)
+
+
+def test_static_plan_never_goes_below_one_thread(cpus):
+    cpus(2)
+    assert static_plan(workers=4, page_workers=2, table_cell_workers=0).tesseract_threads == 1
+
+
+def test_static_plan_honors_configured_threads(cpus, monkeypatch):
+    cpus(8)
+    monkeypatch.setattr(config, "TESSERACT_THREADS", 3)
+    assert static_plan(workers=2, page_workers=2, table_cell_workers=0).tesseract_threads == 3
+
+
+def test_static_plan_counts_table_cell_workers_from_configuration(cpus, monkeypatch):
+    cpus(8)
+    monkeypatch.setattr(config, "TABLE_DETECTION", True)
+    monkeypatch.setattr(config, "TABLE_CELL_WORKERS", 4)
+    plan = static_plan(workers=1, page_workers=2)
+    assert plan.table_cell_workers == 4
+    assert plan.tesseract_threads == 1
+
+
+@pytest.mark.parametrize("cpu_total, page_workers, table_cell_workers, expected", [
+    (8, 1, 0, [(1, 8), (2, 4), (4, 2), (8, 1)]),
+    (8, 2, 0, [(1, 4), (2, 2), (4, 1)]),
+    (6, 2, 2, [(1, 1), (2, 1)]),
+    (1, 2, 0, [(1, 1)]),
+])
+def test_candidate_mixes(cpu_total, page_workers, table_cell_workers, expected):
+    trials = candidate_mixes(cpu_total, page_workers, table_cell_workers)
+    assert [(trial.workers, trial.tesseract_threads) for trial in trials] == expected
+
+
+def fake_processor(fast_threads):
+    """Processor whose OCR is quick only when Tesseract gets fast_threads threads"""
+    def run_ocr(page, name):
+        time.sleep(0.001 if os.environ["OMP_THREAD_LIMIT"] == str(fast_threads) else 0.02)
+
+    return SimpleNamespace(
+        table_cell_workers=0,
+        preprocessor=SimpleNamespace(preprocess_image_array=lambda image: image),
+        _run_ocr=run_ocr
+    )
+
+
+def test_benchmark_plan_picks_the_fastest_mix(cpus, monkeypatch):
+    pytest.importorskip("cv2")
+    cpus(4)
+    monkeypatch.setattr(config, "PAGE_WORKERS", 1)
+    plan = benchmark_plan(fake_processor(fast_threads=2), pages_per_worker=2)
+    assert [trial.workers for trial in plan.trials] == [1, 2, 4]
+    assert all(trial.pages_per_sec for trial in plan.trials)
+    assert (plan.mode, plan.workers, plan.tesseract_threads) == ("auto", 2, 2)
+
+
+def test_benchmark_plan_skips_trials_with_one_candidate(cpus, monkeypatch):
+    cpus(1)
+    monkeypatch.setattr(config, "PAGE_WORKERS", 1)
+    processor = fake_processor(fast_threads=1)
+    processor._run_ocr = None
+    plan = benchmark_plan(processor)
+    assert (plan.mode, plan.workers, plan.tesseract_threads, plan.trials) == ("auto", 1, 1, None)
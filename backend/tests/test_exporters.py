@@ -0,0 +1,64 @@
+import json
+import re
+import zlib
+
+from exporters import export_jsonl, export_pdf
+from models import BoundingBox, OCRResult
+
+
+def page(number, words):
+    return OCRResult(
+        filename="scan.png",
+        text=" ".join(words),
+        confidence=0.9,
+        language="eng",
+        bbox_data=[BoundingBox(text=word, confidence=0.9, bbox=[10 + 60 * index, 20, 50, 20]) for index, word in enumerate(words)],
+        page_number=number,
+        page_width=600,
+        page_height=800
+    )
+
+
+def render(results, dpi=300):
+    return b"".join(export_pdf(results, dpi=dpi))
+
+
+def test_xref_offsets_point_at_their_objects():
+    pdf = render([page(1, ["Hello", "(world)"]), page(2, ["Café"]), page(3, [])])
+
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref\n")
+
+    xref = pdf[startxref:].split(b"trailer")[0].splitlines()
+    first, count = map(int, xref[1].split())
+    entries = xref[2:]
+    assert first == 0 and len(entries) == count
+    assert entries[0] == b"0000000000 65535 f "
+    for number, entry in enumerate(entries[1:], start=1):
+        offset = int(entry.split()[0])
+        assert pdf[offset:].startswith(f"{number} 0 obj\n".encode())
+    assert f"/Size {count}".encode() in pdf
+
+
+def test_pages_and_text_layer():
+    pdf = render([page(1, ["Hello"]), page(2, ["Bye"])], dpi=72)
+    assert b"/Count 2" in pdf
+    # At 72 DPI one pixel is one point
+    assert pdf.count(b"/MediaBox [0 0 600.00 800.00]") == 2
+
+    streams = [zlib.decompress(match) for match in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)]
+    assert any(b"(Hello) Tj" in stream for stream in streams)
+    assert all(b"3 Tr" in stream for stream in streams)
+
+
+def test_empty_export_is_a_valid_document():
+    pdf = render([])
+    assert pdf.startswith(b"%PDF-1.4")
+    assert b"/Count 0" in pdf
+    assert pdf.endswith(b"%%EOF\n")
+
+
+def test_jsonl_has_one_object_per_page():
+    lines = b"".join(export_jsonl([page(1, ["Hello", "world"]), page(2, ["Bye"])])).decode().splitlines()
+    assert [json.loads(line)["text"] for line in lines] == ["Hello world", "Bye"]
+    assert "timings" not in json.loads(lines[0])
@@ -0,0 +1,38 @@
+from models import JobStatus, OCRResult
+
+
+def add_job(app_main, job_id, status):
+    app_main.job_storage[job_id] = {"status": status, "files_count": 1, "results_count": 0, "error_message": None}
+    if status == JobStatus.COMPLETED:
+        result = OCRResult(filename=f"{job_id}.png", text="", confidence=1.0, language="eng", bbox_data=[])
+        app_main.result_store.write(job_id, [result])
+
+
+def test_oldest_finished_jobs_are_evicted(app_main, monkeypatch):
+    monkeypatch.setattr(app_main.config, "MAX_JOBS_IN_MEMORY", 3)
+    monkeypatch.setattr(app_main.config, "JOB_CLEANUP_BATCH_SIZE", 10)
+    app_main.result_store.clear()
+    add_job(app_main, "running", JobStatus.PROCESSING)
+    add_job(app_main, "old", JobStatus.COMPLETED)
+    add_job(app_main, "failed", JobStatus.FAILED)
+    add_job(app_main, "new", JobStatus.COMPLETED)
+    add_job(app_main, "newest", JobStatus.COMPLETED)
+
+    app_main.evict_finished_jobs()
+    assert list(app_main.job_storage) == ["running", "new", "newest"]
+    assert not app_main.result_store.path("old").exists()
+    assert app_main.result_store.path("new").exists()
+
+
+def test_eviction_is_batched_and_spares_running_jobs(app_main, monkeypatch):
+    monkeypatch.setattr(app_main.config, "MAX_JOBS_IN_MEMORY", 1)
+    monkeypatch.setattr(app_main.config, "JOB_CLEANUP_BATCH_SIZE", 1)
+    for job_id in ("a", "b", "c"):
+        add_job(app_main, job_id, JobStatus.PROCESSING)
+    add_job(app_main, "done", JobStatus.FAILED)
+    add_job(app_main, "done-too", JobStatus.FAILED)
+
+    app_main.evict_finished_jobs()
+    assert list(app_main.job_storage) == ["a", "b", "c", "done-too"]
+    app_main.evict_finished_jobs()
+    assert list(app_main.job_storage) == ["a", "b", "c"]
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+
+import config
+from job_queue import ClientLimitError, JobQueue, QueueFullError, QueuedJob
+from models import JobPriority
+
+
+def queued(queue, job_id, client_id, pages=1, priority=JobPriority.INTERACTIVE):
+    job = QueuedJob(job_id, client_id, [], [], pages, priority)
+    queue.reserve(client_id)
+    asyncio.run(queue.put(job))
+    return job
+
+
+def next_job(queue):
+    return asyncio.run(queue.get())
+
+
+def finish(queue, job):
+    queue.task_done(job, run_seconds=1.0)
+
+
+def test_interactive_before_bulk():
+    queue = JobQueue()
+    queued(queue, "bulk", "a", priority=JobPriority.BULK)
+    queued(queue, "interactive", "b")
+    assert next_job(queue).job_id == "interactive"
+    assert next_job(queue).job_id == "bulk"
+
+
+def test_shortest_job_first_within_a_client():
+    queue = JobQueue()
+    queued(queue, "long", "a", pages=20)
+    queued(queue, "short", "a", pages=2)
+    assert next_job(queue).job_id == "short"
+    assert next_job(queue).job_id == "long"
+
+
+def test_fair_share_between_clients():
+    queue = JobQueue(max_jobs_per_client=10)
+    for index in range(3):
+        queued(queue, f"a{index}", "a", pages=5)
+    queued(queue, "b0", "b", pages=5)
+
+    first = next_job(queue)
+    assert first.client_id == "a"
+    # Client a has been served 5 pages, so b goes before a's remaining jobs
+    assert next_job(queue).job_id == "b0"
+    assert [next_job(queue).client_id for _ in range(2)] == ["a", "a"]
+
+
+def test_new_client_gets_no_credit_for_idle_time():
+    queue = JobQueue(max_jobs_per_client=10)
+    for index in range(3):
+        queued(queue, f"a{index}", "a", pages=10)
+    for _ in range(2):
+        finish(queue, next_job(queue))
+
+    # b starts at the virtual time (10 pages), not at 0, so it does not get two turns in a row
+    queued(queue, "b0", "b", pages=10)
+    queued(queue, "b1", "b", pages=10)
+    assert [next_job(queue).job_id for _ in range(3)] == ["b0", "a2", "b1"]
+
+
+def test_bulk_job_is_promoted_after_aging(monkeypatch):
+    monkeypatch.setattr(config, "PRIORITY_AGING_SECONDS", 60)
+    queue = JobQueue()
+    old_bulk = queued(queue, "old-bulk", "a", pages=1, priority=JobPriority.BULK)
+    old_bulk.enqueued_at = time.monotonic() - 120
+    queued(queue, "interactive", "b", pages=1)
+    # Same priority rank now, and a has been served no more than b, so the older tie-break wins
+    assert next_job(queue).job_id == "old-bulk"
+
+
+def test_bulk_job_waits_before_aging(monkeypatch):
+    monkeypatch.setattr(config, "PRIORITY_AGING_SECONDS", 60)
+    queue = JobQueue()
+    queued(queue, "bulk", "a", priority=JobPriority.BULK)
+    queued(queue, "interactive", "b")
+    assert next_job(queue).job_id == "interactive"
+
+
+def test_run_time_estimate_ignores_jobs_that_never_ran():
+    queue = JobQueue(concurrency=1)
+    queued(queue, "ran", "a")
+    finish(queue, next_job(queue))
+    queued(queue, "waiting", "a")
+    wait = queue.estimated_wait()
+
+    # Deleted while queued: handed back without a run time
+    queue.task_done(next_job(queue), None)
+    queued(queue, "next", "a")
+    assert queue.estimated_wait() == wait
+
+
+def test_cancel_removes_pending_job_and_frees_client_slot():
+    queue = JobQueue(max_jobs_per_client=2)
+    queued(queue, "keep", "a")
+    queued(queue, "drop", "a")
+    with pytest.raises(ClientLimitError):
+        queue.reserve("a")
+
+    cancelled = queue.cancel("drop")
+    assert cancelled.job_id == "drop"
+    assert queue.depth == 1
+    assert queue.cancel("drop") is None
+
+    queue.reserve("a")
+    queue.release("a")
+    assert next_job(queue).job_id == "keep"
+    assert queue.depth == 0
+
+
+def test_queue_full():
+    queue = JobQueue(max_depth=2, max_jobs_per_client=10)
+    queued(queue, "a0", "a")
+    queued(queue, "a1", "a")
+    with pytest.raises(QueueFullError) as error:
+        queue.reserve("b")
+    assert error.value.status_code == 503
+    assert error.value.retry_after >= 1
+
+
+def test_estimated_wait_bound():
+    queue = JobQueue(max_queue_wait=10, concurrency=1)
+    queue._avg_job_seconds = 8
+    queued(queue, "a0", "a")
+    queued(queue, "b0", "b")
+    with pytest.raises(QueueFullError):
+        queue.reserve("c")
+
+
+def test_client_limit_counts_running_jobs():
+    queue = JobQueue(max_jobs_per_client=1)
+    queued(queue, "a0", "a")
+    job = next_job(queue)
+    with pytest.raises(ClientLimitError) as error:
+        queue.reserve("a")
+    assert error.value.status_code == 429
+
+    finish(queue, job)
+    queue.reserve("a")
+    assert queue.running == 0
+
+
+def test_upload_over_client_limit_gets_retry_after(client, app_main, stub_processor, monkeypatch):
+    stub_processor.seconds = 0.3
+    monkeypatch.setattr(app_main.job_queue, "max_jobs_per_client", 1)
+    files = {"files": ("scan.png", b"\x89PNG\r\n\x1a\n", "image/png")}
+
+    assert client.post("/api/ocr/upload", files=files).status_code == 200
+    response = client.post("/api/ocr/upload", files=files)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,31 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "benchmarks"))
+import load_test  # noqa: E402
+
+
+def test_stub_mode_completes_every_job(app_main, tmp_path):
+    output = tmp_path / "report.json"
+    assert load_test.main([
+        "--clients", "2",
+        "--jobs", "4",
+        "--mix", "image=1,pdf=1",
+        "--pdf-pages", "2",
+        "--dpi", "50",
+        "--poll-interval", "0.01",
+        "--timeout", "30",
+        "--stub-ocr-seconds", "0",
+        "--output", str(output),
+    ]) == 0
+
+    report = json.loads(output.read_text())
+    assert report["job_outcomes"] == {"completed": 4}
+    assert report["error_rate"] == 0
+    assert app_main.job_queue.depth == 0
@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import wait_until
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+@pytest.fixture
+def two_dispatchers(monkeypatch, app_main):
+    monkeypatch.setattr(app_main.config, "JOB_CONCURRENCY", 2)
+
+
+def upload(client, name, profile=False):
+    response = client.post(f"/api/ocr/upload?profile={str(profile).lower()}", files={"files": (name, PNG, "image/png")})
+    assert response.status_code == 200
+    return response.json()["job_id"]
+
+
+def test_profiled_job_does_not_share_in_flight_ocr(two_dispatchers, client, app_main, stub_processor):
+    stub_processor.seconds = 0.3
+    plain = upload(client, "plain.png")
+    wait_until(stub_processor.started.is_set)
+    profiled = upload(client, "profiled.png", profile=True)
+    wait_until(lambda: app_main.job_queue.running == 2)
+
+    for job_id in (plain, profiled):
+        wait_until(lambda: client.get(f"/api/ocr/result/{job_id}").json()["status"] == "completed")
+    # Identical content, but the profiled job ran its own OCR under the profiler
+    assert sorted(filename for filename, _ in stub_processor.calls) == ["plain.png", "profiled.png"]
+    assert [profile["filename"] for profile in app_main.profile_store.list_profiles(profiled)] == ["profiled.png"]
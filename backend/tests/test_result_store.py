@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from conftest import wait_until
+from models import BoundingBox, OCRResult
+from result_store import ResultStore
+
+
+def page(number):
+    return OCRResult(
+        filename="scan.pdf",
+        text=f"page {number}",
+        confidence=0.9,
+        language="eng",
+        bbox_data=[BoundingBox(text="page", confidence=0.9, bbox=[1, 2, 3, 4])],
+        page_number=number,
+        timings={"total": number / 10}
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(tmp_path)
+    store.clear()
+    return store
+
+
+def test_round_trip(store):
+    results = [page(number) for number in range(1, 4)]
+    store.write("job", results)
+    with store.open("job") as stored:
+        assert len(stored) == 3
+        assert list(stored.iter_results()) == results
+
+
+def test_page_json_with_and_without_timings(store):
+    store.write("job", [page(1), page(2)])
+    with store.open("job") as stored:
+        plain = json.loads(stored.page_json(1))
+        assert plain["page_number"] == 2
+        assert "timings" not in plain
+        assert json.loads(stored.page_json(1, timings=True))["timings"] == {"total": 0.2}
+
+
+def test_iter_json_ranges(store):
+    store.write("job", [page(number) for number in range(1, 6)])
+    with store.open("job") as stored:
+        numbers = lambda pages: [json.loads(data)["page_number"] for data in pages]
+        assert numbers(stored.iter_json()) == [1, 2, 3, 4, 5]
+        assert numbers(stored.iter_json(1, 3)) == [2, 3]
+        assert numbers(stored.iter_json(3, 50)) == [4, 5]
+        assert numbers(stored.iter_json(7)) == []
+
+
+def test_empty_job(store):
+    store.write("job", [])
+    with store.open("job") as stored:
+        assert len(stored) == 0
+        assert list(stored.iter_json()) == []
+
+
+def test_mapping_outlives_deleted_file(store):
+    store.write("job", [page(1)])
+    stored = store.load("job")
+    try:
+        store.delete("job")
+        assert json.loads(stored.page_json(0))["text"] == "page 1"
+    finally:
+        stored.close()
+    with pytest.raises(FileNotFoundError):
+        store.load("job")
+
+
+def test_clear_removes_previous_run(store, tmp_path):
+    store.write("job", [page(1)])
+    store.clear()
+    assert not store.path("job").exists()
+
+
+@pytest.fixture
+def windows_unlink(monkeypatch):
+    """Make unlinking a file fail while a mapping of it is open, as on Windows"""
+    open_mappings = {}
+    real_unlink = Path.unlink
+
+    def unlink(path, missing_ok=False):
+        if any(not stored.mapped.closed for stored in open_mappings.get(path, [])):
+            raise PermissionError(f"The process cannot access the file because it is being used: {path}")
+        return real_unlink(path, missing_ok=missing_ok)
+
+    monkeypatch.setattr(Path, "unlink", unlink)
+    return lambda path, stored: open_mappings.setdefault(path, []).append(stored)
+
+
+def test_delete_of_mapped_file_waits_for_the_last_reader(store, windows_unlink):
+    store.write("job", [page(1)])
+    readers = [store.load("job"), store.load("job")]
+    for stored in readers:
+        windows_unlink(store.path("job"), stored)
+
+    store.delete("job")
+    assert store.path("job").exists()
+    # The job is gone for new readers right away
+    with pytest.raises(FileNotFoundError):
+        store.load("job")
+
+    readers[0].close()
+    assert store.path("job").exists()
+    assert json.loads(readers[1].page_json(0))["text"] == "page 1"
+    readers[1].close()
+    assert not store.path("job").exists()
+
+
+def test_deleting_a_job_being_read_succeeds(client, app_main, windows_unlink):
+    response = client.post("/api/ocr/upload", files={"files": ("scan.png", b"\x89PNG\r\n\x1a\n", "image/png")})
+    job_id = response.json()["job_id"]
+    wait_until(lambda: client.get(f"/api/ocr/result/{job_id}").json()["status"] == "completed")
+
+    # A response still streaming the results holds a mapping
+    stored = app_main.result_store.load(job_id)
+    windows_unlink(app_main.result_store.path(job_id), stored)
+    assert client.delete(f"/api/ocr/job/{job_id}").status_code == 200
+    assert client.get(f"/api/ocr/result/{job_id}").status_code == 404
+
+    stored.close()
+    assert not app_main.result_store.path(job_id).exists()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import storage
+from storage import QuotaExceededError, UploadStorage
+
+
+def write(path, size, age=0):
+    path.write_bytes(b"x" * size)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Count directory scans"""
+    counted = []
+    real_usage = storage.directory_usage
+
+    def directory_usage(path):
+        counted.append(path)
+        return real_usage(path)
+
+    monkeypatch.setattr(storage, "directory_usage", directory_usage)
+    return counted
+
+
+def test_reserve_rejects_uploads_over_the_quota(tmp_path):
+    write(tmp_path / "queued.pdf", 60)
+    uploads = UploadStorage(tmp_path, quota_bytes=100, rescan_seconds=0)
+
+    uploads.reserve(30, retry_after=7)
+    with pytest.raises(QuotaExceededError) as rejected:
+        # 60 on disk and 30 still being written
+        uploads.reserve(20, retry_after=7)
+    assert (rejected.value.status_code, rejected.value.retry_after) == (503, 7)
+
+    uploads.release(30)
+    (tmp_path / "queued.pdf").unlink()
+    uploads.reserve(100, retry_after=7)
+
+
+def test_no_quota_never_scans(tmp_path, scans):
+    uploads = UploadStorage(tmp_path, quota_bytes=0)
+    uploads.reserve(10 ** 12, retry_after=1)
+    assert scans == []
+
+
+def test_quota_scans_are_bounded(tmp_path, scans):
+    write(tmp_path / "queued.pdf", 40)
+    uploads = UploadStorage(tmp_path, quota_bytes=100, rescan_seconds=3600)
+    for _ in range(5):
+        uploads.reserve(10, retry_after=1)
+        uploads.release(10)
+    assert len(scans) == 1
+
+    # Admitted uploads count as written until the next scan: 40 + 5 x 10 on disk
+    with pytest.raises(QuotaExceededError):
+        uploads.reserve(20, retry_after=1)
+    uploads.reserve(10, retry_after=1)
+
+
+def test_stale_scan_is_refreshed(tmp_path, scans):
+    uploads = UploadStorage(tmp_path, quota_bytes=100, rescan_seconds=3600)
+    uploads.reserve(80, retry_after=1)
+    uploads.release(80)
+    with pytest.raises(QuotaExceededError):
+        uploads.reserve(80, retry_after=1)
+
+    # The upload was abandoned; once the scan is stale, its bytes no longer count
+    uploads.rescan_seconds = 0
+    uploads.reserve(80, retry_after=1)
+    assert len(scans) == 2
+
+
+def test_reap_removes_old_files_no_job_owns(tmp_path):
+    old = write(tmp_path / "old.png", 10, age=7200)
+    owned = write(tmp_path / "owned.png", 20, age=7200)
+    fresh = write(tmp_path / "fresh.png", 30)
+    (tmp_path / "subdir").mkdir()
+    uploads = UploadStorage(tmp_path, max_age_seconds=3600)
+
+    assert uploads.reap({str(owned)}) == (1, 10)
+    assert not old.exists()
+    assert owned.exists() and fresh.exists()
+    assert (tmp_path / "subdir").is_dir()
+
+
+def test_reap_on_startup_ignores_age(tmp_path):
+    write(tmp_path / "fresh.png", 30)
+    uploads = UploadStorage(tmp_path, max_age_seconds=3600)
+    assert uploads.reap(set(), max_age_seconds=0) == (1, 30)
+    assert UploadStorage(tmp_path / "missing").reap(set()) == (0, 0)
+
+
+def test_reap_frees_quota_at_once(tmp_path):
+    write(tmp_path / "orphan.png", 90, age=7200)
+    uploads = UploadStorage(tmp_path, quota_bytes=100, max_age_seconds=3600, rescan_seconds=3600)
+    with pytest.raises(QuotaExceededError):
+        uploads.reserve(20, retry_after=1)
+    uploads.reap(set())
+    uploads.reserve(20, retry_after=1)
+
+
+def test_hard_links_are_counted_once(tmp_path):
+    original = write(tmp_path / "upload.png", 50)
+    os.link(original, tmp_path / "shared.png")
+    assert storage.directory_usage(tmp_path) == (1, 50)
+
+
+def test_run_reaper_runs_each_pass(tmp_path):
+    old = write(tmp_path / "old.png", 10, age=7200)
+    uploads = UploadStorage(tmp_path, max_age_seconds=3600)
+    passes = []
+
+    async def scenario():
+        reaper = asyncio.create_task(uploads.run_reaper(lambda: set(), interval=0.01, on_pass=lambda: passes.append(1)))
+        while not passes or old.exists():
+            await asyncio.sleep(0.01)
+        reaper.cancel()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert not old.exists()
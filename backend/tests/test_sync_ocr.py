@@ -0,0 +1,70 @@
+from conftest import wait_until
+
+PNG = ("scan.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 64, "image/png")
+
+
+def post_sync(client, client_id="tester"):
+    return client.post("/api/ocr/sync", files={"file": PNG}, headers={"X-Client-ID": client_id})
+
+
+def test_result_within_deadline(client, app_main):
+    response = post_sync(client)
+    assert response.status_code == 200
+    assert response.json()["filename"] == "scan.png"
+    assert "timings" not in response.json()
+    assert app_main.sync_in_flight == 0
+
+
+def test_deadline_falls_back_to_a_job(client, app_main, stub_processor, monkeypatch):
+    stub_processor.seconds = 0.3
+    monkeypatch.setattr(app_main.config, "SYNC_DEADLINE_SECONDS", 0.02)
+
+    response = post_sync(client)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.json()["status"] == "processing"
+
+    wait_until(lambda: client.get(f"/api/ocr/result/{job_id}").json()["status"] == "completed")
+    result = client.get(f"/api/ocr/result/{job_id}").json()
+    assert result["results_total"] == 1
+    assert result["results"][0]["filename"] == "scan.png"
+    wait_until(lambda: app_main.sync_in_flight == 0)
+
+
+def test_oversized_image_is_rejected(client, app_main, stub_processor, monkeypatch):
+    monkeypatch.setattr(app_main.config, "SYNC_MAX_FILE_SIZE", 16)
+    response = post_sync(client)
+    assert response.status_code == 413
+    assert "/api/ocr/upload" in response.json()["detail"]
+    assert stub_processor.calls == []
+
+
+def test_client_limit_counts_deferred_work(client, app_main, stub_processor, monkeypatch):
+    stub_processor.seconds = 0.5
+    monkeypatch.setattr(app_main.config, "SYNC_DEADLINE_SECONDS", 0.02)
+    monkeypatch.setattr(app_main.job_queue, "max_jobs_per_client", 1)
+
+    assert post_sync(client).status_code == 202
+    # The deferred image still holds the client's only slot
+    response = post_sync(client)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Other clients are not affected
+    assert post_sync(client, client_id="other").status_code == 202
+
+    wait_until(lambda: app_main.sync_in_flight == 0)
+    assert app_main.job_queue.depth == 0
+    stub_processor.seconds = 0.0
+    assert post_sync(client).status_code == 200
+
+
+def test_sync_bound_is_server_wide(client, app_main, stub_processor, monkeypatch):
+    stub_processor.seconds = 0.5
+    monkeypatch.setattr(app_main.config, "SYNC_DEADLINE_SECONDS", 0.02)
+    monkeypatch.setattr(app_main.config, "SYNC_MAX_IN_FLIGHT", 1)
+
+    assert post_sync(client, client_id="a").status_code == 202
+    response = post_sync(client, client_id="b")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    wait_until(lambda: app_main.sync_in_flight == 0)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from table_detector import MIN_CELL_SIZE, _separators, _with_borders, cell_has_ink, find_tables
+
+
+def test_separators_are_run_centres():
+    length = 10
+    full = length * 255
+    profile = np.array([0, 0, full, full, 0, 0, 0, full, 0, full // 4])
+    assert _separators(profile, length) == [2, 7]
+
+
+def test_separators_need_coverage():
+    assert _separators(np.full(20, 255 * 4), 10) == []
+    assert _separators(np.zeros(0), 10) == []
+
+
+def test_with_borders_adds_missing_outer_edges():
+    assert _with_borders([], 100) == [0, 99]
+    assert _with_borders([50], 100) == [0, 50, 99]
+
+
+def test_with_borders_keeps_ruled_outer_edges():
+    assert _with_borders([2, 50, 97], 100) == [2, 50, 97]
+
+
+def test_with_borders_drops_separators_too_close_together():
+    edges = _with_borders([30, 30 + MIN_CELL_SIZE - 1, 70], 100)
+    assert edges == [0, 30, 70, 99]
+
+
+def grid_page(rows=3, columns=3, cell=80, margin=100, thickness=3):
+    """White page with a ruled rows x columns grid in black"""
+    page = np.full((margin * 2 + rows * cell, margin * 2 + columns * cell), 255, dtype=np.uint8)
+    for row in range(rows + 1):
+        y = margin + row * cell
+        page[y:y + thickness, margin:margin + columns * cell + thickness] = 0
+    for column in range(columns + 1):
+        x = margin + column * cell
+        page[margin:margin + rows * cell + thickness, x:x + thickness] = 0
+    return page
+
+
+def test_find_tables_on_ruled_grid():
+    tables, lineless = find_tables(grid_page())
+    assert len(tables) == 1
+    table = tables[0]
+    assert (table.rows, table.columns) == (3, 3)
+    assert len(table.cells) == 9
+    assert [cell[:3] for cell in table.cells[:3]] == [(0, 0, 1), (0, 1, 1), (0, 2, 1)]
+    # The ruling lines are erased from the page cells are cropped from
+    assert (lineless == 255).all()
+
+
+def test_find_tables_ignores_plain_page():
+    page = np.full((400, 400), 255, dtype=np.uint8)
+    page[200:203, 50:350] = 0  # An underline is not a table
+    tables, lineless = find_tables(page)
+    assert tables == []
+    assert lineless is page
+
+
+def test_cell_has_ink():
+    cell = np.full((40, 40), 255, dtype=np.uint8)
+    assert not cell_has_ink(cell)
+    cell[10:20, 10:20] = 0
+    assert cell_has_ink(cell)
@@ -0,0 +1,71 @@
+import pytest
+
+from tesseract_data import TesseractData
+
+HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+def tsv(*rows):
+    return "\n".join([HEADER] + ["\t".join(str(field) for field in row) for row in rows])
+
+
+# Two blocks: the first with one paragraph of two lines, the second with a single word
+PAGE = tsv(
+    (1, 1, 0, 0, 0, 0, 0, 0, 400, 300, -1, ""),
+    (4, 1, 1, 1, 1, 0, 10, 10, 120, 22, -1, ""),
+    (5, 1, 1, 1, 1, 1, 10, 10, 50, 20, 90, "Hello"),
+    (5, 1, 1, 1, 1, 2, 70, 12, 60, 20, 80, "world"),
+    (5, 1, 1, 1, 2, 1, 10, 40, 80, 20, 70, "Second"),
+    (5, 1, 1, 1, 2, 2, 95, 40, 10, 20, 0, ""),
+    (5, 1, 2, 1, 1, 1, 10, 100, 50, 25, 60, "Block"),
+)
+
+
+def test_extract_boxes_skips_structure_rows_and_empty_words():
+    boxes = TesseractData.from_tsv(PAGE).extract_boxes()
+    assert [box.text for box in boxes] == ["Hello", "world", "Second", "Block"]
+    assert boxes[1].bbox == [70, 12, 60, 20]
+    assert boxes[1].confidence == 0.8
+
+
+def test_confidences():
+    data = TesseractData.from_tsv(PAGE)
+    # Weighted by text length: (5*90 + 5*80 + 6*70 + 5*60) / 21
+    assert data.overall_confidence() == pytest.approx((450 + 400 + 420 + 300) / 21 / 100)
+    assert data.line_confidences() == [0.85, 0.7, 0.6]
+    assert data.block_confidences() == pytest.approx([(450 + 400 + 420) / 16 / 100, 0.6], abs=1e-4)
+
+
+def test_layout_offsets():
+    layout = TesseractData.from_tsv(PAGE).layout()
+    assert layout.line_offsets == [0, 2, 3, 4]
+    assert layout.paragraph_offsets == [0, 2, 3]
+    assert layout.block_offsets == [0, 1, 2]
+    assert layout.line_texts == ["Hello world", "Second", "Block"]
+
+
+def test_layout_bboxes_cover_their_words():
+    layout = TesseractData.from_tsv(PAGE).layout()
+    assert layout.line_bboxes == [[10, 10, 120, 22], [10, 40, 80, 20], [10, 100, 50, 25]]
+    assert layout.block_bboxes == [[10, 10, 120, 50], [10, 100, 50, 25]]
+
+
+def test_layout_splits_on_paragraph_change():
+    data = TesseractData.from_tsv(tsv(
+        (5, 1, 1, 1, 1, 1, 0, 0, 10, 10, 90, "a"),
+        (5, 1, 1, 2, 1, 1, 0, 20, 10, 10, 90, "b"),
+        (5, 1, 1, 2, 2, 1, 0, 40, 10, 10, 90, "c"),
+    ))
+    layout = data.layout()
+    assert layout.line_offsets == [0, 1, 2, 3]
+    assert layout.paragraph_offsets == [0, 1, 3]
+    assert layout.block_offsets == [0, 2]
+
+
+def test_layout_of_empty_page():
+    layout = TesseractData.from_tsv(HEADER).layout()
+    assert layout.line_offsets == [0]
+    assert layout.paragraph_offsets == [0]
+    assert layout.block_offsets == [0]
+    assert layout.line_bboxes == []
+    assert layout.line_texts == []
@@ -0,0 +1,63 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+from PIL import Image  # noqa: E402
+
+
+def write_tiff(path, dpi):
+    """Three frames, told apart by size and gray level; the first is bilevel like a fax"""
+    frames = [
+        Image.new("1", (200, 100), 1),
+        Image.new("L", (160, 100), 20),
+        Image.new("L", (120, 100), 30),
+    ]
+    frames[0].save(path, save_all=True, append_images=frames[1:], dpi=dpi)
+    return str(path)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """OCRProcessor whose page OCR records the decoded pages, without probing Tesseract"""
+    from ocr_processor import OCRProcessor
+
+    processor = OCRProcessor.__new__(OCRProcessor)
+    processor._inline = threading.local()
+    processor.preprocessor = SimpleNamespace(profile=None)
+    processor.pages = []
+
+    def ocr_page(timer, image, page_name, page_number, profile):
+        processor.pages.append((page_number, page_name, image))
+        return SimpleNamespace(text="", confidence=1.0, page_number=page_number)
+
+    monkeypatch.setattr(processor, "_ocr_timed_page", ocr_page)
+    return processor
+
+
+def test_frames_decode_in_order_as_grayscale(processor, tmp_path):
+    pages = list(processor._iter_tiff_pages(write_tiff(tmp_path / "scan.tif", dpi=(200, 200))))
+
+    assert [page.shape for page in pages] == [(100, 200), (100, 160), (100, 120)]
+    assert all(page.dtype == np.uint8 for page in pages)
+    assert [int(page[0, 0]) for page in pages] == [255, 20, 30]
+
+
+def test_fax_resolution_is_corrected_to_square_pixels(processor, tmp_path):
+    pages = list(processor._iter_tiff_pages(write_tiff(tmp_path / "fax.tif", dpi=(204, 98))))
+
+    # 98 DPI rows are stretched to 204 DPI: 100 * 204 / 98 rows, width unchanged
+    assert [page.shape for page in pages] == [(208, 200), (208, 160), (208, 120)]
+
+
+def test_process_tiff_returns_one_result_per_frame(processor, tmp_path, monkeypatch):
+    import config
+    monkeypatch.setattr(config, "PAGE_WORKERS", 2)
+    results = processor.process_tiff(write_tiff(tmp_path / "fax.tif", dpi=(204, 98)), "fax.tif")
+
+    assert [result.page_number for result in results] == [1, 2, 3]
+    assert sorted((number, name, image.shape[1]) for number, name, image in processor.pages) == [
+        (1, "fax.tif (Page 1)", 200), (2, "fax.tif (Page 2)", 160), (3, "fax.tif (Page 3)", 120)
+    ]
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import config
+from webhooks import CallbackHostError, WebhookOutbox, sign, validate_callback_url
+
+
+class Receiver:
+    """Local callback receiver answering with the given statuses in turn, the last one from then on"""
+
+    def __init__(self, statuses=(200,)):
+        self.statuses = list(statuses)
+        self.requests = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                receiver.requests.append((self.path, json.loads(body), self.headers, body))
+                status = receiver.statuses.pop(0) if len(receiver.statuses) > 1 else receiver.statuses[0]
+                self.send_response(status)
+                if 300 <= status < 400:
+                    self.send_header("Location", "/redirected")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self.thread.start()
+
+    def url(self, path="/hook"):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    @property
+    def paths(self):
+        return [path for path, _, _, _ in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def receiver():
+    receivers = []
+
+    def start(statuses=(200,)):
+        receivers.append(Receiver(statuses))
+        return receivers[-1]
+
+    yield start
+    for started in receivers:
+        started.close()
+
+
+@pytest.fixture(autouse=True)
+def fast_webhooks(monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1"])
+    monkeypatch.setattr(config, "WEBHOOK_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(config, "WEBHOOK_MAX_BACKOFF_SECONDS", 0.05)
+    monkeypatch.setattr(config, "WEBHOOK_BATCH_WINDOW_SECONDS", 0.05)
+    monkeypatch.setattr(config, "WEBHOOK_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(config, "WEBHOOK_TIMEOUT_SECONDS", 2)
+
+
+def event(job_id):
+    return {"event": "job.completed", "job_id": job_id, "status": "completed", "result_url": f"/api/ocr/result/{job_id}"}
+
+
+async def until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for webhook deliveries")
+        await asyncio.sleep(0.01)
+
+
+def run_outbox(outbox, scenario):
+    """Start the outbox, run the async scenario against it and stop it"""
+    async def main():
+        outbox.start()
+        try:
+            await scenario()
+        finally:
+            await outbox.stop()
+    asyncio.run(main())
+
+
+def files(outbox, pattern):
+    return sorted(outbox.outbox_dir.glob(pattern))
+
+
+def test_retries_with_backoff_until_delivered(tmp_path, receiver):
+    hook = receiver([503, 500, 200])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        assert len(files(outbox, "*.json")) == 1
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    assert len(hook.requests) == 3
+    assert files(outbox, "*") == []
+
+
+def test_gives_up_after_max_attempts(tmp_path, receiver):
+    hook = receiver([500])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    assert len(hook.requests) == config.WEBHOOK_MAX_ATTEMPTS
+    [failed] = files(outbox, "*")
+    assert failed.suffix == ".failed"
+    delivery = json.loads(failed.read_text())
+    assert (delivery["attempts"], delivery["last_error"]) == (3, "HTTP 500")
+
+
+def test_client_errors_are_not_retried(tmp_path, receiver):
+    hook = receiver([404])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    assert len(hook.requests) == 1
+    assert [path.suffix for path in files(outbox, "*")] == [".failed"]
+
+
+def test_redirects_are_not_followed(tmp_path, receiver):
+    hook = receiver([302, 200])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    assert hook.paths == ["/hook"]
+    [failed] = files(outbox, "*")
+    assert json.loads(failed.read_text())["last_error"] == "HTTP 302"
+
+
+def test_events_are_batched_per_url(tmp_path, receiver, monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_BATCH_SIZE", 2)
+    hook = receiver([200])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        for index in range(3):
+            await outbox.enqueue(hook.url("/a"), event(f"a{index}"))
+        await outbox.enqueue(hook.url("/b"), event("b0"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    batches = {}
+    for path, body, _, _ in hook.requests:
+        batches.setdefault(path, []).append([item["job_id"] for item in body["events"]])
+    # One request per batch, in order within a URL
+    assert batches == {"/a": [["a0", "a1"], ["a2"]], "/b": [["b0"]]}
+
+
+def test_bodies_are_signed(tmp_path, receiver, monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_SECRET", "s3cret")
+    hook = receiver([200])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    [(_, _, headers, body)] = hook.requests
+    assert headers["X-OCR-Signature"] == sign(body, "s3cret")
+
+
+def test_pending_events_are_reloaded_on_startup(tmp_path, receiver):
+    hook = receiver([200])
+    # A previous run persisted the event but stopped before sending it
+    asyncio.run(WebhookOutbox(tmp_path).enqueue(hook.url(), event("job-1")))
+    assert hook.requests == []
+
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        assert outbox.pending == 1
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    [(_, body, _, _)] = hook.requests
+    # Results are kept in memory and on disk only for the life of the process
+    assert body["events"][0]["job_id"] == "job-1"
+    assert body["events"][0]["results_expired"] is True
+    assert body["events"][0]["result_url"] is None
+    assert files(outbox, "*") == []
+
+
+def test_results_expired_is_checked_when_sending(tmp_path, receiver):
+    hook = receiver([200])
+    outbox = WebhookOutbox(tmp_path, results_expired=lambda job_id: job_id == "deleted")
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("kept"))
+        await outbox.enqueue(hook.url(), event("deleted"))
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    events = {item["job_id"]: item for _, body, _, _ in hook.requests for item in body["events"]}
+    assert (events["kept"]["results_expired"], events["kept"]["result_url"]) == (False, "/api/ocr/result/kept")
+    assert (events["deleted"]["results_expired"], events["deleted"]["result_url"]) == (True, None)
+
+
+def test_host_check_is_repeated_before_delivery(tmp_path, receiver, monkeypatch):
+    hook = receiver([200])
+    outbox = WebhookOutbox(tmp_path)
+
+    async def scenario():
+        await outbox.enqueue(hook.url(), event("job-1"))
+        # The allowlist no longer covers the host by the time the event is sent
+        monkeypatch.setattr(config, "WEBHOOK_ALLOWED_HOSTS", [])
+        await until(lambda: outbox.pending == 0)
+
+    run_outbox(outbox, scenario)
+    assert hook.requests == []
+    [failed] = files(outbox, "*")
+    assert "non-public address 127.0.0.1" in json.loads(failed.read_text())["last_error"]
+
+
+def resolving_to(monkeypatch, *addresses):
+    def getaddrinfo(host, port, proto=0):
+        return [(socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, proto, "", (address, port)) for address in addresses]
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.mark.parametrize("address", ["127.0.0.1", "10.1.2.3", "192.168.0.10", "169.254.169.254", "::1", "fe80::1%eth0", "fd00::1"])
+def test_non_public_addresses_are_refused(monkeypatch, address):
+    monkeypatch.setattr(config, "WEBHOOK_ALLOWED_HOSTS", [])
+    resolving_to(monkeypatch, "93.184.216.34", address)
+    with pytest.raises(CallbackHostError):
+        validate_callback_url("https://hooks.example.com/ocr")
+
+
+def test_public_addresses_are_accepted(monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_ALLOWED_HOSTS", [])
+    resolving_to(monkeypatch, "93.184.216.34", "2606:2800:220:1::1")
+    assert validate_callback_url("https://hooks.example.com/ocr") == "https://hooks.example.com/ocr"
+
+
+def test_allowlist_replaces_the_address_check(monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_ALLOWED_HOSTS", ["localhost"])
+    resolving_to(monkeypatch, "127.0.0.1")
+    assert validate_callback_url("http://localhost:9000/hook") == "http://localhost:9000/hook"
+    with pytest.raises(ValueError, match="not allowed"):
+        validate_callback_url("https://hooks.example.com/ocr")
+
+
+@pytest.mark.parametrize("url", ["ftp://hooks.example.com/ocr", "file:///etc/passwd", "https:///ocr", "hooks.example.com/ocr"])
+def test_malformed_urls_are_refused(url):
+    with pytest.raises(ValueError, match="Invalid callback URL"):
+        validate_callback_url(url)
@@ -0,0 +1,78 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Stack of active StageTimers per worker thread; stages are recorded into the innermost one
+_local = threading.local()
+
+
+class StageTimer:
+    """Accumulates the duration of named stages for one unit of work (a file or a page)"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations rounded for reporting, plus the total wall time"""
+        timings = {stage: round(seconds, 4) for stage, seconds in self.stages.items()}
+        timings["total"] = round(self.elapsed(), 4)
+        return timings
+
+
+def _stack():
+    if not hasattr(_local, "timers"):
+        _local.timers = []
+    return _local.timers
+
+
+def current_timer() -> Optional[StageTimer]:
+    """The innermost timer active on this thread, if any"""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def recording(timer: StageTimer):
+    """Make a timer the target for stages recorded on this thread"""
+    stack = _stack()
+    stack.append(timer)
+    try:
+        yield timer
+    finally:
+        stack.pop()
+
+
+@contextmanager
+def timed(name: str, histogram=None, **labels):
+    """
+    Time a block, recording it in the active trace and optionally a metrics histogram
+
+    Args:
+        name: Name of the stage in the timing trace
+        histogram: Optional metrics.Histogram to observe the duration in
+        labels: Labels for the histogram observation
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(seconds, **labels)
+        timer = current_timer()
+        if timer is not None:
+            timer.add(name, seconds)
+
+
+def run_with_timer(timer: StageTimer, func: Callable, *args, **kwargs) -> Any:
+    """Call func with timer active, for use on worker threads"""
+    with recording(timer):
+        return func(*args, **kwargs)
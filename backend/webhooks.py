@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from metrics import WEBHOOK_DELIVERIES_TOTAL
+import config
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-OCR-Signature"
+
+
+class CallbackHostError(ValueError):
+    """The callback host resolves to an address callbacks may not target"""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Surface redirects as errors, a receiver could otherwise bounce callbacks to internal addresses"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def validate_callback_url(url: str) -> str:
+    """
+    Check a client-supplied callback URL, raising ValueError if it cannot be used
+
+    Without WEBHOOK_ALLOWED_HOSTS, the host is resolved and refused if any of
+    its addresses is private, loopback, link-local or otherwise not public, so
+    callbacks cannot be pointed at the server's own network. Blocks on DNS.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Invalid callback URL: {url}")
+    if config.WEBHOOK_ALLOWED_HOSTS:
+        if parsed.hostname not in config.WEBHOOK_ALLOWED_HOSTS:
+            raise ValueError(f"Callback host not allowed: {parsed.hostname}")
+        return url
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"Callback host cannot be resolved: {parsed.hostname}") from e
+    for address in addresses:
+        # Drop the zone of scoped IPv6 addresses (fe80::1%eth0)
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise CallbackHostError(f"Callback host {parsed.hostname} resolves to non-public address {address}, add it to WEBHOOK_ALLOWED_HOSTS to allow it")
+    return url
+
+
+def sign(body: bytes, secret: str) -> str:
+    """HMAC-SHA256 signature of a callback body, as sent in X-OCR-Signature"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def expire_results(event: Dict[str, Any]):
+    """Mark an event's job results as gone, so it no longer points at them"""
+    event["results_expired"] = True
+    event["result_url"] = None
+
+
+def backoff_delay(attempts: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with jitter after a failed attempt, at least the server's Retry-After"""
+    delay = min(config.WEBHOOK_MAX_BACKOFF_SECONDS, config.WEBHOOK_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    # Jitter keeps a receiver that comes back from being hit by every retry at once
+    delay *= random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
+
+
+class WebhookOutbox:
+    """Persistent outbox of job completion callbacks
+
+    Every event is written to its own JSON file before it is sent, so
+    callbacks survive restarts; the file is removed once the receiver
+    acknowledges it with a 2xx. A background task sends due events, batching
+    those for the same URL into one request, and retries failures with
+    exponential backoff up to WEBHOOK_MAX_ATTEMPTS. Events that run out of
+    attempts, or are refused with a 4xx, are kept as .failed files.
+
+    Each URL has at most one sender task, which sends its due batches in
+    turn, so a slow or unreachable receiver only delays its own events.
+
+    Outbox files are written and removed on worker threads, off the event
+    loop; only the startup reload reads them on the loop.
+    """
+
+    def __init__(self, outbox_dir: Path = config.WEBHOOK_OUTBOX_DIR, results_expired: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            outbox_dir: Directory of pending (.json) and given up (.failed) deliveries
+            results_expired: Whether a job's results are gone, checked before every attempt
+        """
+        self.outbox_dir = Path(outbox_dir)
+        self.results_expired = results_expired
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._senders: Dict[str, asyncio.Task] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Reload deliveries left over from a previous run and start sending
+
+        Reads the outbox synchronously: it runs once at startup, before any request is served.
+        """
+        self.outbox_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.outbox_dir.glob("*.json"):
+            try:
+                delivery = json.loads(path.read_text())
+            except Exception as e:
+                logger.warning(f"Could not load webhook delivery {path.name}: {str(e)}")
+                continue
+            if not delivery["event"].get("results_expired"):
+                # Job results do not survive a restart, so the event can no longer point at them
+                expire_results(delivery["event"])
+                self._write(delivery)
+            self._pending[delivery["delivery_id"]] = delivery
+        if self._pending:
+            logger.info(f"Resuming {len(self._pending)} pending webhook deliveries, their results have expired")
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sending; undelivered events stay in the outbox for the next start"""
+        tasks = [task for task in (self._task, *self._senders.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._senders.clear()
+
+    async def enqueue(self, url: str, event: Dict[str, Any]) -> str:
+        """Persist an event for delivery to url and wake the sender"""
+        delivery = {
+            "delivery_id": uuid.uuid4().hex,
+            "url": url,
+            "event": event,
+            "attempts": 0,
+            "created_at": time.time(),
+            "next_attempt_at": time.time(),
+            "last_error": None,
+        }
+        await asyncio.to_thread(self._write, delivery)
+        self._pending[delivery["delivery_id"]] = delivery
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return delivery["delivery_id"]
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            # Events for a URL that is being sent to wait for its sender to finish
+            idle = [delivery for delivery in self._pending.values() if delivery["url"] not in self._senders]
+            due = [delivery for delivery in idle if delivery["next_attempt_at"] <= now]
+            if not due:
+                next_due = min((delivery["next_attempt_at"] for delivery in idle), default=None)
+                timeout = None if next_due is None else max(0.0, next_due - now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    # Give events finishing around the same time a chance to share a request
+                    await asyncio.sleep(config.WEBHOOK_BATCH_WINDOW_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batches = defaultdict(list)
+            for delivery in sorted(due, key=lambda d: d["created_at"]):
+                batches[delivery["url"]].append(delivery)
+            for url, deliveries in batches.items():
+                sender = asyncio.create_task(self._send_batches(url, deliveries))
+                self._senders[url] = sender
+                sender.add_done_callback(lambda _, url=url: self._sender_done(url))
+
+    async def _send_batches(self, url: str, deliveries: List[Dict[str, Any]]):
+        """Send a URL's due events one batch at a time"""
+        for start in range(0, len(deliveries), config.WEBHOOK_BATCH_SIZE):
+            await self._send(url, deliveries[start:start + config.WEBHOOK_BATCH_SIZE])
+
+    def _sender_done(self, url: str):
+        self._senders.pop(url, None)
+        # Events that came due for this URL meanwhile are now free to go
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _send(self, url: str, deliveries: List[Dict[str, Any]]):
+        """POST one batch of events and record the outcome for each of them"""
+        for delivery in deliveries:
+            event = delivery["event"]
+            # The job may have been deleted or evicted while its event waited
+            if not event.get("results_expired"):
+                event["results_expired"] = False
+                if self.results_expired is not None and self.results_expired(event["job_id"]):
+                    expire_results(event)
+        body = json.dumps({"events": [delivery["event"] for delivery in deliveries]}).encode()
+        permanent = False
+        try:
+            # Checked again before every attempt, the host may resolve elsewhere by now
+            await asyncio.to_thread(validate_callback_url, url)
+            status, retry_after = await asyncio.to_thread(self._post, url, body)
+            error = None if 200 <= status < 300 else f"HTTP {status}"
+        except CallbackHostError as e:
+            status, retry_after, error, permanent = None, None, str(e), True
+        except Exception as e:
+            status, retry_after, error = None, None, str(e)
+
+        if error is None:
+            for delivery in deliveries:
+                self._pending.pop(delivery["delivery_id"], None)
+                WEBHOOK_DELIVERIES_TOTAL.inc(outcome="delivered")
+            await asyncio.to_thread(self._remove, deliveries)
+            logger.info(f"Delivered {len(deliveries)} webhook events to {url}")
+            return
+
+        # Redirects, and anything but timeouts and throttling in the 4xx range, will not get better by retrying
+        permanent = permanent or (status is not None and 300 <= status < 500 and status not in (408, 429))
+        retried, failed = [], []
+        for delivery in deliveries:
+            delivery["attempts"] += 1
+            delivery["last_error"] = error
+            if permanent or delivery["attempts"] >= config.WEBHOOK_MAX_ATTEMPTS:
+                self._pending.pop(delivery["delivery_id"], None)
+                failed.append(delivery)
+                continue
+            delivery["next_attempt_at"] = time.time() + backoff_delay(delivery["attempts"], retry_after)
+            retried.append(delivery)
+            WEBHOOK_DELIVERIES_TOTAL.inc(outcome="retried")
+        for delivery in retried:
+            await asyncio.to_thread(self._write, delivery)
+        for delivery in failed:
+            await asyncio.to_thread(self._dead_letter, delivery)
+        logger.warning(f"Webhook delivery to {url} failed ({error}), {len(deliveries)} events affected")
+
+    def _post(self, url: str, body: bytes) -> Tuple[int, Optional[float]]:
+        """Blocking POST of a callback body; returns the status and any Retry-After seconds"""
+        headers = {"Content-Type": "application/json", "User-Agent": f"{config.APP_NAME}/{config.APP_VERSION}"}
+        if config.WEBHOOK_SECRET:
+            headers[SIGNATURE_HEADER] = sign(body, config.WEBHOOK_SECRET)
+        request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+        try:
+            with _opener.open(request, timeout=config.WEBHOOK_TIMEOUT_SECONDS) as response:
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+            return e.code, float(retry_after) if retry_after and retry_after.isdigit() else None
+
+    def _path(self, delivery: Dict[str, Any], suffix: str = ".json") -> Path:
+        return self.outbox_dir / f"{delivery['delivery_id']}{suffix}"
+
+    def _write(self, delivery: Dict[str, Any]):
+        """Atomically persist a delivery, so a crash never leaves a half-written file"""
+        path = self._path(delivery)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(delivery))
+        os.replace(temp_path, path)
+
+    def _remove(self, deliveries: List[Dict[str, Any]]):
+        for delivery in deliveries:
+            self._path(delivery).unlink(missing_ok=True)
+
+    def _dead_letter(self, delivery: Dict[str, Any]):
+        """Give up on a delivery, keeping it on disk for inspection or manual replay"""
+        self._write(delivery)
+        os.replace(self._path(delivery), self._path(delivery, ".failed"))
+        WEBHOOK_DELIVERIES_TOTAL.inc(outcome="failed")
+        logger.error(
+            f"Giving up on webhook for job {delivery['event'].get('job_id')} to {delivery['url']} "
+            f"after {delivery['attempts']} attempts: {delivery['last_error']}"
+        )
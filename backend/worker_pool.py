@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import config
+from concurrency import apply_thread_limit, benchmark_plan, static_plan
+
+logger = logging.getLogger(__name__)
+
+
+class OCRWorkerPool:
+    """Bounded pool of worker threads that runs blocking OCR work off the event loop
+
+    Tesseract runs as a subprocess and OpenCV releases the GIL, so threads give
+    real parallelism for the OCR pipeline without pickling images between processes.
+    The OCR stack (OpenCV, NumPy, pytesseract) is imported and warmed up on the
+    pool itself, so the HTTP layer can start serving before it is loaded.
+    
+    Worker count and Tesseract's OpenMP threads are managed together so that
+    workers x page workers x threads matches the CPUs; in auto mode the mix is benchmarked
+    during warm-up and the pool is resized to the fastest one.
+    """
+
+    def __init__(self, max_workers: int = config.OCR_WORKERS):
+        self.max_workers = max_workers
+        self.plan = static_plan(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-worker")
+        self._lock = threading.Lock()
+        self._active = 0
+
+        self._processor = None
+        self._ready: Optional[asyncio.Event] = None
+        self.warmup_error: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+        logger.info(f"OCR worker pool started with {max_workers} workers")
+
+    @property
+    def active_workers(self) -> int:
+        """Number of tasks currently running on a worker"""
+        return self._active
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the OCR processor is loaded and warmed up"""
+        return self._processor is not None
+
+    @property
+    def processor(self):
+        """The shared OCRProcessor, available once warm-up has finished"""
+        if self._processor is None:
+            raise RuntimeError("OCR workers are still warming up")
+        return self._processor
+
+    def start(self):
+        """Load and warm up the OCR processor in the background"""
+        self._ready = asyncio.Event()
+        apply_thread_limit(self.plan.tesseract_threads)
+        future = asyncio.wrap_future(self.executor.submit(self._warm_up))
+        future.add_done_callback(self._on_warm)
+
+    async def wait_until_ready(self):
+        """Block until warm-up has finished"""
+        await self._ready.wait()
+        if self._processor is None:
+            raise RuntimeError(f"OCR workers failed to start: {self.warmup_error}")
+
+    def _warm_up(self):
+        started = time.perf_counter()
+        from ocr_processor import OCRProcessor
+        imported = time.perf_counter()
+        logger.info(f"OCR modules imported in {imported - started:.2f}s")
+
+        processor = OCRProcessor()
+        initialized = time.perf_counter()
+        logger.info(f"OCR processor initialized in {initialized - imported:.2f}s")
+
+        if config.OCR_WARMUP:
+            try:
+                processor.warm_up()
+                logger.info(f"Warm-up page processed in {time.perf_counter() - initialized:.2f}s")
+            except Exception as e:
+                # A failed warm-up only costs latency on the first real page
+                logger.warning(f"OCR warm-up page failed: {str(e)}")
+
+        # The loaded profiles decide whether the processor runs table cell threads
+        plan = static_plan(self.max_workers, table_cell_workers=processor.table_cell_workers)
+        if config.OCR_CONCURRENCY_MODE == "auto":
+            try:
+                plan = benchmark_plan(processor)
+            except Exception as e:
+                logger.warning(f"Concurrency benchmark failed, keeping {plan.workers} workers: {str(e)}")
+
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        return processor, plan
+
+    def _apply_plan(self, plan):
+        """Switch to a new workers x threads mix; only called before any OCR work is queued"""
+        apply_thread_limit(plan.tesseract_threads)
+        if plan.workers != self.max_workers:
+            previous = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=plan.workers, thread_name_prefix="ocr-worker")
+            self.max_workers = plan.workers
+            previous.shutdown(wait=False)
+        self.plan = plan
+        logger.info(
+            f"OCR concurrency ({plan.mode}): {plan.workers} workers x {plan.page_workers} pages "
+            f"+ {plan.table_cell_workers} table cells x {plan.tesseract_threads} Tesseract threads on {plan.cpu_count} CPUs"
+        )
+
+    def _on_warm(self, future: asyncio.Future):
+        try:
+            processor, plan = future.result()
+            self._apply_plan(plan)
+            self._processor = processor
+            logger.info(f"OCR workers ready after {self.warmup_seconds:.2f}s")
+        except Exception as e:
+            self.warmup_error = str(e)
+            logger.error(f"OCR worker warm-up failed: {str(e)}", exc_info=True)
+        self._ready.set()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Schedule a blocking call on the pool"""
+        return self.executor.submit(self._run_tracked, func, *args, **kwargs)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self._run_tracked, func, *args, **kwargs)
+        )
+
+    def _run_tracked(self, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        if self._processor is not None:
+            self._processor.close()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the OCR API
+
+Simulates clients that upload batches to /api/ocr/upload and poll
+/api/ocr/result/{job_id} until completion, and reports throughput,
+upload latency, time-to-completion distribution and error rates.
+
+Runs fully offline: payloads are rendered locally, and the app can be
+driven in-process over ASGI (default) or against a running server:
+
+    python benchmarks/load_test.py --clients 8 --jobs 100
+    python benchmarks/load_test.py --base-url http://localhost:8000 --mix image=3,pdf=1
+    python benchmarks/load_test.py --stub-ocr-seconds 0.2   # HTTP/queue capacity without Tesseract
+
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import cv2
+from PIL import Image
+
+from synthetic_corpus import generate_lines, render_page
+from ocr_benchmark import percentiles
+
+try:
+    import httpx
+except ImportError:
+    print("httpx is required for the load test: pip install httpx")
+    sys.exit(1)
+
+
+def build_payloads(seed: int, dpi: int, pdf_pages: int) -> Dict[str, Tuple[str, bytes, str]]:
+    """Render one image and one PDF to upload repeatedly"""
+    rng = random.Random(seed)
+    page = render_page(generate_lines(rng, 15), dpi, 6.0, 1.0, rng)
+    image_bytes = cv2.imencode(".png", page)[1].tobytes()
+
+    pdf_buffer = io.BytesIO()
+    pages = [Image.fromarray(render_page(generate_lines(rng, 15), dpi, 0.0, 0.0, rng)) for _ in range(pdf_pages)]
+    pages[0].save(pdf_buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=dpi)
+
+    return {
+        "image": ("load-test.png", image_bytes, "image/png"),
+        "pdf": ("load-test.pdf", pdf_buffer.getvalue(), "application/pdf")
+    }
+
+
+def parse_mix(mix: str) -> List[str]:
+    """Turn 'image=3,pdf=1' into a weighted list of payload kinds"""
+    kinds = []
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kinds.extend([kind.strip()] * int(weight or 1))
+    return kinds
+
+
+class LoadStats:
+    """Collects per-request and per-job measurements"""
+
+    def __init__(self):
+        self.upload_latencies: List[float] = []
+        self.completion_times: List[float] = []
+        self.poll_counts: List[int] = []
+        self.statuses: Counter = Counter()
+        self.job_outcomes: Counter = Counter()
+        self.pages = 0
+
+
+async def run_job(
+    client: "httpx.AsyncClient",
+    stats: LoadStats,
+    files: List[Tuple[str, bytes, str]],
+    poll_interval: float,
+    timeout: float,
+    client_id: str,
+    honor_retry_after: bool
+):
+    """Upload one batch and poll it to completion"""
+    started = time.perf_counter()
+    while True:
+        upload_started = time.perf_counter()
+        try:
+            response = await client.post(
+                "/api/ocr/upload",
+                files=[("files", file) for file in files],
+                headers={"X-Client-ID": client_id}
+            )
+        except httpx.HTTPError as e:
+            stats.statuses[type(e).__name__] += 1
+            stats.job_outcomes["transport_error"] += 1
+            return
+        stats.upload_latencies.append(time.perf_counter() - upload_started)
+        stats.statuses[response.status_code] += 1
+
+        if response.status_code in (429, 503) and honor_retry_after:
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            continue
+        break
+
+    if response.status_code != 200:
+        stats.job_outcomes[f"rejected_{response.status_code}"] += 1
+        return
+
+    job_id = response.json()["job_id"]
+    polls = 0
+    while time.perf_counter() - started < timeout:
+        await asyncio.sleep(poll_interval)
+        polls += 1
+        try:
+            result = await client.get(f"/api/ocr/result/{job_id}")
+        except httpx.HTTPError as e:
+            stats.statuses[type(e).__name__] += 1
+            continue
+        stats.statuses[result.status_code] += 1
+        if result.status_code != 200:
+            continue
+
+        body = result.json()
+        if body["status"] != "processing":
+            stats.completion_times.append(time.perf_counter() - started)
+            stats.poll_counts.append(polls)
+            stats.job_outcomes[body["status"]] += 1
+            stats.pages += len(body["results"])
+            return
+
+    stats.job_outcomes["timeout"] += 1
+
+
+async def run_client(client, stats, queue: asyncio.Queue, args, client_id: str):
+    """One simulated client: take jobs off the shared queue until it is empty"""
+    while True:
+        try:
+            files = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        await run_job(client, stats, files, args.poll_interval, args.timeout, client_id, args.honor_retry_after)
+
+
+def install_stub_ocr(main_module, seconds: float):
+    """Replace OCR with a fixed-latency stand-in to measure the HTTP and queueing layers alone"""
+    from cancellation import check_cancelled
+    from models import OCRResult
+
+    class StubProcessor:
+        """Takes the same calls as OCRProcessor; every file is one page of fixed text"""
+
+        capabilities = None
+
+        def process_file(self, file_path, filename, cancel_event=None, document_class=None, parallel=True):
+            check_cancelled(cancel_event, filename)
+            time.sleep(seconds)
+            return [OCRResult(filename=filename, text="stub", confidence=1.0, language="eng", bbox_data=[])]
+
+        def process_image_bytes(self, image_bytes, filename, document_class=None):
+            time.sleep(seconds)
+            return OCRResult(filename=filename, text="stub", confidence=1.0, language="eng", bbox_data=[])
+
+        def get_tesseract_version(self):
+            return "stub"
+
+        def close(self):
+            pass
+
+    def start():
+        # Skip warm-up; the stub is ready immediately
+        pool._processor = StubProcessor()
+        pool._ready = asyncio.Event()
+        pool._ready.set()
+
+    pool = main_module.worker_pool
+    pool.start = start
+
+
+async def run_load_test(args) -> Dict:
+    payloads = build_payloads(args.seed, args.dpi, args.pdf_pages)
+    kinds = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.jobs):
+        queue.put_nowait([payloads[rng.choice(kinds)] for _ in range(args.batch_size)])
+
+    main_module = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        import main as main_module
+        if args.stub_ocr_seconds is not None:
+            install_stub_ocr(main_module, args.stub_ocr_seconds)
+        await main_module.startup_event()
+        await main_module.worker_pool.wait_until_ready()
+        transport = httpx.ASGITransport(app=main_module.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout)
+
+    stats = LoadStats()
+    started = time.perf_counter()
+    try:
+        async with client:
+            await asyncio.gather(*[
+                run_client(client, stats, queue, args, f"load-client-{index % args.distinct_clients}")
+                for index in range(args.clients)
+            ])
+    finally:
+        if main_module is not None:
+            await main_module.shutdown_event()
+    elapsed = time.perf_counter() - started
+
+    completed = stats.job_outcomes.get("completed", 0)
+    error_statuses = sum(count for status, count in stats.statuses.items() if not (isinstance(status, int) and status < 400))
+    total_requests = sum(stats.statuses.values())
+
+    return {
+        "config": {
+            "target": args.base_url or "in-process",
+            "clients": args.clients,
+            "jobs": args.jobs,
+            "batch_size": args.batch_size,
+            "mix": args.mix,
+            "poll_interval": args.poll_interval,
+            "stub_ocr_seconds": args.stub_ocr_seconds
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "jobs_per_sec": round(completed / elapsed, 3) if elapsed else None,
+        "pages_per_sec": round(stats.pages / elapsed, 3) if elapsed else None,
+        "upload_latency": percentiles(stats.upload_latencies),
+        "time_to_completion": percentiles(stats.completion_times),
+        "polls_per_job": percentiles(stats.poll_counts),
+        "job_outcomes": dict(stats.job_outcomes),
+        "http_statuses": {str(status): count for status, count in sorted(stats.statuses.items(), key=str)},
+        "error_rate": round(error_statuses / total_requests, 4) if total_requests else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the OCR API")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent simulated clients")
+    parser.add_argument("--distinct-clients", type=int, default=1000, help="Distinct X-Client-ID values to spread clients over")
+    parser.add_argument("--jobs", type=int, default=20, help="Total jobs to submit")
+    parser.add_argument("--batch-size", type=int, default=1, help="Files per upload")
+    parser.add_argument("--mix", default="image=1", help="Payload weights, e.g. image=3,pdf=1")
+    parser.add_argument("--pdf-pages", type=int, default=3, help="Pages in the PDF payload")
+    parser.add_argument("--dpi", type=int, default=150, help="Rendering DPI of payloads")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between result polls")
+    parser.add_argument("--timeout", type=float, default=300, help="Give up on a job after this many seconds")
+    parser.add_argument("--honor-retry-after", action="store_true", help="Retry 429/503 uploads after Retry-After")
+    parser.add_argument("--stub-ocr-seconds", type=float, help="In-process only: replace OCR with a fixed delay")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.base_url and args.stub_ocr_seconds is not None:
+        parser.error("--stub-ocr-seconds only applies to in-process runs")
+
+    # Per-request client logs would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run_load_test(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
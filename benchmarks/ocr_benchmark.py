@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark for the OCR pipeline
+
+Runs the ImagePreprocessor stages on their own and the full OCRProcessor
+end to end over a synthetic corpus (see synthetic_corpus.py), and reports
+pages/sec, p50/p95 latencies per stage, peak RSS and character error rate
+against the ground truth. Results are written as JSON so runs can be compared:
+
+    python benchmarks/ocr_benchmark.py --corpus-dir /tmp/ocr-corpus --output run.json
+    python benchmarks/ocr_benchmark.py --corpus-dir /tmp/ocr-corpus --compare run.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Tuple
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import cv2
+import numpy as np
+
+from synthetic_corpus import build_corpus, load_corpus
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so layout differences don't count as errors"""
+    return " ".join(text.split())
+
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    """Levenshtein distance between two strings"""
+    if len(reference) < len(hypothesis):
+        reference, hypothesis = hypothesis, reference
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_char != hyp_char)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """Character error rate of hypothesis against reference, after normalization"""
+    reference = normalize_text(reference)
+    hypothesis = normalize_text(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return edit_distance(reference, hypothesis) / len(reference)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Summary statistics for a list of latencies"""
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values)
+    return {
+        "count": len(values),
+        "mean": round(float(array.mean()), 4),
+        "p50": round(float(np.percentile(array, 50)), 4),
+        "p95": round(float(np.percentile(array, 95)), 4),
+        "max": round(float(array.max()), 4)
+    }
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its children (Tesseract)"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+
+def iter_pages(document: Dict) -> Iterator[np.ndarray]:
+    """Yield the raw page images of a corpus document"""
+    if document["type"] == "pdf":
+        from pdf2image import convert_from_path
+        for image in convert_from_path(document["path"], dpi=document["dpi"]):
+            yield cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    else:
+        yield cv2.imread(document["path"])
+
+
+def benchmark_preprocessing(documents: List[Dict], repeat: int) -> Dict:
+    """Run the ImagePreprocessor pipeline alone and time each stage"""
+    from image_preprocessor import ImagePreprocessor
+    from timing import StageTimer, recording
+
+    preprocessor = ImagePreprocessor()
+    stage_times = defaultdict(list)
+    page_times = []
+
+    pages = [page for document in documents for page in iter_pages(document)]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            with recording(StageTimer()) as timer:
+                preprocessor.preprocess_image_array(page)
+            for stage, seconds in timer.stages.items():
+                stage_times[stage].append(seconds)
+            page_times.append(timer.elapsed())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "pages": len(page_times),
+        "pages_per_sec": round(len(page_times) / elapsed, 3) if elapsed else None,
+        "page_latency": percentiles(page_times),
+        "stages": {stage: percentiles(times) for stage, times in sorted(stage_times.items())}
+    }
+
+
+def benchmark_end_to_end(documents: List[Dict], repeat: int) -> Dict:
+    """Run OCRProcessor.process_file on every document and score it"""
+    from ocr_processor import OCRProcessor
+    from timing import StageTimer, recording
+
+    processor = OCRProcessor()
+    processor.warm_up()
+
+    stage_times = defaultdict(list)
+    page_times = []
+    document_times = []
+    pipelines = Counter()
+    cer_by_condition: Dict[Tuple, List[float]] = defaultdict(list)
+    all_cer = []
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for document in documents:
+            with recording(StageTimer()) as file_timer:
+                results = processor.process_file(document["path"], os.path.basename(document["path"]))
+            document_times.append(file_timer.elapsed())
+
+            for stage, seconds in file_timer.stages.items():
+                stage_times[stage].append(seconds)
+
+            for result, truth in zip(results, document["pages"]):
+                for stage, seconds in (result.timings or {}).items():
+                    if stage != "total":
+                        stage_times[stage].append(seconds)
+                page_times.append((result.timings or {}).get("total", 0.0))
+                pipelines[result.preprocessing] += 1
+
+                cer = character_error_rate(truth, result.text)
+                all_cer.append(cer)
+                cer_by_condition[(document["dpi"], document["noise"], document["skew"])].append(cer)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "documents": len(document_times),
+        "pages": len(page_times),
+        "pages_per_sec": round(len(page_times) / elapsed, 3) if elapsed else None,
+        "page_latency": percentiles(page_times),
+        "document_latency": percentiles(document_times),
+        "stages": {stage: percentiles(times) for stage, times in sorted(stage_times.items())},
+        "pipelines": dict(pipelines),
+        "cer": round(float(np.mean(all_cer)), 4) if all_cer else None,
+        "cer_by_condition": [
+            {"dpi": dpi, "noise": noise, "skew": skew, "cer": round(float(np.mean(values)), 4)}
+            for (dpi, noise, skew), values in sorted(cer_by_condition.items())
+        ]
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    """Print headline metrics of two runs side by side"""
+    rows = [
+        ("preprocess pages/sec", ("preprocessing", "pages_per_sec")),
+        ("preprocess p95 (s)", ("preprocessing", "page_latency", "p95")),
+        ("end-to-end pages/sec", ("end_to_end", "pages_per_sec")),
+        ("end-to-end p50 (s)", ("end_to_end", "page_latency", "p50")),
+        ("end-to-end p95 (s)", ("end_to_end", "page_latency", "p95")),
+        ("CER", ("end_to_end", "cer")),
+        ("peak RSS self (MB)", ("peak_rss_mb", "self")),
+    ]
+
+    def lookup(data, path):
+        for key in path:
+            if not isinstance(data, dict) or key not in data:
+                return None
+            data = data[key]
+        return data
+
+    print(f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for label, path in rows:
+        old, new = lookup(baseline, path), lookup(current, path)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+        print(f"{label:<24}{str(old):>12}{str(new):>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipeline on a synthetic corpus")
+    parser.add_argument("--corpus-dir", default="benchmark-corpus", help="Corpus location (generated if missing)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed used when generating the corpus")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+    parser.add_argument("--skip-ocr", action="store_true", help="Only benchmark preprocessing (no Tesseract needed)")
+    parser.add_argument("--adaptive", action="store_true", help="Run end to end with adaptive preprocessing")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run to compare against")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus_dir, "manifest.json")):
+        print(f"Generating corpus in {args.corpus_dir} (seed {args.seed})...")
+        build_corpus(args.corpus_dir, seed=args.seed)
+    documents = load_corpus(args.corpus_dir)["documents"]
+
+    import config
+    if args.adaptive:
+        config.ADAPTIVE_PREPROCESSING = True
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "tesseract_config": config.TESSERACT_CONFIG,
+            "adaptive_preprocessing": config.ADAPTIVE_PREPROCESSING
+        },
+        "corpus": {"dir": args.corpus_dir, "documents": len(documents)},
+        "repeat": args.repeat
+    }
+
+    print("Benchmarking preprocessing...")
+    report["preprocessing"] = benchmark_preprocessing(documents, args.repeat)
+
+    if not args.skip_ocr:
+        print("Benchmarking end to end...")
+        report["end_to_end"] = benchmark_end_to_end(documents, args.repeat)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic document corpus for OCR benchmarks
+
+Renders pages of known text at several DPIs, noise levels and skew angles,
+plus multi-page PDFs, and writes a manifest with the ground truth text.
+The same seed always produces the same corpus.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Dict, List
+
+import cv2
+import numpy as np
+from PIL import Image
+
+WORDS = (
+    "invoice total amount due date customer account number payment received "
+    "balance order quantity price description item tax shipping address city "
+    "street reference receipt cash card subtotal discount service period "
+    "statement report summary office document page signature approved"
+).split()
+
+PAGE_WIDTH_INCHES = 8.27  # A4
+PAGE_HEIGHT_INCHES = 11.69
+MARGIN_INCHES = 0.75
+
+DEFAULT_DPIS = (150, 300)
+DEFAULT_NOISE_LEVELS = (0.0, 12.0)  # Gaussian noise sigma, in grey levels
+DEFAULT_SKEW_ANGLES = (0.0, 2.5)  # Degrees
+DEFAULT_PDF_PAGES = 3
+
+
+def generate_lines(rng: random.Random, line_count: int, words_per_line: int = 6) -> List[str]:
+    """Generate lines of pseudo-document text"""
+    lines = []
+    for _ in range(line_count):
+        words = [rng.choice(WORDS) for _ in range(words_per_line)]
+        # Mix in numbers, as real documents are full of them
+        words[rng.randrange(words_per_line)] = f"{rng.randint(1, 9999)}.{rng.randint(0, 99):02d}"
+        lines.append(" ".join(words))
+    return lines
+
+
+def render_page(lines: List[str], dpi: int, noise: float, skew: float, rng: random.Random) -> np.ndarray:
+    """Render text lines onto a white page and degrade it like a scan"""
+    width = int(PAGE_WIDTH_INCHES * dpi)
+    height = int(PAGE_HEIGHT_INCHES * dpi)
+    margin = int(MARGIN_INCHES * dpi)
+    page = np.full((height, width), 255, dtype=np.uint8)
+
+    # Roughly 12pt text regardless of DPI
+    font_scale = dpi / 150.0
+    thickness = max(1, int(round(dpi / 150.0)))
+    line_height = int(dpi * 0.35)
+
+    y = margin + line_height
+    for line in lines:
+        if y > height - margin:
+            break
+        cv2.putText(page, line, (margin, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thickness, cv2.LINE_AA)
+        y += line_height
+
+    if skew:
+        center = (width / 2, height / 2)
+        rotation_matrix = cv2.getRotationMatrix2D(center, skew, 1.0)
+        page = cv2.warpAffine(page, rotation_matrix, (width, height), borderValue=255)
+
+    if noise:
+        noise_rng = np.random.default_rng(rng.randrange(2 ** 32))
+        noisy = page.astype(np.float32) + noise_rng.normal(0, noise, page.shape)
+        page = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    return page
+
+
+def document_class(noise: float, skew: float) -> str:
+    """Label a page the way a tuning run groups documents"""
+    if noise:
+        return "noisy"
+    if skew:
+        return "skewed"
+    return "clean"
+
+
+def build_corpus(
+    output_dir: str,
+    seed: int = 42,
+    dpis=DEFAULT_DPIS,
+    noise_levels=DEFAULT_NOISE_LEVELS,
+    skew_angles=DEFAULT_SKEW_ANGLES,
+    pdf_pages: int = DEFAULT_PDF_PAGES,
+    lines_per_page: int = 20
+) -> Dict:
+    """
+    Generate the corpus into output_dir and return its manifest
+
+    Args:
+        output_dir: Directory for images, PDFs and manifest.json
+        seed: Random seed; identical seeds give identical corpora
+        dpis: Rendering resolutions
+        noise_levels: Gaussian noise sigmas
+        skew_angles: Rotation angles in degrees
+        pdf_pages: Pages per multi-page PDF (0 to skip PDFs)
+        lines_per_page: Text lines per page
+
+    Returns:
+        Manifest dict with one entry per document and its ground truth per page
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    documents = []
+
+    for dpi in dpis:
+        for noise in noise_levels:
+            for skew in skew_angles:
+                doc_id = f"page_{dpi}dpi_noise{noise:g}_skew{skew:g}"
+                lines = generate_lines(rng, lines_per_page)
+                page = render_page(lines, dpi, noise, skew, rng)
+                path = os.path.join(output_dir, f"{doc_id}.png")
+                cv2.imwrite(path, page)
+                documents.append({
+                    "id": doc_id,
+                    "path": os.path.basename(path),
+                    "type": "image",
+                    "class": document_class(noise, skew),
+                    "dpi": dpi,
+                    "noise": noise,
+                    "skew": skew,
+                    "pages": ["\n".join(lines)]
+                })
+
+        if pdf_pages:
+            doc_id = f"pdf_{dpi}dpi_{pdf_pages}pages"
+            page_texts = []
+            page_images = []
+            for _ in range(pdf_pages):
+                lines = generate_lines(rng, lines_per_page)
+                page_texts.append("\n".join(lines))
+                page_images.append(Image.fromarray(render_page(lines, dpi, 0.0, 0.0, rng)))
+            path = os.path.join(output_dir, f"{doc_id}.pdf")
+            page_images[0].save(path, save_all=True, append_images=page_images[1:], resolution=dpi)
+            documents.append({
+                "id": doc_id,
+                "path": os.path.basename(path),
+                "type": "pdf",
+                "class": document_class(0.0, 0.0),
+                "dpi": dpi,
+                "noise": 0.0,
+                "skew": 0.0,
+                "pages": page_texts
+            })
+
+    manifest = {"seed": seed, "documents": documents}
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_corpus(corpus_dir: str) -> Dict:
+    """Load a corpus manifest, resolving document paths"""
+    with open(os.path.join(corpus_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    for document in manifest["documents"]:
+        document["path"] = os.path.join(corpus_dir, document["path"])
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic OCR corpus")
+    parser.add_argument("output_dir", help="Directory to write the corpus to")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dpi", type=int, nargs="+", default=list(DEFAULT_DPIS))
+    parser.add_argument("--noise", type=float, nargs="+", default=list(DEFAULT_NOISE_LEVELS))
+    parser.add_argument("--skew", type=float, nargs="+", default=list(DEFAULT_SKEW_ANGLES))
+    parser.add_argument("--pdf-pages", type=int, default=DEFAULT_PDF_PAGES)
+    parser.add_argument("--lines-per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    manifest = build_corpus(
+        args.output_dir, args.seed, args.dpi, args.noise, args.skew, args.pdf_pages, args.lines_per_page
+    )
+    print(f"Wrote {len(manifest['documents'])} documents to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
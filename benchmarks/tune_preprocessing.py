@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tune preprocessing parameters per document class
+
+Sweeps ImagePreprocessor and Tesseract parameters (denoising, deskew, CLAHE,
+thresholding, page segmentation mode) over a labeled corpus, measures
+character error rate and seconds per page for every combination, and keeps
+the Pareto front of accuracy against speed for each document class. From
+each front it picks the fastest profile within --cer-tolerance of the most
+accurate one and writes the profiles the service loads through
+PREPROCESSING_PROFILES_PATH:
+
+    python benchmarks/tune_preprocessing.py --corpus-dir /tmp/ocr-corpus --output profiles.json
+    PREPROCESSING_PROFILES_PATH=profiles.json python backend/main.py
+
+Documents are grouped by the "class" field of the corpus manifest (see
+synthetic_corpus.py); label a real sample corpus the same way to tune on it.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from synthetic_corpus import build_corpus, load_corpus
+from ocr_benchmark import character_error_rate, iter_pages
+
+# Values tried for each PreprocessingProfile field; fields not listed keep their defaults
+DEFAULT_GRID = {
+    "denoise": [False, True],
+    "denoise_strength": [7, 10],
+    "deskew": [False, True],
+    "clahe": [False, True],
+    "threshold_block_size": [11, 31],
+    "tesseract_config": ["--psm 6", "--psm 3"],
+}
+
+
+def candidate_profiles(grid: Dict[str, List]) -> List[Dict]:
+    """Every combination of the grid, without duplicates that only differ in unused parameters"""
+    from models import PreprocessingProfile
+
+    defaults = PreprocessingProfile()
+    seen = set()
+    candidates = []
+    # Always score the service's current defaults as the baseline
+    for values in [None] + list(itertools.product(*grid.values())):
+        params = dict(zip(grid.keys(), values)) if values else {}
+        profile = PreprocessingProfile(**params).model_dump()
+        if not profile["denoise"]:
+            for field in ("denoise_strength", "denoise_template_window", "denoise_search_window"):
+                profile[field] = getattr(defaults, field)
+        if not profile["clahe"]:
+            profile["clahe_clip_limit"] = defaults.clahe_clip_limit
+            profile["clahe_tile_grid"] = defaults.clahe_tile_grid
+        key = json.dumps(profile, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(profile)
+    return candidates
+
+
+def score_class(processor, pages: List, candidates: List[Dict]) -> List[Dict]:
+    """CER and seconds per page of every candidate on one class of pages"""
+    from models import PreprocessingProfile
+
+    scores = []
+    # Profiles that only differ in Tesseract settings share the preprocessed pages
+    preprocessed_cache = {}
+    for profile in candidates:
+        preprocessing = {k: v for k, v in profile.items() if k != "tesseract_config"}
+        cache_key = json.dumps(preprocessing, sort_keys=True)
+        if cache_key not in preprocessed_cache:
+            preprocessed = []
+            for image, truth in pages:
+                started = time.perf_counter()
+                processed = processor.preprocessor.preprocess_image_array(image, PreprocessingProfile(**preprocessing))
+                preprocessed.append((processed, truth, time.perf_counter() - started))
+            preprocessed_cache = {cache_key: preprocessed}
+
+        errors = []
+        seconds = []
+        for processed, truth, preprocess_seconds in preprocessed_cache[cache_key]:
+            started = time.perf_counter()
+            result = processor._run_ocr(processed, "tuning", tesseract_config=profile["tesseract_config"])
+            seconds.append(preprocess_seconds + time.perf_counter() - started)
+            errors.append(character_error_rate(truth, result.text))
+
+        scores.append({
+            "profile": profile,
+            "cer": round(sum(errors) / len(errors), 4),
+            "seconds_per_page": round(sum(seconds) / len(seconds), 4)
+        })
+    return scores
+
+
+def pareto_front(scores: List[Dict]) -> List[Dict]:
+    """Scores not beaten on both CER and speed by any other, fastest first"""
+    front = []
+    best_cer = float("inf")
+    for score in sorted(scores, key=lambda s: (s["seconds_per_page"], s["cer"])):
+        if score["cer"] < best_cer:
+            front.append(score)
+            best_cer = score["cer"]
+    return front
+
+
+def select_profile(front: List[Dict], cer_tolerance: float) -> Dict:
+    """Fastest point on the front whose CER is within tolerance of the most accurate"""
+    best_cer = min(score["cer"] for score in front)
+    return next(score for score in front if score["cer"] <= best_cer + cer_tolerance)
+
+
+def combine_scores(class_scores: Dict[str, List[Dict]], page_counts: Dict[str, int]) -> List[Dict]:
+    """Page-weighted scores over all classes, for the default profile"""
+    total_pages = sum(page_counts.values())
+    combined = {}
+    for document_class, scores in class_scores.items():
+        weight = page_counts[document_class] / total_pages
+        for score in scores:
+            key = json.dumps(score["profile"], sort_keys=True)
+            entry = combined.setdefault(key, {"profile": score["profile"], "cer": 0.0, "seconds_per_page": 0.0})
+            entry["cer"] += score["cer"] * weight
+            entry["seconds_per_page"] += score["seconds_per_page"] * weight
+    for entry in combined.values():
+        entry["cer"] = round(entry["cer"], 4)
+        entry["seconds_per_page"] = round(entry["seconds_per_page"], 4)
+    return list(combined.values())
+
+
+def summarize(scores: List[Dict], front: List[Dict], selected: Dict, pages: int) -> Dict:
+    baseline = scores[0]
+    return {
+        "pages": pages,
+        "baseline": {"cer": baseline["cer"], "seconds_per_page": baseline["seconds_per_page"]},
+        "selected": {"cer": selected["cer"], "seconds_per_page": selected["seconds_per_page"]},
+        "pareto": front
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune preprocessing parameters per document class")
+    parser.add_argument("--corpus-dir", default="benchmark-corpus", help="Labeled corpus (synthetic one generated if missing)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed used when generating the corpus")
+    parser.add_argument("--grid", help="JSON file mapping profile fields to lists of values to try")
+    parser.add_argument("--cer-tolerance", type=float, default=0.005, help="CER given up for speed when selecting")
+    parser.add_argument("--max-pages-per-class", type=int, default=20, help="Limit pages scored per class")
+    parser.add_argument("--output", default="preprocessing_profiles.json", help="Profiles file for the service")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus_dir, "manifest.json")):
+        print(f"Generating corpus in {args.corpus_dir} (seed {args.seed})...")
+        build_corpus(args.corpus_dir, seed=args.seed)
+    documents = load_corpus(args.corpus_dir)["documents"]
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    candidates = candidate_profiles(grid)
+
+    pages_by_class = defaultdict(list)
+    for document in documents:
+        document_class = document.get("class", document["type"])
+        for image, truth in zip(iter_pages(document), document["pages"]):
+            if len(pages_by_class[document_class]) < args.max_pages_per_class:
+                pages_by_class[document_class].append((image, truth))
+
+    from ocr_processor import OCRProcessor
+    processor = OCRProcessor()
+    processor.warm_up()
+
+    class_scores = {}
+    output = {"default": None, "classes": {}, "tuning": {"corpus": args.corpus_dir, "cer_tolerance": args.cer_tolerance, "grid": grid, "classes": {}}}
+    for document_class, pages in sorted(pages_by_class.items()):
+        print(f"Tuning '{document_class}': {len(candidates)} profiles x {len(pages)} pages...")
+        scores = score_class(processor, pages, candidates)
+        class_scores[document_class] = scores
+        front = pareto_front(scores)
+        selected = select_profile(front, args.cer_tolerance)
+        output["classes"][document_class] = selected["profile"]
+        output["tuning"]["classes"][document_class] = summarize(scores, front, selected, len(pages))
+        print(f"  baseline CER {scores[0]['cer']:.4f} at {scores[0]['seconds_per_page']:.3f}s/page, "
+              f"selected CER {selected['cer']:.4f} at {selected['seconds_per_page']:.3f}s/page")
+
+    page_counts = {document_class: len(pages) for document_class, pages in pages_by_class.items()}
+    combined = combine_scores(class_scores, page_counts)
+    front = pareto_front(combined)
+    selected = select_profile(front, args.cer_tolerance)
+    output["default"] = selected["profile"]
+    output["tuning"]["default"] = summarize(combined, front, selected, sum(page_counts.values()))
+
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Profiles written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
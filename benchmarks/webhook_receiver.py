@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a webhook receiver
+
+Accepts the job completion callbacks the OCR API sends to callback_url,
+verifies their signature and prints each event as a JSON line. Use it to
+try webhooks without a real client, and --fail-first / --status to watch
+the retries and backoff:
+
+    python benchmarks/webhook_receiver.py --port 9000 --secret s3cret
+    WEBHOOK_SECRET=s3cret WEBHOOK_ALLOWED_HOSTS=localhost python backend/main.py
+    curl -F "files=@scan.png" "http://localhost:8000/api/ocr/upload?callback_url=http://localhost:9000/hook"
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(args):
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["requests"] += 1
+
+            if args.secret:
+                expected = "sha256=" + hmac.new(args.secret.encode(), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(expected, self.headers.get("X-OCR-Signature", "")):
+                    print(json.dumps({"error": "bad signature"}), flush=True)
+                    self._respond(401)
+                    return
+
+            if state["requests"] <= args.fail_first:
+                self._respond(args.status)
+                return
+
+            for event in json.loads(body)["events"]:
+                event["received_at"] = time.time()
+                print(json.dumps(event), flush=True)
+            self._respond(200)
+
+        def _respond(self, status: int):
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            # Events are printed above; request lines would only add noise
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print OCR API webhook events")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--secret", help="WEBHOOK_SECRET of the API, to verify X-OCR-Signature")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with --status")
+    parser.add_argument("--status", type=int, default=503, help="Status of the failed requests")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Listening on http://{args.host}:{args.port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())